@@ -0,0 +1,189 @@
+'''
+File to maintain the derived summary tables that are
+built on top of the loaded tables, refreshing only the
+seasons touched by the current load
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import logging
+
+from components.db_backend import connect_to_database
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# definition of every aggregate table: its columns, the column
+# used to scope a refresh and the query that rebuilds the given seasons.
+# the box score "season" is labelled by the year the season ends,
+# while the payroll uses the year it starts, hence the "+ 1" below
+AGGREGATE_TABLES = {
+    'player_season_totals': {
+        'columns': '''
+        season INT,
+        player_id INT,
+        games INT,
+        min INT,
+        pts INT,
+        fgm INT,
+        fga FLOAT,
+        fg3m FLOAT,
+        fg3a FLOAT,
+        ftm INT,
+        fta FLOAT,
+        oreb FLOAT,
+        dreb FLOAT,
+        reb FLOAT,
+        ast FLOAT,
+        stl FLOAT,
+        blk FLOAT,
+        tov FLOAT,
+        pf FLOAT,
+        plus_minus FLOAT,
+        refreshed_at TIMESTAMP,
+        PRIMARY KEY (season, player_id)
+        ''',
+        'season_column': 'season',
+        'refresh_query': '''
+        SELECT
+            season,
+            player_id,
+            COUNT(DISTINCT game_id),
+            SUM(min),
+            SUM(pts),
+            SUM(fgm),
+            SUM(fga),
+            SUM(fg3m),
+            SUM(fg3a),
+            SUM(ftm),
+            SUM(fta),
+            SUM(oreb),
+            SUM(dreb),
+            SUM(reb),
+            SUM(ast),
+            SUM(stl),
+            SUM(blk),
+            SUM(tov),
+            SUM(pf),
+            SUM(plus_minus),
+            now()
+        FROM {schema_name}.player_box_score_stats
+        WHERE season = ANY(%(seasons)s)
+        GROUP BY season, player_id
+        '''},
+    'team_season_payroll_results': {
+        'columns': '''
+        team_id INT,
+        season_start_year INT,
+        payroll FLOAT,
+        inflation_adj_payroll FLOAT,
+        games INT,
+        wins INT,
+        losses INT,
+        payroll_per_win FLOAT,
+        refreshed_at TIMESTAMP,
+        PRIMARY KEY (team_id, season_start_year)
+        ''',
+        'season_column': 'season_start_year',
+        'refresh_query': '''
+        WITH results AS (
+            SELECT
+                team_id,
+                season - 1 AS season_start_year,
+                COUNT(DISTINCT game_id) AS games,
+                COUNT(DISTINCT game_id) FILTER (WHERE wl = 'W') AS wins,
+                COUNT(DISTINCT game_id) FILTER (WHERE wl = 'L') AS losses
+            FROM {schema_name}.player_box_score_stats
+            WHERE season = ANY(ARRAY(SELECT unnest(%(seasons)s::INT[]) + 1))
+            GROUP BY team_id, season)
+        SELECT
+            p.team_id,
+            p.season_start_year,
+            MAX(p.payroll),
+            MAX(p.inflation_adj_payroll),
+            r.games,
+            r.wins,
+            r.losses,
+            MAX(p.payroll) / NULLIF(r.wins, 0),
+            now()
+        FROM {schema_name}.nba_payroll p
+        LEFT JOIN results r
+            ON r.team_id = p.team_id AND r.season_start_year = p.season_start_year
+        WHERE p.season_start_year = ANY(%(seasons)s)
+        GROUP BY p.team_id, p.season_start_year, r.games, r.wins, r.losses
+        '''}
+}
+
+
+def refresh_aggregate_table_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        aggregate_name: str,
+        seasons: list) -> None:
+    '''Function that creates an aggregate table if it does not exist
+    and recomputes only the rows of the given seasons, in a single transaction,
+    so the readers never see a season half refreshed
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the source and the aggregate tables are
+
+    :param aggregate_name: (str)
+    The name of the aggregate table, one of the keys of "AGGREGATE_TABLES"
+
+    :param seasons: (list)
+    Seasons touched by the current load, the only ones that will be recomputed
+    '''
+    if not len(seasons):
+        logging.info(
+            f'No seasons were touched, {aggregate_name} refresh skipped')
+        return
+
+    aggregate = AGGREGATE_TABLES[aggregate_name]
+    season_column = aggregate['season_column']
+    params = {'seasons': [int(season) for season in seasons]}
+
+    # Connection to the PostgresSQL database
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+    cur = conn.cursor()
+
+    # Create the aggregate table if it does not exist
+    cur.execute(
+        f'CREATE TABLE IF NOT EXISTS {schema_name}.{aggregate_name} ({aggregate["columns"]})')
+
+    # Replace only the rows of the seasons touched by the load
+    cur.execute(
+        f'DELETE FROM {schema_name}.{aggregate_name} WHERE {season_column} = ANY(%(seasons)s)',
+        params)
+    refresh_query = aggregate['refresh_query'].format(schema_name=schema_name)
+    cur.execute(
+        f'INSERT INTO {schema_name}.{aggregate_name} {refresh_query}', params)
+    logging.info(
+        f'The aggregate {aggregate_name} was refreshed for seasons {params["seasons"]}: SUCCESS')
+
+    # Commit changes and close the connection
+    conn.commit()
+    cur.close()
+    conn.close()
@@ -7,21 +7,66 @@ Date: April/2023
 '''
 
 # import necessary packages
+import io
+import os
+import csv
+import json
+import time
+import random
 import logging
 import zipfile
+import zlib
+import shutil
+import hashlib
+import itertools
+import collections
+import tempfile
+import requests
 import pandas as pd
-from kaggle.api.kaggle_api_extended import KaggleApi
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+from components.parallel_transform import SHARED_MEMORY_DIR
+from components.parallel_transform import read_arrow_file, write_arrow_file
 
 logging.basicConfig(
     level=logging.INFO,
     filemode='w',
     format='%(name)s - %(levelname)s - %(message)s')
 
+KAGGLE_DOWNLOAD_URL = 'https://www.kaggle.com/api/v1/datasets/download/{username}/{page_name}/{file_name}'
+KAGGLE_DATASET_DOWNLOAD_URL = 'https://www.kaggle.com/api/v1/datasets/download/{username}/{page_name}'
+
+
+def get_kaggle_credentials() -> tuple:
+    '''Function that authenticates with the Kaggle API and returns the
+    credentials used by the downloads
+
+    :return: (tuple)
+    User and key for the basic authentication
+    '''
+    # the kaggle package authenticates as soon as it is imported,
+    # so it is only imported when a download is really needed
+    from kaggle.api.kaggle_api_extended import KaggleApi
+
+    # instantiate the API
+    api = KaggleApi()
+    api.authenticate()
+    logging.info('Authenticated API: SUCCESS')
+    return (
+        api.config_values[api.CONFIG_NAME_USER],
+        api.config_values[api.CONFIG_NAME_KEY])
+
 
 def collect_from_kaggle(
-        username: str, page_name:str, file_name:str, path_to_save: str) -> None:
+        username: str,
+        page_name:str,
+        file_name:str,
+        path_to_save: str,
+        index_column: str = None) -> None:
     '''Function to connect to the Kaggle API, download 
-    a given dataset and save it to a local file
+    a given dataset and save it to a local file.
+    An interrupted download is resumed from where it stopped
+    the next time this function runs
 
     :param username: (str)
     Name of the user who uploaded the dataset
@@ -34,39 +79,425 @@ def collect_from_kaggle(
 
     :param path_to_save: (str)
     Path of the file where you want to save the downloaded dataset
+
+    :param index_column: (str)
+    Column of the csv used to build its sidecar index, for example: "season"
     '''
-    # instantiate the API
-    api = KaggleApi()
-    api.authenticate()
-    logging.info('Authenticated API: SUCCESS')
+    auth = get_kaggle_credentials()
 
     # Download files (datasets)
+    url = KAGGLE_DOWNLOAD_URL.format(
+        username=username, page_name=page_name, file_name=quote(file_name))
+    archive_path = f'{path_to_save}/{file_name}.zip'
+    os.makedirs(path_to_save, exist_ok=True)
     try:
-        api.dataset_download_file(
-            f'{username}/{page_name}',
-            file_name=file_name,
-            path=path_to_save)
+        download_with_resume(url, archive_path, auth=auth)
         logging.info(f'Downloaded {file_name} data: SUCCESS')
-        
-        # unzip kaggle files
-        with zipfile.ZipFile(f'{path_to_save}/{file_name}.zip', 'r') as zipref:
-            zipref.extractall(path=path_to_save)
-        logging.info(f'Unzipped {file_name} file: SUCCESS')
-    except:
-        logging.info(f'Check if API prohibited the download of this dataset {file_name}: ERROR')
+    except requests.RequestException as error:
+        logging.error(
+            f'Check if API prohibited the download of this dataset {file_name}, {error}: ERROR')
+        return
+
+    # check the archive before unzipping kaggle files
+    if not is_valid_zip_archive(archive_path):
+        os.remove(archive_path)
+        logging.error(
+            f'The {file_name} archive is corrupted and was removed, run it again: ERROR')
+        return
+
+    with zipfile.ZipFile(archive_path, 'r') as zipref:
+        zipref.extractall(path=path_to_save)
+    logging.info(f'Unzipped {file_name} file: SUCCESS')
+
+    if index_column is not None:
+        build_csv_index(f'{path_to_save}/{file_name}', index_column)
+
+
+def _extract_member(
+        archive_path: str,
+        member_name: str,
+        path_to_save: str,
+        index_column: str) -> str:
+    '''Work done by each process: extract one member of the archive,
+    checking its CRC, and build its sidecar index. The member is written
+    to a temporary file that replaces the saved one only once it was read
+    to the end with a valid CRC, so a corrupted archive keeps the old file'''
+    file_path = os.path.join(path_to_save, member_name)
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(file_path) or '.', suffix='.part', delete=False)
+    try:
+        with temp_file, zipfile.ZipFile(archive_path, 'r') as zipref:
+            with zipref.open(member_name) as member:
+                # the CRC is checked when the end of the member is read
+                shutil.copyfileobj(member, temp_file)
+        os.replace(temp_file.name, file_path)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+    if index_column is not None:
+        build_csv_index(file_path, index_column)
+    return file_path
+
+
+def collect_dataset_from_kaggle(
+        username: str,
+        page_name: str,
+        file_names: list,
+        path_to_save: str,
+        index_columns: dict = None,
+        n_workers: int = None) -> None:
+    '''Function that downloads the archive of a whole Kaggle dataset with
+    a single request and extracts only the requested files, each one in its
+    own process. Better than "collect_from_kaggle" when several files of the
+    same dataset are needed. An interrupted download is resumed from where
+    it stopped the next time this function runs
+
+    :param username: (str)
+    Name of the user who uploaded the dataset
+
+    :param page_name: (str)
+    Name of the page of the dataset
+
+    :param file_names: (list)
+    File names of the dataset to be extracted, the others stay in the archive
+
+    :param path_to_save: (str)
+    Path of the directory where the archive and the files are saved
+
+    :param index_columns: (dict)
+    Column of the sidecar index of each csv, for example: {"stats.csv": "season"}
+
+    :param n_workers: (int)
+    Number of processes extracting the files, by default one per file
+    '''
+    index_columns = index_columns or {}
+    auth = get_kaggle_credentials()
+
+    url = KAGGLE_DATASET_DOWNLOAD_URL.format(username=username, page_name=page_name)
+    archive_path = f'{path_to_save}/{page_name}.zip'
+    os.makedirs(path_to_save, exist_ok=True)
+    try:
+        download_with_resume(url, archive_path, auth=auth)
+        logging.info(f'Downloaded {page_name} dataset: SUCCESS')
+    except requests.RequestException as error:
+        logging.error(
+            f'Check if API prohibited the download of this dataset {page_name}, {error}: ERROR')
+        return
+
+    if not zipfile.is_zipfile(archive_path):
+        os.remove(archive_path)
+        logging.error(
+            f'The {page_name} archive is corrupted and was removed, run it again: ERROR')
+        return
+
+    with zipfile.ZipFile(archive_path, 'r') as zipref:
+        members = set(zipref.namelist())
+    missing_files = [file_name for file_name in file_names if file_name not in members]
+    if missing_files:
+        logging.error(f'The files {missing_files} are not in the {page_name} archive: ERROR')
+    file_names = [file_name for file_name in file_names if file_name in members]
+
+    # the members are decompressed at the same time, each CRC is checked as it is
+    # read and the files already saved are only replaced by the members that pass it
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers or max(1, len(file_names))) as executor:
+            futures = [
+                executor.submit(
+                    _extract_member,
+                    archive_path,
+                    file_name,
+                    path_to_save,
+                    index_columns.get(file_name))
+                for file_name in file_names]
+            for file_name, future in zip(file_names, futures):
+                future.result()
+                logging.info(f'Unzipped {file_name} file: SUCCESS')
+    except (zipfile.BadZipFile, zlib.error):
+        os.remove(archive_path)
+        logging.error(
+            f'The {page_name} archive is corrupted and was removed, run it again: ERROR')
+
+
+def download_with_resume(
+        url: str,
+        file_path: str,
+        auth: tuple = None,
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60.0,
+        chunk_size: int = 1024 * 1024,
+        timeout: float = 60.0) -> None:
+    '''Function that downloads a file into "<file_path>.part" and, when
+    the transfer fails midway, asks only for the missing bytes with a range
+    request. The failed attempts are retried with exponential backoff and
+    jitter, and the file is only renamed to its final path once complete
+
+    :param url: (str)
+    Address of the file to download
+
+    :param file_path: (str)
+    Path where the downloaded file will be saved
+
+    :param auth: (tuple)
+    User and key for the basic authentication, if the server needs it
+
+    :param max_retries: (int)
+    How many times a failed attempt is retried before giving up
+
+    :param backoff_factor: (float)
+    Seconds of the first backoff, doubled at each new attempt
+
+    :param max_backoff: (float)
+    Maximum number of seconds to wait between two attempts
+
+    :param chunk_size: (int)
+    Number of bytes written to the disk at a time
+
+    :param timeout: (float)
+    Seconds to wait for the server before the attempt fails
+    '''
+    partial_path = f'{file_path}.part'
+
+    for attempt in range(max_retries + 1):
+        downloaded = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = {'Range': f'bytes={downloaded}-'} if downloaded else {}
+
+        try:
+            with requests.get(
+                    url, headers=headers, auth=auth, stream=True, timeout=timeout) as response:
+                # the partial file already has every byte of the remote file
+                if downloaded and response.status_code == 416:
+                    os.replace(partial_path, file_path)
+                    return
+                response.raise_for_status()
+
+                # a server that ignores the range sends the whole file again
+                resumed = response.status_code == 206
+                expected_size = _get_expected_size(response, downloaded if resumed else 0)
+                with open(partial_path, 'ab' if resumed else 'wb') as file:
+                    for chunk in response.iter_content(chunk_size):
+                        file.write(chunk)
+
+            if expected_size is not None and os.path.getsize(partial_path) != expected_size:
+                raise requests.ConnectionError(
+                    f'{os.path.getsize(partial_path)} of {expected_size} bytes were downloaded')
+            os.replace(partial_path, file_path)
+            return
+
+        except requests.RequestException as error:
+            status_code = getattr(error.response, 'status_code', None)
+            retryable = status_code is None or status_code >= 500 or status_code in (408, 429)
+            if not retryable or attempt == max_retries:
+                raise
+
+            # full jitter: a random wait up to the exponential backoff
+            delay = random.uniform(0, min(max_backoff, backoff_factor * 2 ** attempt))
+            logging.warning(
+                f'Download attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s')
+            time.sleep(delay)
+
+
+def _get_expected_size(response: requests.Response, offset: int) -> int:
+    '''Size the file will have when the response is fully written,
+    or None when the server does not tell it'''
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+
+    content_length = response.headers.get('Content-Length')
+    if content_length is not None:
+        return offset + int(content_length)
+    return None
+
+
+def is_valid_zip_archive(file_path: str) -> bool:
+    '''Function that checks the integrity of a zip archive before
+    extracting it, reading every member against its CRC
+
+    :param file_path: (str)
+    A path to the zip archive
+
+    :return: (bool)
+    True if the archive can be safely extracted
+    '''
+    if not zipfile.is_zipfile(file_path):
+        return False
+
+    try:
+        with zipfile.ZipFile(file_path, 'r') as zipref:
+            return zipref.testzip() is None
+    except (zipfile.BadZipFile, zlib.error, OSError):
+        return False
+
+
+def build_csv_index(file_path: str, column_name: str) -> dict:
+    '''Function that maps each value of a column to the byte ranges of
+    its rows in the csv and saves it in the sidecar file "<file_path>.index.json".
+    The rows with the same value are expected to be grouped, like the seasons
+    of the NBA files, otherwise the value just has more ranges
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param column_name: (str)
+    The indexed column, its case and blanks are ignored
+
+    :return: (dict)
+    The index, with the keys "column", "file_size", "file_mtime",
+    "header_end" and "ranges" (value: list of [start, end] byte offsets)
+    '''
+    ranges = {}
+    with open(file_path, 'rb') as file:
+        header_line = file.readline()
+        header = next(csv.reader([header_line.decode('utf-8')]))
+        position = [
+            col.strip().lower().replace(' ', '_') for col in header].index(column_name)
+
+        start = offset = file.tell()
+        current_key = None
+        record = b''
+        for line in file:
+            record += line
+            # a quoted field may hold line breaks, so wait for the closing quote
+            if record.count(b'"') % 2:
+                continue
+
+            if b'"' in record:
+                key = next(csv.reader([record.decode('utf-8')]))[position]
+            else:
+                key = record.split(b',')[position].strip().decode('utf-8')
+
+            if key != current_key:
+                if current_key is not None:
+                    ranges.setdefault(current_key, []).append([start, offset])
+                current_key, start = key, offset
+            offset += len(record)
+            record = b''
+
+        if current_key is not None:
+            ranges.setdefault(current_key, []).append([start, offset])
+
+    stat = os.stat(file_path)
+    index = {
+        'column': column_name,
+        'file_size': stat.st_size,
+        'file_mtime': stat.st_mtime_ns,
+        'header_end': len(header_line),
+        'ranges': ranges}
+    with open(f'{file_path}.index.json', 'w') as index_file:
+        json.dump(index, index_file)
+    logging.info(
+        f'Index of {file_path} by {column_name} with {len(ranges)} keys was built: SUCCESS')
+
+    return index
+
+
+def load_csv_index(file_path: str) -> dict:
+    '''Function that loads the sidecar index of a csv, if it
+    exists and the csv did not change after it was built
+
+    :param file_path: (str)
+    A path to the csv
+
+    :return: (dict)
+    The index built by "build_csv_index" or None
+    '''
+    try:
+        with open(f'{file_path}.index.json') as index_file:
+            index = json.load(index_file)
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+    if (index['file_size'], index['file_mtime']) != (stat.st_size, stat.st_mtime_ns):
+        logging.info(f'The index of {file_path} is outdated and was ignored')
+        return None
+    return index
 
 
-def read_raw_csv_data(file_path: str) -> pd.DataFrame:
+def fingerprint_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    '''Function that computes the fingerprint of a raw file from its
+    contents, so a file downloaded again with the same bytes keeps it
+
+    :param file_path: (str)
+    A path to the raw file
+
+    :param chunk_size: (int)
+    Number of bytes hashed at a time
+
+    :return: (str)
+    BLAKE2b digest of the file, in hexadecimal
+    '''
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_raw_csv_data_by_keys(
+        file_path: str,
+        keys: list,
+        index: dict = None,
+        usecols=None) -> pd.DataFrame:
+    '''Load as a pandas dataframe only the rows of the given keys (for
+    example seasons), seeking straight to their byte ranges in the csv
+    instead of parsing the whole file
+
+    :param file_path: (str)
+    A path to the csv, with its sidecar index
+
+    :param keys: (list)
+    Values of the indexed column to be read
+
+    :param index: (dict)
+    The index of the csv, by default it is loaded from the sidecar file
+
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
+    :return: (dataframe)
+    Pandas dataframe with the rows of the given keys
+    '''
+    index = index or load_csv_index(file_path)
+    if index is None:
+        raise FileNotFoundError(f'There is no up to date index for {file_path}')
+
+    # the ranges are read in the order they have in the file
+    byte_ranges = sorted(
+        byte_range
+        for key in keys
+        for byte_range in index['ranges'].get(str(key), []))
+
+    with open(file_path, 'rb') as file:
+        parts = [file.read(index['header_end'])]
+        for start, end in byte_ranges:
+            file.seek(start)
+            parts.append(file.read(end - start))
+
+    raw_df = pd.read_csv(io.BytesIO(b''.join(parts)), usecols=usecols)
+    logging.info(
+        f'Execution of read_raw_csv_data_by_keys: {len(raw_df)} rows of {len(keys)} keys: SUCCESS')
+    return raw_df
+
+
+def read_raw_csv_data(file_path: str, usecols=None) -> pd.DataFrame:
     '''Load dataset as a pandas dataframe for the csv found at the path
 
     :param file_path: (str)
     A path to the csv
 
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
     :return: (dataframe)
     Pandas dataframe
     '''
     try:
-        raw_df = pd.read_csv(file_path)
+        raw_df = pd.read_csv(file_path, usecols=usecols)
         logging.info('Execution of read_raw_csv_data: SUCCESS')
         return raw_df
 
@@ -76,6 +507,271 @@ def read_raw_csv_data(file_path: str) -> pd.DataFrame:
         return None
 
 
+def read_raw_csv_data_since(
+        file_path: str,
+        column_name: str,
+        watermark,
+        chunksize: int = 500000,
+        usecols=None) -> pd.DataFrame:
+    '''Load as a pandas dataframe only the rows of the csv whose column
+    is greater than the watermark. With a sidecar index by this column only
+    the new byte ranges are read, otherwise each chunk is filtered as soon
+    as it is parsed so the old rows are never kept in memory
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param column_name: (str)
+    The column compared with the watermark, its case and blanks are ignored
+
+    :param watermark: (int, float or None)
+    The greatest value already loaded, None to read every row
+
+    :param chunksize: (int)
+    Number of rows parsed at a time
+
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
+    :return: (dataframe)
+    Pandas dataframe with the rows newer than the watermark
+    '''
+    if watermark is None:
+        return read_raw_csv_data(file_path, usecols)
+
+    # with an index by the same column, only the new keys are read
+    index = load_csv_index(file_path)
+    if index is not None and index['column'] == column_name:
+        keys = [key for key in index['ranges'] if float(key) > watermark]
+        return read_raw_csv_data_by_keys(file_path, keys, index, usecols)
+
+    try:
+        header = pd.read_csv(file_path, nrows=0).columns
+        column = next(
+            col for col in header
+            if col.strip().lower().replace(' ', '_') == column_name)
+
+        chunks = [
+            chunk[chunk[column] > watermark]
+            for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=usecols)]
+        raw_df = pd.concat(chunks, ignore_index=True)
+        logging.info(
+            f'Execution of read_raw_csv_data_since: {len(raw_df)} rows newer than {watermark}: SUCCESS')
+        return raw_df
+
+    except FileNotFoundError:
+        logging.error(
+            "Execution of read_raw_csv_data_since: The file wasn't found")
+        return None
+
+
+def split_csv_byte_ranges(file_path: str, n_ranges: int) -> tuple:
+    '''Function that splits the body of a csv into byte ranges of about
+    the same size, each one starting at the beginning of a line
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param n_ranges: (int)
+    Number of ranges wanted, small files may get fewer
+
+    :return: (tuple)
+    Offset where the header ends and list of (start, end) byte ranges
+    '''
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        file.readline()
+        header_end = file.tell()
+
+        boundaries = [header_end]
+        for i in range(1, n_ranges):
+            target = header_end + (file_size - header_end) * i // n_ranges
+            if target <= boundaries[-1]:
+                continue
+            # move forward to the start of the next line
+            file.seek(target - 1)
+            file.readline()
+            boundaries.append(file.tell())
+        boundaries.append(file_size)
+
+    byte_ranges = [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header_end, byte_ranges
+
+
+def _parse_csv_range(
+        file_path: str,
+        start: int,
+        end: int,
+        column_names: list,
+        usecols: list,
+        dtype: dict,
+        output_path: str) -> str:
+    '''Work done by each process: parse a byte range of the
+    csv and save it as an Arrow file'''
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    raw_df = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=column_names,
+        usecols=usecols,
+        dtype=dtype)
+    write_arrow_file(raw_df, output_path)
+    return output_path
+
+
+def iter_raw_csv_data_parallel(
+        file_path: str,
+        n_workers: int = None,
+        dtype: dict = None,
+        ranges_per_worker: int = 4,
+        sample_rows: int = 10000,
+        usecols=None,
+        ranges_ahead: int = None):
+    '''Parse a csv in parallel, each byte range in its own process, and
+    yield the parsed ranges in the order of the file as soon as they are
+    ready. Only a few ranges are parsed ahead of the consumer, a new one is
+    submitted each time a parsed range is taken, so a slow consumer holds
+    the parsing back instead of piling up the parsed ranges. Every range
+    uses the header of the file and the same dtypes. The line breaks must
+    not appear inside quoted fields, which is the case of the NBA files
+    extracted in ./data
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param n_workers: (int)
+    Number of processes, by default the number of cores
+
+    :param dtype: (dict)
+    Dtypes of the columns, by default the text columns of the first rows are
+    fixed as text and the numeric ones are reconciled when the ranges are put
+    together, like a single parse would do (integers with a gap become floats)
+
+    :param ranges_per_worker: (int)
+    Number of ranges given to each process, more ranges give smaller batches
+
+    :param sample_rows: (int)
+    Number of rows read to infer the dtypes
+
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
+    :param ranges_ahead: (int)
+    Number of ranges submitted and not yet taken by the consumer, by default
+    one per process plus the two batches held by a queue of "run_pipelined"
+
+    :return: (generator)
+    Pandas dataframes, one for each byte range
+    '''
+    n_workers = n_workers or os.cpu_count()
+    ranges_ahead = max(1, ranges_ahead or n_workers + 2)
+
+    # 1. the header and the dtypes are fixed before the file is split
+    column_names = pd.read_csv(file_path, nrows=0).columns.tolist()
+    # the projection is resolved here, the processes get the column names
+    if callable(usecols):
+        usecols = [col for col in column_names if usecols(col)]
+    sample_df = pd.read_csv(file_path, nrows=sample_rows, usecols=usecols)
+    if dtype is None:
+        dtype = {
+            col: object for col, col_dtype in sample_df.dtypes.items()
+            if pd.api.types.is_object_dtype(col_dtype)}
+
+    header_end, byte_ranges = split_csv_byte_ranges(
+        file_path, n_workers * ranges_per_worker)
+
+    # 2. each range is parsed in its own process and handed over as Arrow
+    with tempfile.TemporaryDirectory(dir=SHARED_MEMORY_DIR) as exchange_dir:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            pending_ranges = iter(enumerate(byte_ranges))
+            futures = collections.deque()
+
+            def submit_ranges():
+                for i, (start, end) in itertools.islice(
+                        pending_ranges, ranges_ahead - len(futures)):
+                    futures.append(executor.submit(
+                        _parse_csv_range,
+                        file_path,
+                        start,
+                        end,
+                        column_names,
+                        usecols,
+                        dtype,
+                        os.path.join(exchange_dir, f'range_{i}.arrow')))
+
+            submit_ranges()
+            while futures:
+                output_path = futures.popleft().result()
+                submit_ranges()
+                yield read_arrow_file(output_path).astype(dtype)
+                os.remove(output_path)
+
+
+def read_raw_csv_data_parallel(
+        file_path: str,
+        n_workers: int = None,
+        dtype: dict = None,
+        usecols=None) -> pd.DataFrame:
+    '''Load dataset as a pandas dataframe for the csv found at the path,
+    parsing byte ranges of the file in parallel processes
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param n_workers: (int)
+    Number of processes, by default the number of cores
+
+    :param dtype: (dict)
+    Dtypes of the columns, by default they are inferred from the first rows
+
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
+    :return: (dataframe)
+    Pandas dataframe
+    '''
+    try:
+        raw_df = pd.concat(
+            iter_raw_csv_data_parallel(file_path, n_workers, dtype, usecols=usecols),
+            ignore_index=True)
+        logging.info('Execution of read_raw_csv_data_parallel: SUCCESS')
+        return raw_df
+
+    except FileNotFoundError:
+        logging.error(
+            "Execution of read_raw_csv_data_parallel: The file wasn't found")
+        return None
+
+
+def iter_raw_csv_data(file_path: str, chunksize: int, usecols=None):
+    '''Load the csv found at the path as a sequence of pandas
+    dataframes, parsing the next one only when it is asked for
+
+    :param file_path: (str)
+    A path to the csv
+
+    :param chunksize: (int)
+    Number of rows of each dataframe
+
+    :param usecols: (list or function)
+    Columns to be parsed, or a function that tells whether a column is needed.
+    The other columns are skipped while parsing (see "select_raw_columns")
+
+    :return: (generator)
+    Pandas dataframes with at most "chunksize" rows
+    '''
+    with pd.read_csv(file_path, chunksize=chunksize, usecols=usecols) as reader:
+        for raw_df in reader:
+            yield raw_df
+
+
 def read_raw_json_data(file_path: str) -> pd.DataFrame:
     '''Load dataset as a pandas dataframe for the json found at the path
 
@@ -0,0 +1,287 @@
+'''
+File to export the loaded tables (or the results of a query)
+from the database to partitioned Parquet files. The rows are streamed
+out with "COPY ... TO STDOUT" and converted in bounded batches, so
+they never go through the Python driver one by one
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import logging
+import threading
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_dataset
+
+from components.db_backend import EmbeddedConnection, connect_to_database
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# arrow type of the PostgreSQL types, by their oid
+POSTGRESQL_TO_ARROW_TYPES = {
+    16: pa.bool_(),          # boolean
+    20: pa.int64(),          # bigint
+    21: pa.int16(),          # smallint
+    23: pa.int32(),          # integer
+    700: pa.float32(),       # real
+    701: pa.float64(),       # double precision
+    1700: pa.float64(),      # numeric
+    1082: pa.date32(),       # date
+    1114: pa.timestamp('us'),                 # timestamp
+    1184: pa.timestamp('us', tz='UTC')}       # timestamp with time zone
+
+# rows of each batch read from the embedded database
+EMBEDDED_BATCH_ROWS = 100000
+
+
+def read_query_schema(cur, query: str) -> pa.Schema:
+    '''Function that finds the arrow schema of the results of a query,
+    without running it. The types that are not mapped (text, json...) are strings
+
+    :param cur: (cursor)
+    Cursor of a PostgreSQL connection
+
+    :param query: (str)
+    The query whose results will be exported
+
+    :return: (pyarrow.Schema)
+    The schema of the results
+    '''
+    cur.execute(f'SELECT * FROM ({query}) AS export_query LIMIT 0')
+    return pa.schema([
+        (column[0], POSTGRESQL_TO_ARROW_TYPES.get(column[1], pa.string()))
+        for column in cur.description])
+
+
+def copy_to_record_batches(cur, query: str, schema: pa.Schema, batch_size: int):
+    '''Function that streams the results of a query out of PostgreSQL with
+    "COPY ... TO STDOUT" and parses them into arrow record batches. COPY writes
+    into a pipe from its own thread while the batches are parsed, so only
+    a few batches are in memory at any time
+
+    :param cur: (cursor)
+    Cursor of a PostgreSQL connection
+
+    :param query: (str)
+    The query whose results will be exported
+
+    :param schema: (pyarrow.Schema)
+    Schema of the results, as returned by "read_query_schema"
+
+    :param batch_size: (int)
+    Size in bytes of the csv block parsed into each record batch
+
+    :return: (generator)
+    Arrow record batches
+    '''
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def copy_query() -> None:
+        try:
+            with os.fdopen(write_fd, 'wb') as sink:
+                cur.copy_expert(
+                    f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)', sink)
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=copy_query, daemon=True)
+    thread.start()
+    try:
+        # closing the pipe stops the COPY if the parsing fails
+        with os.fdopen(read_fd, 'rb') as source:
+            reader = pa_csv.open_csv(
+                source,
+                read_options=pa_csv.ReadOptions(block_size=batch_size),
+                # COPY writes NULL unquoted and the empty strings quoted
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=schema,
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False))
+            for batch in reader:
+                yield batch
+    finally:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def open_record_batches(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        query: str,
+        batch_size: int) -> tuple:
+    '''Function that starts reading the results of a query on a database
+    node as arrow record batches, see "export_query_to_parquet"
+
+    :return: (tuple)
+    The connection, to be closed once the batches were read, the
+    arrow schema of the results and the iterator of the record batches
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    if isinstance(conn, EmbeddedConnection):
+        reader = conn.database.execute(query).to_arrow_reader(EMBEDDED_BATCH_ROWS)
+        return conn, reader.schema, reader
+
+    cur = conn.cursor()
+    schema = read_query_schema(cur, query)
+    return conn, schema, copy_to_record_batches(cur, query, schema, batch_size)
+
+
+def export_query_to_parquet(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        query: str,
+        output_dir: str,
+        partition_column: str = None,
+        batch_size: int = 64 * 1024 * 1024,
+        shard_nodes: list = None) -> int:
+    '''Function that exports the results of a query to a Parquet dataset,
+    one directory per value of the partition column ("season=2022/..."). With
+    "shard_nodes" the query is run on every node and all their results go to
+    the same dataset, for the tables whose rows are spread over the nodes
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param query: (str)
+    The query whose results will be exported
+
+    :param output_dir: (str)
+    Directory of the Parquet dataset, its previous partitions are replaced
+
+    :param partition_column: (str)
+    Column that splits the dataset into directories, None for a single directory
+
+    :param batch_size: (int)
+    Size in bytes of the csv block converted at a time
+
+    :param shard_nodes: (list)
+    (host_name, port) of the other nodes, which share the
+    database name, user and password of the first node
+
+    :return: (int)
+    Number of exported rows
+    '''
+    nodes = [(host_name, port)] + [tuple(node) for node in shard_nodes or []]
+    connections = []
+    n_rows = [0]
+
+    def count_rows(node_batches):
+        # the nodes are read one after the other, into the same files
+        for batches in node_batches:
+            for batch in batches:
+                n_rows[0] += batch.num_rows
+                yield batch
+
+    try:
+        node_batches = []
+        for node_host, node_port in nodes:
+            conn, schema, batches = open_record_batches(
+                node_host, node_port, db_name, user_name, password, query, batch_size)
+            connections.append(conn)
+            node_batches.append(batches)
+
+        partitioning = None
+        if partition_column is not None:
+            partitioning = pa_dataset.partitioning(
+                pa.schema([schema.field(partition_column)]), flavor='hive')
+        pa_dataset.write_dataset(
+            count_rows(node_batches),
+            output_dir,
+            schema=schema,
+            format='parquet',
+            partitioning=partitioning,
+            existing_data_behavior='delete_matching')
+    finally:
+        for conn in connections:
+            conn.close()
+    logging.info(
+        f'{n_rows[0]} rows of {len(nodes)} nodes were exported to {output_dir}: SUCCESS')
+
+    return n_rows[0]
+
+
+def export_table_to_parquet(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        output_dir: str,
+        partition_column: str = None,
+        shard_nodes: list = None) -> int:
+    '''Function that exports a whole table to a Parquet dataset,
+    see "export_query_to_parquet"
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table to be exported
+
+    :param output_dir: (str)
+    Directory of the Parquet dataset
+
+    :param partition_column: (str)
+    Column that splits the dataset into directories, for example: "season"
+
+    :param shard_nodes: (list)
+    (host_name, port) of the other nodes of a sharded table
+
+    :return: (int)
+    Number of exported rows
+    '''
+    return export_query_to_parquet(
+        host_name,
+        port,
+        db_name,
+        user_name,
+        password,
+        f'SELECT * FROM {schema_name}.{table_name}',
+        output_dir,
+        partition_column,
+        shard_nodes=shard_nodes)
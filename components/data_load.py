@@ -7,10 +7,18 @@ Date: April/2023
 '''
 
 # import necessary packages
+import io
+import time
+import uuid
 import logging
-import psycopg2
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+
+from components.db_backend import EmbeddedConnection, get_connection_pool
+from components.db_backend import connect_to_database, insert_values
+from components.db_backend import notify_table_loaded
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,7 +31,8 @@ def create_schema_into_postgresql(
         db_name: str,
         user_name: str,
         password: str,
-        schema_name: str) -> None:
+        schema_name: str,
+        port: str = None) -> None:
     '''Connects to a PostgreSQL database and creates a schema if it does not already exist
 
     :param host_name: (str)
@@ -40,15 +49,13 @@ def create_schema_into_postgresql(
 
     :param schema_name: (str)
     The name of the schema to create
+
+    :param port: (str)
+    Default port used for the protocol
     '''
 
     # Set up the connection
-    conn = psycopg2.connect(
-        host=host_name,
-        database=db_name,
-        user=user_name,
-        password=password
-    )
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
 
     # Create a cursor to execute SQL commands
     cur = conn.cursor()
@@ -71,6 +78,97 @@ def create_schema_into_postgresql(
     conn.close()
 
 
+# alignment in bytes of the column types, the variable length ones are 0
+TYPE_ALIGNMENTS = {
+    'BIGINT': 8, 'BIGSERIAL': 8, 'FLOAT': 8, 'DOUBLE': 8, 'TIMESTAMP': 8,
+    'INT': 4, 'INTEGER': 4, 'SERIAL': 4, 'DATE': 4, 'REAL': 4,
+    'SMALLINT': 2,
+    'BOOLEAN': 1}
+
+# codes of the "attcompression" column of pg_attribute
+COMPRESSION_CODES = {'p': 'pglz', 'l': 'lz4'}
+
+
+def order_columns_by_alignment(table_columns: str) -> str:
+    '''Function that reorders a columns definition from the widest alignment
+    to the variable length types, so that PostgreSQL adds no padding between
+    the fixed width columns of a row. The table constraints stay at the end
+
+    :param table_columns: (str)
+    The columns definition of the table, one column per line
+
+    :return: (str)
+    The same columns definition in the new order
+    '''
+    definitions = [
+        line.strip().rstrip(',') for line in table_columns.strip().splitlines()
+        if line.strip()]
+    columns = [
+        definition for definition in definitions
+        if not definition.upper().startswith(('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY', 'CHECK'))]
+    constraints = [definition for definition in definitions if definition not in columns]
+
+    columns.sort(key=lambda definition: -TYPE_ALIGNMENTS.get(
+        definition.split()[1].split('(')[0].upper(), 0))
+    return '\n' + ',\n'.join(columns + constraints) + '\n'
+
+
+def apply_storage_options(
+        cur,
+        schema_name: str,
+        table_name: str,
+        storage_options: dict) -> None:
+    '''Function that applies the storage options to a table, new or existing,
+    changing only the settings that differ from the current ones
+
+    :param cur: (cursor)
+    Cursor of a PostgreSQL connection
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+
+    :param storage_options: (dict)
+    The keys "fillfactor" (int), "autovacuum" (dict of autovacuum storage
+    parameters) and "column_compression" (dict of column to "lz4" or "pglz")
+    '''
+    table = f'{schema_name}.{table_name}'
+
+    # 1. table storage parameters
+    table_parameters = dict(storage_options.get('autovacuum', {}))
+    if 'fillfactor' in storage_options:
+        table_parameters['fillfactor'] = storage_options['fillfactor']
+    cur.execute('SELECT reloptions FROM pg_class WHERE oid = %s::regclass', (table,))
+    current_parameters = dict(
+        option.split('=', 1) for option in cur.fetchone()[0] or [])
+    changed_parameters = {
+        name: value for name, value in table_parameters.items()
+        if current_parameters.get(name) != str(value)}
+    if changed_parameters:
+        cur.execute(
+            f'ALTER TABLE {table} SET (' + ', '.join(
+                f'{name} = {value}' for name, value in changed_parameters.items()) + ')')
+        logging.info(f'The storage parameters of {table} were set to {changed_parameters}')
+
+    # 2. compression of the large columns, only the new values are compressed with it
+    column_compression = storage_options.get('column_compression', {})
+    if column_compression:
+        cur.execute(
+            'SELECT attname, attcompression FROM pg_attribute '
+            'WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped',
+            (table,))
+        current_compression = {
+            column_name: COMPRESSION_CODES.get(code)
+            for column_name, code in cur.fetchall()}
+        for column_name, method in column_compression.items():
+            if current_compression.get(column_name) != method:
+                cur.execute(
+                    f'ALTER TABLE {table} ALTER COLUMN {column_name} SET COMPRESSION {method}')
+                logging.info(f'The column {column_name} of {table} is compressed with {method}')
+
+
 def create_table_into_postgresql(
         host_name: str,
         port: str,
@@ -79,8 +177,10 @@ def create_table_into_postgresql(
         password: str,
         schema_name: str,
         table_name: str,
-        table_columns: str) -> None:
+        table_columns: str,
+        storage_options: dict = None) -> None:
     '''Function that creates a table if it does not exist in a PostgresSQL schema
+    and applies its storage options, also to an existing table when they differ
 
     :param host_name: (str)
     Is the network name for the physical machine on which the node is installed
@@ -105,15 +205,17 @@ def create_table_into_postgresql(
 
     :param table_columns: (str)
     The columns definition of the table in the format "column_name DATA_TYPE, column_name DATA_TYPE, ..."
+
+    :param storage_options: (dict)
+    Options of "apply_storage_options" and "reorder_columns" (bool), to create the
+    columns in the order of "order_columns_by_alignment" (only for new tables)
     '''
+    storage_options = storage_options or {}
+    if storage_options.get('reorder_columns'):
+        table_columns = order_columns_by_alignment(table_columns)
+
     # Connection to the PostgresSQL database
-    conn = psycopg2.connect(
-        host=host_name,
-        database=db_name,
-        user=user_name,
-        password=password,
-        port=port
-    )
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
 
     # Creation of a cursor to execute SQL commands
     cur = conn.cursor()
@@ -134,12 +236,208 @@ def create_table_into_postgresql(
         logging.info(
             f'The table {table_name} already exists in the {schema_name} schema')
 
+    # the embedded database has no storage options
+    if storage_options and not isinstance(conn, EmbeddedConnection):
+        apply_storage_options(cur, schema_name, table_name, storage_options)
+
     # Commit changes and close the connection
     conn.commit()
     cur.close()
     conn.close()
 
 
+# how the missing values are written in the csv streamed by COPY
+COPY_NULL_MARKER = '\\N'
+
+
+def _copy_slice(pool, slice_df: pd.DataFrame, staging_table: str) -> int:
+    '''Work done by each connection: stream a slice of the
+    dataframe into the staging table with COPY'''
+    conn = pool.getconn()
+    try:
+        buffer = io.StringIO()
+        # an explicit NULL marker, an unquoted empty field would turn the empty strings into NULL
+        slice_df.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL_MARKER)
+        buffer.seek(0)
+        with conn.cursor() as cur:
+            cur.copy_expert(
+                f'COPY {staging_table} ({", ".join(slice_df.columns)}) FROM STDIN '
+                f"WITH (FORMAT csv, NULL '{COPY_NULL_MARKER}')",
+                buffer)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+    return len(slice_df)
+
+
+def copy_dataframe_in_parallel(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        conn,
+        schema_name: str,
+        table_name: str,
+        staging_table_name: str,
+        df: pd.DataFrame,
+        n_connections: int,
+        create_staging: bool = True) -> None:
+    '''Function that splits a dataframe into slices and streams them with COPY
+    over several pooled connections at the same time, into an unlogged staging
+    table with the columns of the final table. Nothing reaches the final table
+    here, the staging table is merged afterwards in a single transaction
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param conn: (connection)
+    Connection that creates the staging table and later merges it
+
+    :param schema_name: (str)
+    The name of the schema where the tables are
+
+    :param table_name: (str)
+    The name of the final table
+
+    :param staging_table_name: (str)
+    The name of the staging table to be created
+
+    :param df: (pandas.DataFrame)
+    The DataFrame containing the data to be inserted
+
+    :param n_connections: (int)
+    Number of slices and of connections streaming them
+
+    :param create_staging: (bool)
+    False to copy the rows into a staging table created by a previous call
+    '''
+    with conn.cursor() as cur:
+        cur.execute(
+            'SELECT column_name, data_type FROM information_schema.columns '
+            'WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position',
+            (schema_name, table_name))
+        column_types = dict(cur.fetchall())
+    if sorted(column_types) != sorted(df.columns):
+        raise ValueError(
+            f'The columns of the DataFrame do not match the columns of the table {schema_name}.{table_name}')
+
+    # the integer columns with missing values are floats in pandas, "1.0" is not a valid INT
+    df = df.copy()
+    for column_name, data_type in column_types.items():
+        if data_type in ('smallint', 'integer', 'bigint') and df[column_name].dtype.kind == 'f':
+            df[column_name] = df[column_name].round().astype('Int64')
+
+    staging_table = f'{schema_name}.{staging_table_name}'
+    if create_staging:
+        with conn.cursor() as cur:
+            cur.execute(
+                f'CREATE UNLOGGED TABLE {staging_table} (LIKE {schema_name}.{table_name})')
+        conn.commit()  # the other connections must see the staging table
+
+    pool = get_connection_pool(
+        host_name, db_name, user_name, password, port, n_connections)
+    bounds = np.linspace(0, len(df), n_connections + 1).astype(int)
+    try:
+        with ThreadPoolExecutor(max_workers=n_connections) as executor:
+            futures = [
+                executor.submit(
+                    _copy_slice, pool, df.iloc[bounds[i]:bounds[i + 1]], staging_table)
+                for i in range(n_connections)]
+            n_rows = sum(future.result() for future in futures)
+    except Exception:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP TABLE IF EXISTS {staging_table}')
+        conn.commit()
+        raise
+    logging.info(
+        f'{n_rows} rows were copied into {staging_table} over {n_connections} connections: SUCCESS')
+
+
+# first batch of the tables loaded with a target latency
+INITIAL_BATCH_ROWS = 10000
+
+# batch sizers of each table, tuned over all its loads of the run
+BATCH_SIZERS = {}
+
+
+class AdaptiveBatchSizer:
+    '''Batch size of a table tuned toward a target latency per batch,
+    from the throughput measured on the previous batches'''
+
+    def __init__(self, target_seconds: float, min_rows: int, max_rows: int):
+        self.target_seconds = target_seconds
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.batch_rows = min(max(INITIAL_BATCH_ROWS, min_rows), max_rows)
+        self.rows_per_second = None
+
+    def record(self, table_name: str, n_rows: int, n_bytes: int, seconds: float) -> None:
+        '''Measure a batch and choose the size of the next one'''
+        seconds = max(seconds, 1e-6)
+        measured = n_rows / seconds
+        logging.info(
+            f'Batch of {n_rows} rows of {table_name} in {seconds:.3f}s: '
+            f'{measured:.0f} rows/s, {n_bytes / seconds / 1e6:.1f} MB/s')
+        # a last partial batch pays the fixed costs for few rows
+        if n_rows < self.batch_rows:
+            return
+
+        # smoothed, so a single slow batch does not swing the size
+        if self.rows_per_second is None:
+            self.rows_per_second = measured
+        else:
+            self.rows_per_second = (self.rows_per_second + measured) / 2
+        wanted = self.rows_per_second * self.target_seconds
+        # at most twice (or half) the current size at each step
+        wanted = min(max(wanted, self.batch_rows / 2), self.batch_rows * 2)
+        self.batch_rows = int(min(max(wanted, self.min_rows), self.max_rows))
+        logging.info(f'Next batch of {table_name}: {self.batch_rows} rows')
+
+
+def iter_adaptive_batches(df: pd.DataFrame, table_name: str, sizer: AdaptiveBatchSizer):
+    '''Function that slices a dataframe into batches of the size chosen by a sizer,
+    timing the work done on each batch until the next one is asked for
+
+    :param df: (pandas.DataFrame)
+    The DataFrame to be sliced
+
+    :param table_name: (str)
+    The name of the table, for the logs
+
+    :param sizer: (AdaptiveBatchSizer)
+    The sizer of the table
+
+    :return: (generator)
+    Consecutive slices of the dataframe, a single empty one for an empty dataframe
+    '''
+    start = 0
+    while True:
+        batch_df = df.iloc[start:start + sizer.batch_rows]
+        n_bytes = int(batch_df.memory_usage(deep=True).sum())
+        started_at = time.perf_counter()
+        yield batch_df
+        sizer.record(table_name, len(batch_df), n_bytes, time.perf_counter() - started_at)
+        start += len(batch_df)
+        if start >= len(df):
+            return
+
+
 def insert_data_into_postgresql(
         host_name: str,
         port: str,
@@ -148,10 +446,18 @@ def insert_data_into_postgresql(
         password: str,
         schema_name: str,
         table_name: str,
-        df: pd.DataFrame) -> None:
+        df: pd.DataFrame,
+        n_connections: int = 1,
+        target_batch_seconds: float = None,
+        min_batch_rows: int = 1000,
+        max_batch_rows: int = 1000000) -> None:
     '''
     Function that inserts data from a Pandas DataFrame into a PostgreSQL table.
     If the table does not exist, it creates a new one in the specified schema.
+    With several connections the rows are copied in parallel slices (see
+    "copy_dataframe_in_parallel") and merged in a single transaction, so either
+    all of them become visible or none do. With a target latency the rows are
+    staged in batches whose size is tuned to the measured throughput.
 
     :param host_name: (str)
     Is the network name for the physical machine on which the node is installed
@@ -176,6 +482,18 @@ def insert_data_into_postgresql(
 
     :param df: (pandas.DataFrame)
     The DataFrame containing the data to be inserted.
+
+    :param n_connections: (int)
+    Number of connections copying the data into the staging table at the same time.
+
+    :param target_batch_seconds: (float)
+    Time wanted to stage each batch, None to stage all the rows at once.
+
+    :param min_batch_rows: (int)
+    Smallest batch of the tuned sizes.
+
+    :param max_batch_rows: (int)
+    Largest batch of the tuned sizes.
     '''
 
     # Connect to the PostgreSQL database
@@ -185,57 +503,718 @@ def insert_data_into_postgresql(
     db_user = user_name
     db_pass = password
 
-    conn = psycopg2.connect(
-        host=db_host,
-        port=db_port,
-        dbname=db_name,
-        user=db_user,
-        password=db_pass
-    )
-    # create engine
-    engine = create_engine(
-        f'postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}')
+    conn = connect_to_database(db_host, db_name, db_user, db_pass, db_port)
+
+    batches = [df]
+    if target_batch_seconds is not None:
+        sizer_key = (db_host, db_port, schema_name, table_name)
+        if sizer_key not in BATCH_SIZERS:
+            BATCH_SIZERS[sizer_key] = AdaptiveBatchSizer(
+                target_batch_seconds, min_batch_rows, max_batch_rows)
+        batches = iter_adaptive_batches(
+            df, f'{schema_name}.{table_name}', BATCH_SIZERS[sizer_key])
 
     # Create a temporary table with the data from the DataFrame
     temp_table_name = f'temp_{table_name}'
-    df.to_sql(
-        name=temp_table_name,
-        con=engine.connect(),
-        schema=schema_name,
-        index=False,
-        if_exists='replace')
-    logging.info('Temporary table was created: SUCCESS')
-
-    # Check if the final table exists
-    inspector = inspect(engine)
-    table_exists = inspector.has_table(table_name, schema=schema_name)
-
-    if table_exists:
-        # Check if the DataFrame columns match the table columns
-        db_cols_query = f"SELECT column_name FROM information_schema.columns WHERE table_name='{table_name}' AND table_schema='{schema_name}'"
+    if n_connections > 1 and not isinstance(conn, EmbeddedConnection):
+        # each load has its own staging table, the loads of a table can run together
+        temp_table_name = f'temp_{table_name}_{uuid.uuid4().hex[:8]}'
+    elif not isinstance(conn, EmbeddedConnection):
+        # create engine
+        engine = create_engine(
+            f'postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}')
+
+    try:
+        for batch_number, batch_df in enumerate(batches):
+            if isinstance(conn, EmbeddedConnection):
+                conn.insert_dataframe(
+                    schema_name, temp_table_name, batch_df, append=batch_number > 0)
+            elif n_connections > 1:
+                copy_dataframe_in_parallel(
+                    db_host,
+                    db_port,
+                    db_name,
+                    db_user,
+                    db_pass,
+                    conn,
+                    schema_name,
+                    table_name,
+                    temp_table_name,
+                    batch_df,
+                    n_connections,
+                    create_staging=batch_number == 0)
+            else:
+                batch_df.to_sql(
+                    name=temp_table_name,
+                    con=engine.connect(),
+                    schema=schema_name,
+                    index=False,
+                    if_exists='append' if batch_number else 'replace')
+        logging.info('Temporary table was created: SUCCESS')
+
+        # Check if the final table exists
+        with conn.cursor() as cur:
+            cur.execute(
+                'SELECT EXISTS(SELECT * FROM information_schema.tables WHERE table_schema = %s AND table_name = %s)',
+                (schema_name, table_name))
+            table_exists = cur.fetchone()[0]
+
+        if table_exists:
+            # Check if the DataFrame columns match the table columns
+            db_cols_query = (
+                "SELECT column_name FROM information_schema.columns "
+                f"WHERE table_name='{table_name}' AND table_schema='{schema_name}' "
+                "ORDER BY ordinal_position")
+            with conn.cursor() as cur:
+                cur.execute(db_cols_query)
+                db_columns = [col[0] for col in cur.fetchall()]
+
+            df_columns = df.columns.tolist()
+
+            # the table may have its columns in another order (see "order_columns_by_alignment")
+            if sorted(db_columns) != sorted(df_columns):
+                raise ValueError(
+                    f'The columns of the DataFrame do not match the columns of the table {schema_name}.{table_name}')
+
+            # Insert the data into the final table without overwriting existing data
+            column_list = ', '.join(df_columns)
+            insert_query = (
+                f'INSERT INTO {schema_name}.{table_name} ({column_list}) '
+                f'SELECT {column_list} FROM {schema_name}.{temp_table_name} ON CONFLICT DO NOTHING;')
+            with conn.cursor() as cur:
+                cur.execute(insert_query)
+                notify_table_loaded(cur, schema_name, table_name)
+            logging.info('The dataframe data has been inserted: SUCCESS')
+
+        # Remove the temporary table
+        drop_query = f'DROP TABLE {schema_name}.{temp_table_name};'
+        with conn.cursor() as cur:
+            cur.execute(drop_query)
+        logging.info('The temp table has been removed: SUCCESS')
+    except Exception:
+        # the staging table may already be committed, it must not be left behind
+        conn.rollback()
         with conn.cursor() as cur:
-            cur.execute(db_cols_query)
-            db_columns = [col[0] for col in cur.fetchall()]
+            cur.execute(f'DROP TABLE IF EXISTS {schema_name}.{temp_table_name}')
+        conn.commit()
+        conn.close()
+        raise
+
+    # Close the database connection
+    conn.commit()
+    conn.close()
+
+
+def replace_table_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        reload_table_name: str) -> None:
+    '''Function that replaces the rows of a table with the ones of its reload
+    table, where the batches of a full load were inserted, and drops the reload
+    table, all in a single transaction: the readers see the previous rows until
+    the new ones are complete, and a failure keeps the previous rows
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
 
-        df_columns = df.columns.tolist()
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
 
-        if db_columns != df_columns:
-            raise ValueError(
-                f'The columns of the DataFrame do not match the columns of the table {schema_name}.{table_name}')
+    :param schema_name: (str)
+    The name of the schema where the tables are
+
+    :param table_name: (str)
+    The name of the table whose rows are replaced
 
-        # Insert the data into the final table without overwriting existing data
-        insert_query = f'INSERT INTO {schema_name}.{table_name} SELECT * FROM {schema_name}.{temp_table_name} ON CONFLICT DO NOTHING;'
+    :param reload_table_name: (str)
+    The name of the table with the new rows, with the same columns
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+    try:
         with conn.cursor() as cur:
-            cur.execute(insert_query)
-        logging.info('The dataframe data has been inserted: SUCCESS')
+            cur.execute(
+                'SELECT column_name FROM information_schema.columns '
+                'WHERE table_schema = %s AND table_name = %s',
+                (schema_name, reload_table_name))
+            column_list = ', '.join(row[0] for row in cur.fetchall())
+            cur.execute(f'DELETE FROM {schema_name}.{table_name}')
+            cur.execute(
+                f'INSERT INTO {schema_name}.{table_name} ({column_list}) '
+                f'SELECT {column_list} FROM {schema_name}.{reload_table_name}')
+            cur.execute(f'DROP TABLE {schema_name}.{reload_table_name}')
+            notify_table_loaded(cur, schema_name, table_name)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    logging.info(
+        f'The rows of {schema_name}.{table_name} were replaced by the reloaded ones: SUCCESS')
+
+
+def drop_table_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str) -> None:
+    '''Function that drops a table if it exists, for example the reload
+    table of a full load that failed
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
 
-    # Remove the temporary table
-    drop_query = f'DROP TABLE {schema_name}.{temp_table_name};'
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table to be dropped
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
     with conn.cursor() as cur:
-        cur.execute(drop_query)
-    logging.info('The temp table has been removed: SUCCESS')
+        cur.execute(f'DROP TABLE IF EXISTS {schema_name}.{table_name}')
+    conn.commit()
+    conn.close()
+
+
+def read_dimension_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        key_column: str,
+        id_column: str) -> dict:
+    '''Function that reads a dimension table into memory as a
+    mapping from its standardized key to its integer id
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the dimension table is
+
+    :param table_name: (str)
+    The name of the dimension table, for example: "players"
+
+    :param key_column: (str)
+    The column with the standardized key, for example: "player_key"
+
+    :param id_column: (str)
+    The column with the integer id, for example: "player_id"
+
+    :return: (dict)
+    Mapping from standardized key to id
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f'SELECT {key_column}, {id_column} FROM {schema_name}.{table_name}')
+        key_mapping = dict(cur.fetchall())
+    logging.info(
+        f'{len(key_mapping)} entries of {schema_name}.{table_name} were read: SUCCESS')
+
+    conn.close()
+    return key_mapping
+
+
+def insert_dimension_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        new_entries_df: pd.DataFrame) -> dict:
+    '''Function that persists the new entries of a dimension table
+    in bulk, with a single statement. The table is locked while the ids are
+    given, so the entries added meanwhile by another run (with the same keys
+    or the same ids) are found: their keys keep the stored ids and the
+    others receive the ids that follow the stored ones
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the dimension table is
+
+    :param table_name: (str)
+    The name of the dimension table, for example: "players"
+
+    :param new_entries_df: (pandas.DataFrame)
+    The new entries in the same column order as the dimension table,
+    the id given to them in memory is replaced when it is already taken
+
+    :return: (dict)
+    Mapping from the key of each new entry to its id in the table
+    '''
+    if new_entries_df.empty:
+        logging.info(f'There are no new entries for {schema_name}.{table_name}')
+        return {}
+
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    rows = list(new_entries_df.astype(object).itertuples(index=False, name=None))
+    with conn.cursor() as cur:
+        if not isinstance(conn, EmbeddedConnection):
+            # the other runs wait here until these entries are committed
+            cur.execute(f'LOCK TABLE {schema_name}.{table_name} IN SHARE ROW EXCLUSIVE MODE')
+        cur.execute(
+            'SELECT column_name FROM information_schema.columns '
+            'WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position',
+            (schema_name, table_name))
+        id_column, key_column = [row[0] for row in cur.fetchall()][:2]
+        cur.execute(f'SELECT {key_column}, {id_column} FROM {schema_name}.{table_name}')
+        stored_ids = dict(cur.fetchall())
+
+        next_id = max(stored_ids.values(), default=0) + 1
+        new_rows = []
+        for row in rows:
+            if row[1] not in stored_ids:
+                stored_ids[row[1]] = next_id
+                new_rows.append((next_id,) + row[1:])
+                next_id += 1
+        if new_rows:
+            insert_values(
+                cur, f'INSERT INTO {schema_name}.{table_name} VALUES %s', new_rows)
+            notify_table_loaded(cur, schema_name, table_name)
+    logging.info(
+        f'{len(new_rows)} new entries were inserted into {schema_name}.{table_name}: SUCCESS')
+
+    conn.commit()
+    conn.close()
+    return {row[1]: stored_ids[row[1]] for row in rows}
+
+
+def insert_quarantine_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        quarantine_df: pd.DataFrame) -> None:
+    '''Function that saves the rows that failed the validation in the
+    "quarantine" table of the schema, with their reason codes, creating it
+    if it does not exist
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the quarantine table is
+
+    :param table_name: (str)
+    The name of the table the rows were meant to be loaded into
+
+    :param quarantine_df: (pandas.DataFrame)
+    The rows returned by "validate_dataframe", with the columns
+    "reason_codes" and "raw_record"
+    '''
+    if quarantine_df.empty:
+        return
+
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    rows = [
+        (table_name, reason_codes, raw_record)
+        for reason_codes, raw_record in zip(
+            quarantine_df['reason_codes'], quarantine_df['raw_record'])]
+    with conn.cursor() as cur:
+        cur.execute(
+            f'''CREATE TABLE IF NOT EXISTS {schema_name}.quarantine (
+            table_name VARCHAR(50),
+            reason_codes TEXT,
+            raw_record JSONB,
+            quarantined_at TIMESTAMP DEFAULT now())''')
+        insert_values(
+            cur,
+            f'INSERT INTO {schema_name}.quarantine (table_name, reason_codes, raw_record) VALUES %s',
+            rows)
+    logging.info(
+        f'{len(rows)} rows of {table_name} were saved in {schema_name}.quarantine: SUCCESS')
+
+    conn.commit()
+    conn.close()
+
+
+def read_watermark_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        column_name: str):
+    '''Function that reads the greatest value already loaded in a column,
+    used as the watermark of the incremental loads
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+
+    :param column_name: (str)
+    The column of the watermark, for example: "season"
+
+    :return: (int, float, date or None)
+    The greatest value of the column, None if the table is empty
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    with conn.cursor() as cur:
+        cur.execute(f'SELECT MAX({column_name}) FROM {schema_name}.{table_name}')
+        watermark = cur.fetchone()[0]
+    logging.info(
+        f'The watermark of {schema_name}.{table_name} is {column_name} = {watermark}')
+
+    conn.close()
+    return watermark
+
+
+def reserve_ids_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        n_ids: int) -> int:
+    '''Function that reserves a contiguous block of ids from the sequence
+    of the "id SERIAL" column of a table, in a single round trip. The block
+    is taken under an advisory lock of the sequence, so the chunks or workers
+    loading the same table at the same time always get disjoint blocks, and
+    the sequence is first moved past the ids already in the table
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+
+    :param n_ids: (int)
+    Number of ids to reserve, the number of rows of the batch
+
+    :return: (int)
+    First id of the block, the block is [first id, first id + n_ids)
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    with conn.cursor() as cur:
+        if isinstance(conn, EmbeddedConnection):
+            # the embedded database has a single writer and no "setval"
+            cur.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {schema_name}.{table_name}')
+        else:
+            cur.execute(
+                f'''WITH id_sequence AS (
+                    SELECT pg_get_serial_sequence(%(table)s, 'id') AS name),
+                locked AS (
+                    SELECT name, pg_advisory_xact_lock(hashtext(name)) FROM id_sequence)
+                SELECT setval(
+                    name,
+                    GREATEST(
+                        nextval(name),
+                        (SELECT COALESCE(MAX(id), 0) + 1 FROM {schema_name}.{table_name}))
+                    + %(n_ids)s - 1) - %(n_ids)s + 1
+                FROM locked''',
+                {'table': f'{schema_name}.{table_name}', 'n_ids': n_ids})
+        first_id = cur.fetchone()[0]
+    logging.info(
+        f'The ids {first_id} to {first_id + n_ids - 1} of {schema_name}.{table_name} were reserved: SUCCESS')
+
+    # the lock is released by the commit
+    conn.commit()
+    conn.close()
+    return first_id
+
+
+def create_indexes_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        indexes: list) -> None:
+    '''Function that creates the indexes of a table after it was loaded.
+    The indexes are built with "CREATE INDEX CONCURRENTLY", so the readers
+    are never blocked, the valid ones are skipped and the ones left invalid by
+    an interrupted build are dropped and built again
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+
+    :param indexes: (list)
+    List of (column, method) tuples, the method is "brin" for the columns that
+    follow the order of the rows (seasons, dates), "btree" or "hash" for the lookup keys
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    if isinstance(conn, EmbeddedConnection):
+        # the embedded database has a single kind of index and builds it at once
+        with conn.cursor() as cur:
+            for column_name, method in indexes:
+                cur.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table_name}_{column_name}_{method}_idx '
+                    f'ON {schema_name}.{table_name} ({column_name})')
+        conn.commit()
+        conn.close()
+        return
+
+    # the concurrent builds can not run inside a transaction
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for column_name, method in indexes:
+            index_name = f'{table_name}_{column_name}_{method}_idx'
+            cur.execute(
+                '''SELECT i.indisvalid FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = %s AND c.relname = %s''',
+                (schema_name, index_name))
+            result = cur.fetchone()
+
+            if result is not None and result[0]:
+                logging.info(f'The index {index_name} already exists')
+                continue
+            if result is not None:
+                cur.execute(f'DROP INDEX CONCURRENTLY {schema_name}.{index_name}')
+                logging.warning(f'The invalid index {index_name} was dropped')
+
+            cur.execute(
+                f'CREATE INDEX CONCURRENTLY {index_name} '
+                f'ON {schema_name}.{table_name} USING {method} ({column_name})')
+            logging.info(f'The index {index_name} was created: SUCCESS')
+
+    conn.close()
+
+
+def read_load_ledger_from_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str) -> tuple:
+    '''Function that reads from the "load_ledger" table of the schema the
+    fingerprints of the last committed load of a table, creating the
+    ledger if it does not exist
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the ledger is
+
+    :param table_name: (str)
+    The name of the loaded table
+
+    :return: (tuple)
+    Fingerprints of the raw input and of the configuration, None if the
+    table was never loaded
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f'''CREATE TABLE IF NOT EXISTS {schema_name}.load_ledger (
+            table_name VARCHAR(50) PRIMARY KEY,
+            input_fingerprint VARCHAR(64),
+            config_fingerprint VARCHAR(64),
+            loaded_at TIMESTAMP)''')
+        cur.execute(
+            f'SELECT input_fingerprint, config_fingerprint FROM {schema_name}.load_ledger WHERE table_name = %s',
+            (table_name,))
+        fingerprints = cur.fetchone()
+
+    conn.commit()
+    conn.close()
+    return tuple(fingerprints) if fingerprints is not None else None
+
+
+def update_load_ledger_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        fingerprints: tuple) -> None:
+    '''Function that records in the "load_ledger" table of the schema the
+    fingerprints of a load, once it was committed
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the ledger is
+
+    :param table_name: (str)
+    The name of the loaded table
+
+    :param fingerprints: (tuple)
+    Fingerprints of the raw input and of the configuration
+    '''
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f'''INSERT INTO {schema_name}.load_ledger VALUES (%s, %s, %s, now())
+            ON CONFLICT (table_name) DO UPDATE SET
+            input_fingerprint = EXCLUDED.input_fingerprint,
+            config_fingerprint = EXCLUDED.config_fingerprint,
+            loaded_at = EXCLUDED.loaded_at''',
+            (table_name, *fingerprints))
+    logging.info(f'The load of {table_name} was recorded in {schema_name}.load_ledger: SUCCESS')
 
-    # Close the database connection
     conn.commit()
     conn.close()
 
@@ -0,0 +1,490 @@
+'''
+File with the read side of the populated schemas: the hot lookups
+are prepared queries run over pooled connections, and their results
+are kept in an in-process LRU cache with a time to live. The cached
+results of a table are dropped as soon as the loader commits new data
+into it, through the notifications sent by "notify_table_loaded"
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import time
+import logging
+import functools
+import threading
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from components.db_backend import EMBEDDED_NOTIFICATIONS, EMBEDDED_PREFIX
+from components.db_backend import TABLE_LOADED_CHANNEL
+from components.db_backend import EmbeddedConnection, is_embedded
+from components.db_backend import connect_to_database, get_connection_pool
+from components.data_transform import standardize_natural_key
+from components.table_definitions import DIMENSIONS
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# the read queries, with their "$n" parameters and the tables they read.
+# The facts are filtered by the ids of their dimensions, resolved first by
+# the "dimension_query" on the first node (the only one with the dimensions),
+# the "sharded" ones are read on every node and their rows merged, in the
+# order of the "merge_column" of the rows when the order spans the nodes
+READ_QUERIES = {
+    'player_id_by_key': {
+        'tables': ['nba.players'],
+        'query': '''
+        SELECT player_id
+        FROM nba.players
+        WHERE player_key = $1
+        '''},
+    'team_id_by_key': {
+        'tables': ['nba.teams'],
+        'query': '''
+        SELECT team_id
+        FROM nba.teams
+        WHERE team_key = $1
+        '''},
+    'player_season_stats': {
+        'tables': ['nba.player_stats', 'nba.players'],
+        'dimension_query': 'player_id_by_key',
+        'sharded': True,
+        # hashed by player, all the rows of a player are on the same node
+        'merge_column': None,
+        'query': '''
+        SELECT *
+        FROM nba.player_stats
+        WHERE player_id = $1 AND season = $2
+        ORDER BY id
+        '''},
+    'team_payroll_history': {
+        'tables': ['nba.nba_payroll', 'nba.teams'],
+        'dimension_query': 'team_id_by_key',
+        'sharded': True,
+        'merge_column': 0,
+        'query': '''
+        SELECT season_start_year, payroll, inflation_adj_payroll
+        FROM nba.nba_payroll
+        WHERE team_id = $1
+        ORDER BY season_start_year
+        '''},
+    'open_positions_by_industry': {
+        'tables': ['startups_hiring.open_positions'],
+        'query': '''
+        SELECT company_name, headline, website, locations, industries
+        FROM startups_hiring.open_positions
+        WHERE industries ILIKE '%' || $1 || '%'
+        ORDER BY company_name
+        '''}
+}
+
+# connections of each pool used by the reads
+READ_CONNECTIONS = 4
+
+
+class ResultCache:
+    '''LRU cache of query results with a time to live, whose
+    entries can be dropped by the tables they were read from'''
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        '''The cached result of a key, None when missing or expired'''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            result, _, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return result
+
+    def put(self, key, result, tables: list) -> None:
+        '''Cache a result, evicting the least recently used one when full'''
+        with self.lock:
+            self.entries[key] = (result, set(tables), time.monotonic() + self.ttl_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, table: str = None) -> None:
+        '''Drop the results read from a table, or all of them'''
+        with self.lock:
+            for key in [key for key, (_, tables, _) in self.entries.items()
+                        if table is None or table in tables]:
+                del self.entries[key]
+
+
+# results of the reads of this process
+RESULT_CACHE = ResultCache()
+
+# per database: the connection listening to the notifications of
+# PostgreSQL, or the number of notifications already seen when embedded
+LISTENERS = {}
+
+# names of the statements already prepared on each pooled connection
+PREPARED_STATEMENTS = {}
+
+
+@functools.lru_cache(maxsize=4096)
+def standardize_lookup_key(name: str, dimension_name: str = None) -> str:
+    '''The natural key of a name looked up (see "standardize_natural_key"),
+    with the aliases of its dimension, memoized since the same names are
+    looked up over and over'''
+    key = standardize_natural_key(pd.Series([name]))[0]
+    return DIMENSIONS.get(dimension_name, {}).get('aliases', {}).get(key, key)
+
+
+def poll_invalidations(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str) -> None:
+    '''Function that drops the cached results of the tables committed since
+    the last call. The listener is started by the first call, before anything
+    of the database is cached, and checking it does not wait for the server
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+    '''
+    database_key = (host_name, port, db_name)
+
+    if is_embedded(host_name):
+        notifications = EMBEDDED_NOTIFICATIONS.setdefault(
+            host_name[len(EMBEDDED_PREFIX):] or ':memory:', [])
+        seen = LISTENERS.get(database_key, len(notifications))
+        tables = notifications[seen:]
+        LISTENERS[database_key] = seen + len(tables)
+    else:
+        if database_key not in LISTENERS:
+            listener = connect_to_database(host_name, db_name, user_name, password, port)
+            listener.autocommit = True
+            with listener.cursor() as cur:
+                cur.execute(f'LISTEN {TABLE_LOADED_CHANNEL}')
+            LISTENERS[database_key] = listener
+        listener = LISTENERS[database_key]
+        try:
+            listener.poll()
+        except Exception:
+            # the notifications may have been lost with the connection
+            del LISTENERS[database_key]
+            RESULT_CACHE.invalidate()
+            logging.info('The listener connection was lost, the cache was cleared')
+            return
+        tables = [notification.payload for notification in listener.notifies]
+        listener.notifies.clear()
+
+    for table in dict.fromkeys(tables):
+        RESULT_CACHE.invalidate(table)
+        logging.info(f'The cached results of {table} were invalidated: SUCCESS')
+
+
+def run_prepared_query(conn, query_name: str, params: tuple) -> tuple:
+    '''Function that runs one of the "READ_QUERIES", preparing it the first
+    time it is run on a PostgreSQL connection
+
+    :param conn: (connection)
+    Connection returned by "connect_to_database" or taken from a pool
+
+    :param query_name: (str)
+    The name of the query, one of the keys of "READ_QUERIES"
+
+    :param params: (tuple)
+    Values of the "$n" parameters of the query
+
+    :return: (tuple)
+    The rows of the result
+    '''
+    query = READ_QUERIES[query_name]['query']
+    with conn.cursor() as cur:
+        if isinstance(conn, EmbeddedConnection):
+            cur.execute(query, list(params))
+        else:
+            prepared = PREPARED_STATEMENTS.setdefault(id(conn), set())
+            if query_name not in prepared:
+                cur.execute(f'PREPARE {query_name} AS {query}')
+                prepared.add(query_name)
+            placeholders = ', '.join(['%s'] * len(params))
+            cur.execute(f'EXECUTE {query_name} ({placeholders})', params)
+        rows = tuple(cur.fetchall())
+    # the reads do not keep a snapshot open between calls
+    conn.rollback()
+    return rows
+
+
+def run_query_on_node(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        query_name: str,
+        params: tuple) -> tuple:
+    '''Function that runs one of the "READ_QUERIES" on a database node,
+    over a pooled connection (a new one for the embedded databases)
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param query_name: (str)
+    The name of the query, one of the keys of "READ_QUERIES"
+
+    :param params: (tuple)
+    Values of the "$n" parameters of the query
+
+    :return: (tuple)
+    The rows of the result
+    '''
+    if is_embedded(host_name):
+        conn = connect_to_database(host_name, db_name, user_name, password, port)
+        try:
+            return run_prepared_query(conn, query_name, params)
+        finally:
+            conn.close()
+
+    pool = get_connection_pool(
+        host_name, db_name, user_name, password, port, READ_CONNECTIONS)
+    conn = pool.getconn()
+    try:
+        return run_prepared_query(conn, query_name, params)
+    finally:
+        pool.putconn(conn)
+
+
+def read_query(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        query_name: str,
+        params: tuple,
+        use_cache: bool = True,
+        shard_nodes: list = None) -> tuple:
+    '''Function that returns the result of one of the "READ_QUERIES", from
+    the cache when the same query was read before and none of its tables
+    were loaded since then. The dimension key of the query is resolved on
+    the first node, then the sharded tables are read on each of their nodes
+    and their rows merged. Without "shard_nodes" only the first node is read,
+    which holds every row of a table when the tables are not sharded
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param query_name: (str)
+    The name of the query, one of the keys of "READ_QUERIES"
+
+    :param params: (tuple)
+    Values of the "$n" parameters of the query
+
+    :param use_cache: (bool)
+    False to always read the database (the result is cached anyway)
+
+    :param shard_nodes: (list)
+    (host_name, port) of the other nodes of the sharded tables, which
+    share the database name, user and password of the first node
+
+    :return: (tuple)
+    The rows of the result
+    '''
+    definition = READ_QUERIES[query_name]
+    nodes = [(host_name, port)] + [tuple(node) for node in shard_nodes or []]
+    for node_host, node_port in nodes:
+        poll_invalidations(node_host, node_port, db_name, user_name, password)
+
+    cache_key = (tuple(nodes), db_name, query_name, tuple(params))
+    if use_cache:
+        rows = RESULT_CACHE.get(cache_key)
+        if rows is not None:
+            return rows
+
+    rows = ()
+    if 'dimension_query' in definition:
+        dimension_rows = run_query_on_node(
+            host_name, port, db_name, user_name, password,
+            definition['dimension_query'], tuple(params[:1]))
+        params = (dimension_rows[0][0],) + tuple(params[1:]) if dimension_rows else None
+
+    if params is not None:
+        query_nodes = nodes if definition.get('sharded') else nodes[:1]
+        with ThreadPoolExecutor(max_workers=len(query_nodes)) as executor:
+            node_rows = executor.map(
+                lambda node: run_query_on_node(
+                    *node, db_name, user_name, password, query_name, params),
+                query_nodes)
+            rows = tuple(row for result in node_rows for row in result)
+        if len(query_nodes) > 1 and definition.get('merge_column') is not None:
+            rows = tuple(sorted(rows, key=lambda row: row[definition['merge_column']]))
+
+    RESULT_CACHE.put(cache_key, rows, definition['tables'])
+    return rows
+
+
+def read_player_season_stats(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        player_name: str,
+        season: int,
+        shard_nodes: list = None) -> tuple:
+    '''Function that returns the stats rows of a player in a season,
+    the name may be spelled like in any of the raw files
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param player_name: (str)
+    The name of the player, for example: "LeBron James"
+
+    :param season: (int)
+    The season, for example: 2022
+
+    :param shard_nodes: (list)
+    (host_name, port) of the other nodes of the sharded tables (see "read_query")
+
+    :return: (tuple)
+    The rows of "nba.player_stats"
+    '''
+    player_key = standardize_lookup_key(player_name, 'players')
+    return read_query(
+        host_name, port, db_name, user_name, password,
+        'player_season_stats', (player_key, int(season)),
+        shard_nodes=shard_nodes)
+
+
+def read_team_payroll_history(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        team_name: str,
+        shard_nodes: list = None) -> tuple:
+    '''Function that returns the payroll of a team in every season
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param team_name: (str)
+    The name of the team, for example: "Lakers"
+
+    :param shard_nodes: (list)
+    (host_name, port) of the other nodes of the sharded tables (see "read_query")
+
+    :return: (tuple)
+    (season_start_year, payroll, inflation_adj_payroll) rows, by season
+    '''
+    team_key = standardize_lookup_key(team_name, 'teams')
+    return read_query(
+        host_name, port, db_name, user_name, password,
+        'team_payroll_history', (team_key,),
+        shard_nodes=shard_nodes)
+
+
+def read_open_positions_by_industry(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        industry: str) -> tuple:
+    '''Function that returns the startups hiring in an industry
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param industry: (str)
+    Part of the name of the industry, for example: "Fintech"
+
+    :return: (tuple)
+    (company_name, headline, website, locations, industries) rows
+    '''
+    return read_query(
+        host_name, port, db_name, user_name, password,
+        'open_positions_by_industry', (industry,))
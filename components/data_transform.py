@@ -8,6 +8,7 @@ Date: April/2023
 
 # import necessary packages
 import logging
+import numpy as np
 import pandas as pd
 import datetime as dt
 
@@ -136,14 +137,17 @@ def transform_string_to_datetime(
 
 def create_auxiliary_columns(transformed_df: pd.DataFrame) -> None:
     '''Function to create three auxiliary columns in datasets:
-    "id", "created_at" and "updated_at"
+    "id", "created_at" and "updated_at". The "id" column numbers the rows
+    from 1, it is overwritten by "load" in main.py with the ids reserved in
+    the table, so the batches of a same table never share an id
 
     :param transformed_df: (dataframe)
     Dataframe after all transformations just
     before being inserted into database
     '''
     # inserting the "id" column
-    transformed_df['id'] = pd.Series(range(1, len(transformed_df) + 1))
+    transformed_df['id'] = pd.Series(
+        range(1, len(transformed_df) + 1), index=transformed_df.index)
     logging.info(f'Column "id" was inserted: SUCCESS')
 
     # inserting the "created_at" and "updated_at" column
@@ -151,3 +155,249 @@ def create_auxiliary_columns(transformed_df: pd.DataFrame) -> None:
     transformed_df['updated_at'] = transformed_df['created_at']
     logging.info(
         f'Columns "created_at" and "updated_at" was inserted: SUCCESS')
+
+
+def standardize_column_name(column_name: str) -> str:
+    '''Function that standardizes a raw column name: lowercase, blanks as underscores
+
+    :param column_name: (str)
+    Raw column name, for example: "Player Name "
+
+    :return: (str)
+    Standardized name, for example: "player_name"
+    '''
+    return column_name.strip().lower().replace(' ', '_')
+
+
+def select_raw_columns(table_definition: dict):
+    '''Function that derives from a table definition the raw columns
+    that reach the table: its columns (the surrogate keys replaced by their
+    natural keys) mapped back through the rename map. The auxiliary columns
+    are created later and the other raw columns are never needed
+
+    :param table_definition: (dict)
+    Definition of the table that will receive the data
+
+    :return: (function)
+    Function that tells whether a raw column is needed, to be used as the
+    "usecols" of the csv readers
+    '''
+    table_columns = {
+        line.split()[0] for line in table_definition['columns'].strip().splitlines()
+        if line.strip()}
+    table_columns -= {'id', 'created_at', 'updated_at'}
+    for natural_key, surrogate_key, _ in table_definition.get('surrogate_keys', []):
+        table_columns.discard(surrogate_key)
+        table_columns.add(natural_key)
+
+    raw_names = {
+        new_name: old_name
+        for old_name, new_name in table_definition.get('columns_to_rename', {}).items()}
+    needed_columns = {raw_names.get(column, column) for column in table_columns}
+
+    def is_needed(column_name: str) -> bool:
+        return standardize_column_name(column_name) in needed_columns
+
+    return is_needed
+
+
+def transform_table_data(
+        raw_df: pd.DataFrame,
+        table_definition: dict) -> pd.DataFrame:
+    '''Function that applies to a raw dataframe the transformations
+    declared in its table definition (see "table_definitions.py"), in order:
+    json normalization, string to float, string to datetime, dropping
+    unnecessary columns and standardizing the column names
+
+    :param raw_df: (dataframe)
+    Pandas dataframe that we want to perform the transformations
+
+    :param table_definition: (dict)
+    Definition of the table that will receive the data
+
+    :return: (dataframe)
+    Pandas dataframe with the transformations performed
+    '''
+    df_transformed = raw_df
+
+    # 1. the json data drops its columns while it is normalized
+    if 'column_to_json_normalize' in table_definition:
+        df_transformed = transform_json_data(
+            df_transformed,
+            table_definition['columns_to_drop'],
+            table_definition['columns_to_convert_to_str'],
+            table_definition['column_to_json_normalize'])
+    else:
+        # 2. fix columns with wrong data type
+        if 'columns_to_convert_to_float' in table_definition:
+            df_transformed = transform_string_to_float(
+                df_transformed, table_definition['columns_to_convert_to_float'])
+        if 'column_to_convert_to_date' in table_definition:
+            df_transformed = transform_string_to_datetime(
+                df_transformed, table_definition['column_to_convert_to_date'])
+
+        # 3. drop unnecessary columns (the projection may have skipped them)
+        df_transformed = df_transformed.drop(
+            table_definition['columns_to_drop'], axis=1, errors='ignore')
+
+    # 4. standardize column names
+    df_transformed = df_transformed.rename(columns=standardize_column_name)
+    df_transformed = df_transformed.rename(
+        columns=table_definition.get('columns_to_rename', {}))
+    logging.info('The column names were standardized: SUCCESS')
+
+    return df_transformed
+
+
+def standardize_natural_key(natural_key: pd.Series) -> pd.Series:
+    '''Function that standardizes names and codes so that the different
+    spellings of the same entity (accents, punctuation, case, extra blanks)
+    end up with the same natural key
+
+    :param natural_key: (series)
+    Pandas series with the names or codes as they came in the raw data
+
+    :return: (series)
+    Pandas series with the standardized keys
+    '''
+    return (natural_key.astype('string')
+            .str.normalize('NFKD')
+            .str.encode('ascii', 'ignore')
+            .str.decode('ascii')
+            .str.lower()
+            .str.replace(r'[^a-z0-9 ]', '', regex=True)
+            .str.split()
+            .str.join(' '))
+
+
+def assign_surrogate_keys(
+        transformed_df: pd.DataFrame,
+        natural_key_column: str,
+        surrogate_key_column: str,
+        key_mapping: dict,
+        key_aliases: dict = None) -> tuple:
+    '''Function that replaces a name column of a fact table by
+    the integer id of its dimension. The mapping is kept in memory and
+    the keys not seen before receive the next ids, so that they can be
+    persisted in bulk afterwards
+
+    :param transformed_df: (dataframe)
+    Pandas dataframe that we want to perform the transformations
+
+    :param natural_key_column: (str)
+    Column with the names or codes, it is replaced by the surrogate key column
+
+    :param surrogate_key_column: (str)
+    Name of the integer id column, for example: "player_id"
+
+    :param key_mapping: (dict)
+    Mapping from standardized key to id, updated in place with the new keys
+
+    :param key_aliases: (dict)
+    Mapping from the other standardized spellings of a key to the key, for
+    example the abbreviations of the teams (see "TEAM_SPELLINGS")
+
+    :return: (tuple)
+    Pandas dataframe with the surrogate key column and a pandas dataframe
+    with the new dimension entries (id, standardized key and original name)
+    '''
+    df_transformed = transformed_df.copy()
+
+    # 1. standardize the names so different spellings share the same key
+    keys = standardize_natural_key(df_transformed[natural_key_column])
+    if key_aliases:
+        keys = keys.replace(key_aliases)
+
+    # 2. give the next ids to the keys that are not in the dimension yet
+    first_seen = ~keys.duplicated() & keys.notna() & ~keys.isin(key_mapping.keys())
+    next_id = max(key_mapping.values(), default=0) + 1
+    new_entries = pd.DataFrame({
+        surrogate_key_column: range(next_id, next_id + int(first_seen.sum())),
+        'natural_key': keys[first_seen].to_numpy(),
+        natural_key_column: df_transformed.loc[first_seen, natural_key_column].to_numpy()})
+    key_mapping.update(
+        zip(new_entries['natural_key'], new_entries[surrogate_key_column]))
+    logging.info(
+        f'{len(new_entries)} new entries were found for {surrogate_key_column}: SUCCESS')
+
+    # 3. replace the names by the ids in the same position of the dataframe
+    position = df_transformed.columns.get_loc(natural_key_column)
+    surrogate_keys = keys.map(key_mapping).astype('Int64')
+    df_transformed.drop(columns=natural_key_column, inplace=True)
+    df_transformed.insert(position, surrogate_key_column, surrogate_keys)
+    logging.info(
+        f'The {natural_key_column} was replaced by {surrogate_key_column}: SUCCESS')
+
+    return df_transformed, new_entries
+
+
+def reconcile_surrogate_keys(
+        transformed_df: pd.DataFrame,
+        surrogate_key_column: str,
+        new_entries: pd.DataFrame,
+        stored_ids: dict,
+        key_mapping: dict) -> pd.DataFrame:
+    '''Function that replaces the ids given in memory to the new entries of a
+    dimension by the ones they were stored with, which differ when another run
+    stored the same keys, or took the same ids, in the meantime
+
+    :param transformed_df: (dataframe)
+    Pandas dataframe returned by "assign_surrogate_keys"
+
+    :param surrogate_key_column: (str)
+    Name of the integer id column, for example: "player_id"
+
+    :param new_entries: (dataframe)
+    New dimension entries returned by "assign_surrogate_keys"
+
+    :param stored_ids: (dict)
+    Mapping from the key of each new entry to its stored id
+    (see "insert_dimension_into_postgresql")
+
+    :param key_mapping: (dict)
+    Mapping from standardized key to id, updated in place with the stored ids
+
+    :return: (dataframe)
+    Pandas dataframe with the stored ids
+    '''
+    given_ids = dict(zip(new_entries['natural_key'], new_entries[surrogate_key_column]))
+    corrections = {
+        given_ids[key]: stored_id for key, stored_id in stored_ids.items()
+        if given_ids[key] != stored_id}
+    key_mapping.update(stored_ids)
+    if not corrections:
+        return transformed_df
+
+    # all the ids are replaced at once, an id may be both replaced and a replacement
+    transformed_df = transformed_df.copy()
+    transformed_df[surrogate_key_column] = transformed_df[surrogate_key_column].replace(corrections)
+    logging.info(
+        f'{len(corrections)} ids of {surrogate_key_column} were taken by another run, '
+        'the stored ones are used: SUCCESS')
+    return transformed_df
+
+
+def drop_duplicates_across_batches(
+        transformed_df: pd.DataFrame, seen_hashes: list) -> pd.DataFrame:
+    '''Function that removes the duplicated rows of a batch, including
+    the rows already seen in the previous batches of the same table
+
+    :param transformed_df: (dataframe)
+    Pandas dataframe with one batch of the table
+
+    :param seen_hashes: (list)
+    Arrays with the hashes of the rows of the previous batches,
+    the hashes of this batch are appended to it
+
+    :return: (dataframe)
+    Pandas dataframe without the duplicated rows
+    '''
+    hashes = pd.util.hash_pandas_object(transformed_df, index=False).to_numpy()
+    is_new = ~pd.Series(hashes).duplicated().to_numpy()
+    if seen_hashes:
+        is_new &= ~np.isin(hashes, np.concatenate(seen_hashes))
+    seen_hashes.append(hashes[is_new])
+
+    logging.info(
+        f'{len(hashes) - int(is_new.sum())} duplicated rows were removed from the batch: SUCCESS')
+    return transformed_df.loc[is_new].reset_index(drop=True)
@@ -0,0 +1,116 @@
+'''
+Script to validate the raw data against the declarative rules
+of each table, splitting off the offending rows so that the clean
+rows can still be transformed and loaded
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+
+def parse_values(values: pd.Series, rule: dict) -> pd.Series:
+    '''Function that converts the raw values to the type of a rule,
+    the values that can not be converted become missing values
+
+    :param values: (series)
+    Raw values of the column
+
+    :param rule: (dict)
+    Validation rule of the column, with the "type" key:
+    "currency", "float", "int", "date" or "string"
+
+    :return: (series)
+    Pandas series with the converted values
+    '''
+    if rule['type'] == 'currency':
+        return pd.to_numeric(
+            values.astype('string').str.replace(r'[$,]', '', regex=True),
+            errors='coerce')
+    if rule['type'] in ('float', 'int'):
+        return pd.to_numeric(values, errors='coerce')
+    if rule['type'] == 'date':
+        return pd.to_datetime(values, format=rule['format'], errors='coerce')
+    return values.astype('string')
+
+
+def validate_dataframe(
+        raw_df: pd.DataFrame,
+        validation_rules: list) -> tuple:
+    '''Function that checks every rule over whole columns at once and
+    separates the rows that break at least one of them, with the reason codes:
+    "null_value", "invalid_type", "out_of_range", "too_long" and "invalid_format".
+    The rule columns are compared with the raw column names after
+    standardization (lowercase, blanks as underscores)
+
+    :param raw_df: (dataframe)
+    Pandas dataframe with the raw data
+
+    :param validation_rules: (list)
+    List of rules, dicts with the keys "column" and "type" and, optionally,
+    "not_null", "min", "max", "max_length", "pattern" and "format" (dates)
+
+    :return: (tuple)
+    Pandas dataframe with the clean rows and pandas dataframe with the
+    quarantined rows, in the columns "reason_codes" and "raw_record" (json)
+    '''
+    standardized_columns = {
+        col.strip().lower().replace(' ', '_'): col for col in raw_df.columns}
+    reasons = pd.Series('', index=raw_df.index, dtype=object)
+
+    for rule in validation_rules:
+        values = raw_df[standardized_columns[rule['column']]]
+        is_null = values.isna()
+        parsed = parse_values(values, rule)
+        failures = {}
+
+        if rule.get('not_null'):
+            failures['null_value'] = is_null
+
+        if rule['type'] == 'string':
+            if 'max_length' in rule:
+                failures['too_long'] = parsed.str.len() > rule['max_length']
+            if 'pattern' in rule:
+                failures['invalid_format'] = ~parsed.str.fullmatch(rule['pattern'])
+        else:
+            invalid_type = parsed.isna() & ~is_null
+            if rule['type'] == 'int':
+                invalid_type |= parsed % 1 > 0
+            failures['invalid_type'] = invalid_type
+
+            out_of_range = pd.Series(False, index=raw_df.index)
+            if 'min' in rule:
+                out_of_range |= parsed < rule['min']
+            if 'max' in rule:
+                out_of_range |= parsed > rule['max']
+            failures['out_of_range'] = out_of_range
+
+        # every failed check is added to the reasons of the row
+        for reason_code, failed in failures.items():
+            failed = failed.fillna(False).to_numpy(dtype=bool)
+            reasons[failed] = reasons[failed] + f'{reason_code}:{rule["column"]};'
+
+    is_invalid = (reasons != '').to_numpy()
+    clean_df = raw_df.loc[~is_invalid].reset_index(drop=True)
+    # the json of an empty dataframe is a blank line, not zero records
+    raw_records = raw_df.loc[is_invalid].to_json(
+        orient='records', lines=True, date_format='iso').splitlines() if is_invalid.any() else []
+    quarantine_df = pd.DataFrame({
+        'reason_codes': reasons[is_invalid].str.rstrip(';').to_numpy(),
+        'raw_record': np.array(raw_records, dtype=object)})
+
+    if len(quarantine_df):
+        logging.warning(
+            f'{len(quarantine_df)} of {len(raw_df)} rows failed the validation and were quarantined')
+    logging.info(f'{len(clean_df)} rows passed the validation: SUCCESS')
+
+    return clean_df, quarantine_df
@@ -0,0 +1,149 @@
+'''
+File to verify that the rows of a load really landed in their table:
+the row count and an order independent checksum of each column (its
+non null count and the sum of its values, lengths or epochs) are
+computed by the server over the ids of the batch, in a single aggregate
+query, and compared with the same values computed on the dataframe
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import logging
+import numpy as np
+import pandas as pd
+
+from components.db_backend import connect_to_database
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+
+def checksum_kind(values: pd.Series) -> str:
+    '''The kind of checksum of a column, from its dtype
+
+    :param values: (series)
+    Pandas series of a column
+
+    :return: (str)
+    "bool", "number", "time" or "text"
+    '''
+    if pd.api.types.is_bool_dtype(values):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(values):
+        return 'number'
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return 'time'
+    return 'text'
+
+
+# SQL expression of the sum of each kind of column
+CHECKSUM_EXPRESSIONS = {
+    'bool': 'SUM(CAST({column} AS INT))',
+    'number': 'SUM(CAST({column} AS DOUBLE PRECISION))',
+    'time': 'SUM(EXTRACT(EPOCH FROM {column}))',
+    'text': 'SUM(LENGTH({column}))'}
+
+
+def compute_dataframe_checksums(df: pd.DataFrame) -> dict:
+    '''Function that computes the checksums of a dataframe, the
+    same ones the server computes over the loaded rows
+
+    :param df: (dataframe)
+    Pandas dataframe that was loaded
+
+    :return: (dict)
+    Row count, then the non null count and the sum of each column
+    '''
+    checksums = {'row_count': len(df)}
+    for column in df.columns:
+        values = df[column].dropna()
+        kind = checksum_kind(df[column])
+        checksums[f'{column}_count'] = len(values)
+        if kind in ('bool', 'number'):
+            checksums[f'{column}_sum'] = float(values.astype(float).sum())
+        elif kind == 'time':
+            epochs = values.to_numpy(dtype='datetime64[us]').astype(np.int64) / 1e6
+            checksums[f'{column}_sum'] = float(epochs.sum())
+        else:
+            checksums[f'{column}_sum'] = float(values.astype(str).str.len().sum())
+    return checksums
+
+
+def verify_load_into_postgresql(
+        host_name: str,
+        port: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        schema_name: str,
+        table_name: str,
+        df: pd.DataFrame) -> list:
+    '''Function that compares the checksums of a loaded dataframe with
+    the ones of the rows of the table with the same ids, so the rows
+    discarded (or changed) by the load are found without reading them back
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+
+    :param df: (dataframe)
+    Pandas dataframe that was loaded, with the reserved range of ids
+
+    :return: (list)
+    Description of each mismatch, empty when the load is verified
+    '''
+    if df.empty:
+        return []
+
+    expected = compute_dataframe_checksums(df)
+    expressions = ['COUNT(*)']
+    for column in df.columns:
+        expressions.append(f'COUNT({column})')
+        expressions.append(
+            CHECKSUM_EXPRESSIONS[checksum_kind(df[column])].format(column=column))
+
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+    with conn.cursor() as cur:
+        cur.execute(
+            f'SELECT {", ".join(expressions)} FROM {schema_name}.{table_name} '
+            'WHERE id BETWEEN %s AND %s',
+            (int(df['id'].min()), int(df['id'].max())))
+        row = cur.fetchone()
+    conn.rollback()
+    conn.close()
+
+    mismatches = []
+    for (name, expected_value), value in zip(expected.items(), row):
+        value = float(value or 0)
+        if not np.isclose(value, expected_value, rtol=1e-9, atol=1e-6):
+            mismatches.append(
+                f'{schema_name}.{table_name} {name}: {value:g} in the table, '
+                f'{expected_value:g} in the dataframe')
+
+    for mismatch in mismatches:
+        logging.error(f'Load verification mismatch in {mismatch}')
+    if not mismatches:
+        logging.info(
+            f'{len(df)} rows of {schema_name}.{table_name} were verified: SUCCESS')
+    return mismatches
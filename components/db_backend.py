@@ -0,0 +1,296 @@
+'''
+Script to open the connections of the load components, either to
+PostgreSQL or to an embedded DuckDB database that stands in for it
+in the tests and in the benchmarks, without any server to spin up.
+The embedded database is chosen by a host name like
+"duckdb:///path/to/file.duckdb" ("duckdb://" alone is in memory)
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import re
+import logging
+import psycopg2
+import pandas as pd
+from psycopg2.extras import execute_values
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# host names starting with this prefix are embedded databases
+EMBEDDED_PREFIX = 'duckdb://'
+
+# one database instance per path, shared by all the connections of the process
+EMBEDDED_DATABASES = {}
+
+# pools of PostgreSQL connections, kept open for the whole run
+CONNECTION_POOLS = {}
+
+# channel of the notifications sent when the data of a table is committed
+TABLE_LOADED_CHANNEL = 'table_loaded'
+
+# tables committed in each embedded database, in order (its "NOTIFY")
+EMBEDDED_NOTIFICATIONS = {}
+
+# PostgreSQL types without an equivalent in the embedded database
+# ("FLOAT" is double precision in PostgreSQL, single precision in DuckDB)
+EMBEDDED_TYPES = [
+    (re.compile(r'\bSERIAL\b', re.IGNORECASE), 'INTEGER'),
+    (re.compile(r'\bFLOAT\b', re.IGNORECASE), 'DOUBLE'),
+    (re.compile(r'\bJSONB\b', re.IGNORECASE), 'JSON')]
+
+
+def is_embedded(host_name: str) -> bool:
+    '''Whether a host name points to an embedded database
+
+    :param host_name: (str)
+    Host name of the connection settings
+
+    :return: (bool)
+    True for the host names starting with "duckdb://"
+    '''
+    return str(host_name).startswith(EMBEDDED_PREFIX)
+
+
+def translate_query(query: str) -> str:
+    '''Function that rewrites a PostgreSQL query for the embedded database:
+    "%s" placeholders become "?", "%(name)s" ones become "$name"
+    and the types it does not know are replaced
+
+    :param query: (str)
+    Query written for psycopg2
+
+    :return: (str)
+    Query for DuckDB
+    '''
+    query = re.sub(r'%\((\w+)\)s', r'$\1', query).replace('%s', '?')
+    for pattern, replacement in EMBEDDED_TYPES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+class EmbeddedCursor:
+    '''Cursor of an "EmbeddedConnection", with the part of the
+    psycopg2 cursor interface used by the components'''
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query: str, params=None) -> None:
+        self.connection.begin()
+        self.connection.database.execute(translate_query(query), params)
+
+    def executemany(self, query: str, params_list: list) -> None:
+        self.connection.begin()
+        self.connection.database.executemany(translate_query(query), params_list)
+
+    def fetchone(self):
+        return self.connection.database.fetchone()
+
+    def fetchall(self) -> list:
+        return self.connection.database.fetchall()
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class EmbeddedConnection:
+    '''Connection to an embedded DuckDB database that behaves like a
+    psycopg2 connection: a transaction is opened by the first statement
+    and its changes are only seen by the others after "commit"'''
+
+    def __init__(self, database_path: str):
+        import duckdb
+
+        if database_path not in EMBEDDED_DATABASES:
+            EMBEDDED_DATABASES[database_path] = duckdb.connect(database_path)
+        # each connection has its own transaction over the shared instance
+        self.database_path = database_path
+        self.database = EMBEDDED_DATABASES[database_path].cursor()
+        self.in_transaction = False
+        # notifications sent in the transaction, published by the commit
+        self.notifications = []
+
+    def begin(self) -> None:
+        if not self.in_transaction:
+            self.database.begin()
+            self.in_transaction = True
+
+    def cursor(self) -> EmbeddedCursor:
+        return EmbeddedCursor(self)
+
+    def commit(self) -> None:
+        if self.in_transaction:
+            self.database.commit()
+            self.in_transaction = False
+        EMBEDDED_NOTIFICATIONS.setdefault(self.database_path, []).extend(self.notifications)
+        self.notifications = []
+
+    def rollback(self) -> None:
+        if self.in_transaction:
+            self.database.rollback()
+            self.in_transaction = False
+        self.notifications = []
+
+    def close(self) -> None:
+        # like psycopg2, the changes that were not committed are lost
+        self.rollback()
+        self.database.close()
+
+    def insert_dataframe(self, schema_name: str, table_name: str, df, append: bool = False) -> None:
+        '''Create a table with the contents of a pandas dataframe,
+        or add them to the table created by a previous call'''
+        self.begin()
+        self.database.register('dataframe_to_insert', df)
+        if append:
+            self.database.execute(
+                f'INSERT INTO {schema_name}.{table_name} SELECT * FROM dataframe_to_insert')
+        else:
+            self.database.execute(
+                f'CREATE OR REPLACE TABLE {schema_name}.{table_name} AS SELECT * FROM dataframe_to_insert')
+        self.database.unregister('dataframe_to_insert')
+
+    def insert_rows(self, query: str, rows: list) -> None:
+        '''Run an "INSERT ... VALUES %s" query for all the rows at once'''
+        self.begin()
+        self.database.register('rows_to_insert', pd.DataFrame(rows))
+        self.database.execute(translate_query(
+            query.replace('VALUES %s', 'SELECT * FROM rows_to_insert')))
+        self.database.unregister('rows_to_insert')
+
+
+def connect_to_database(
+        host_name: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        port: str = None):
+    '''Function that opens a connection to the database of the settings,
+    PostgreSQL or the embedded database when the host name is "duckdb://..."
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed,
+    or "duckdb://" followed by the path of the embedded database
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :return: (connection)
+    A psycopg2 connection or an "EmbeddedConnection"
+    '''
+    if is_embedded(host_name):
+        return EmbeddedConnection(host_name[len(EMBEDDED_PREFIX):] or ':memory:')
+
+    connection_settings = {
+        'host': host_name,
+        'database': db_name,
+        'user': user_name,
+        'password': password}
+    if port is not None:
+        connection_settings['port'] = port
+    return psycopg2.connect(**connection_settings)
+
+
+def get_connection_pool(
+        host_name: str,
+        db_name: str,
+        user_name: str,
+        password: str,
+        port: str,
+        n_connections: int):
+    '''Function that returns a pool of PostgreSQL connections that can be
+    used by several threads, opening it the first time it is asked for
+
+    :param host_name: (str)
+    Is the network name for the physical machine on which the node is installed
+
+    :param db_name: (str)
+    The name of the database to connect to
+
+    :param user_name: (str)
+    The name of the user to authenticate as
+
+    :param password: (str)
+    The user's password
+
+    :param port: (str)
+    Default port used for the protocol
+
+    :param n_connections: (int)
+    Number of connections of the pool
+
+    :return: (ThreadedConnectionPool)
+    The pool, its connections are taken with "getconn" and given back with "putconn"
+    '''
+    from psycopg2.pool import ThreadedConnectionPool
+
+    pool_key = (host_name, port, db_name, user_name, n_connections)
+    if pool_key not in CONNECTION_POOLS:
+        CONNECTION_POOLS[pool_key] = ThreadedConnectionPool(
+            n_connections,
+            n_connections,
+            host=host_name,
+            database=db_name,
+            user=user_name,
+            password=password,
+            port=port)
+    return CONNECTION_POOLS[pool_key]
+
+
+def insert_values(cur, query: str, rows: list) -> None:
+    '''Function that inserts many rows with a single statement
+
+    :param cur: (cursor)
+    Cursor of a connection returned by "connect_to_database"
+
+    :param query: (str)
+    Insert query with a single "VALUES %s" placeholder
+
+    :param rows: (list)
+    Tuples with the values of each row
+    '''
+    if isinstance(cur, EmbeddedCursor):
+        cur.connection.insert_rows(query, rows)
+    else:
+        # a single page, execute_values splits the rows into pages of 100 by default
+        execute_values(cur, query, rows, page_size=len(rows))
+
+
+def notify_table_loaded(cur, schema_name: str, table_name: str) -> None:
+    '''Function that tells the readers of the database that the data of
+    a table changed. The notification is sent in the transaction of the
+    cursor, so it is only delivered if (and when) it is committed
+
+    :param cur: (cursor)
+    Cursor of a connection returned by "connect_to_database"
+
+    :param schema_name: (str)
+    The name of the schema where the table is
+
+    :param table_name: (str)
+    The name of the table
+    '''
+    if isinstance(cur, EmbeddedCursor):
+        cur.connection.notifications.append(f'{schema_name}.{table_name}')
+    else:
+        cur.execute(
+            'SELECT pg_notify(%s, %s)', (TABLE_LOADED_CHANNEL, f'{schema_name}.{table_name}'))
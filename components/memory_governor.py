@@ -0,0 +1,238 @@
+'''
+Script to keep the pipeline inside a memory budget: the batch sizes and
+the number of workers are planned from the width of the rows, and while
+the tables are loaded the memory in use is tracked, holding the reader back
+and spilling the waiting batches to disk before the budget is exceeded
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import re
+import pickle
+import shutil
+import logging
+import tempfile
+import threading
+import pandas as pd
+import psutil
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# multipliers of the memory sizes, "4G", "512MB", "1.5GiB"...
+MEMORY_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+# a raw batch takes this many times its size while it is being transformed
+TRANSFORM_AMPLIFICATION = 3
+
+# batches alive at the same time in the pipeline: two per queue and one per stage
+BATCHES_IN_FLIGHT = 2 * 2 + 3
+
+# memory of each worker process before it receives any rows
+WORKER_BASE_BYTES = 150 * 1024 ** 2
+
+# size of a python string without its characters
+STRING_OVERHEAD_BYTES = 49
+
+
+def parse_memory_size(memory_size: str) -> int:
+    '''Function that converts a memory size to bytes
+
+    :param memory_size: (str)
+    Size with an optional unit, for example: "4G", "512MB" or "1.5GiB"
+
+    :return: (int)
+    Number of bytes
+    '''
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?)(I?B)?\s*', str(memory_size).upper())
+    if match is None:
+        raise ValueError(f'Invalid memory size: {memory_size}')
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
+def estimate_row_bytes(df: pd.DataFrame) -> float:
+    '''Function that estimates the memory of a row from the dtypes of a
+    sample: the item size of the fixed width columns and, for the text ones,
+    the mean length of the sampled values plus the overhead of the objects
+
+    :param df: (dataframe)
+    Sample of the rows, for example the first rows of a csv
+
+    :return: (float)
+    Estimated bytes per row
+    '''
+    row_bytes = 0.0
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            lengths = values.dropna().astype(str).str.len()
+            row_bytes += 8 + STRING_OVERHEAD_BYTES + (lengths.mean() if len(lengths) else 0)
+        else:
+            row_bytes += values.dtype.itemsize
+    return max(row_bytes, 1.0)
+
+
+def current_memory() -> int:
+    '''Memory in use by this process and its worker processes
+
+    :return: (int)
+    Resident set size in bytes
+    '''
+    process = psutil.Process()
+    memory = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            memory += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            continue
+    return memory
+
+
+def plan_batches(
+        max_memory: int,
+        row_bytes: float,
+        max_batch_rows: int,
+        n_workers: int = 1) -> tuple:
+    '''Function that picks the rows of each batch and the number of workers
+    so that the batches in flight, with their transformation copies, and the
+    worker processes fit in the part of the budget that is still free
+
+    :param max_memory: (int)
+    Memory budget in bytes
+
+    :param row_bytes: (float)
+    Estimated bytes per row (see "estimate_row_bytes")
+
+    :param max_batch_rows: (int)
+    Largest batch wanted, even with memory to spare
+
+    :param n_workers: (int)
+    Number of worker processes wanted
+
+    :return: (tuple)
+    Rows of each batch and number of workers
+    '''
+    available = max(max_memory - current_memory(), 0)
+    # the workers get at most half of the free memory
+    n_workers = max(1, min(n_workers, int(available / 2 // WORKER_BASE_BYTES)))
+    available -= (n_workers - 1) * WORKER_BASE_BYTES
+
+    batch_rows = int(available / (row_bytes * TRANSFORM_AMPLIFICATION * BATCHES_IN_FLIGHT))
+    batch_rows = max(1000, min(batch_rows, max_batch_rows))
+    logging.info(
+        f'Memory plan: {row_bytes:.0f} bytes per row, batches of {batch_rows} rows, '
+        f'{n_workers} workers: SUCCESS')
+    return batch_rows, n_workers
+
+
+class SpilledBatch:
+    '''A batch written to disk while it waits for the next stage'''
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        '''Read the batch back, removing its file'''
+        with open(self.path, 'rb') as spill_file:
+            batch = pickle.load(spill_file)
+        os.remove(self.path)
+        return batch
+
+
+def restore_batch(batch):
+    '''The batch itself, read back from disk if it was spilled'''
+    if isinstance(batch, SpilledBatch):
+        return batch.load()
+    return batch
+
+
+class MemoryGovernor:
+    '''Keeps a pipeline inside a memory budget: above the soft limit the
+    reader waits for the loader to finish the batches in flight (backpressure),
+    above the spill limit the batches waiting in the queues are written to disk'''
+
+    def __init__(
+            self,
+            max_memory: int,
+            soft_fraction: float = 0.8,
+            spill_fraction: float = 0.9,
+            spill_dir: str = None):
+        self.max_memory = max_memory
+        self.soft_limit = max_memory * soft_fraction
+        self.spill_limit = max_memory * spill_fraction
+        # the batches are spilled to their own directory, inside this one
+        self.spill_parent_dir = spill_dir
+        self.spill_dir = None
+        self.n_spilled = 0
+        # the reader and the transformer both spill, the directory is created once
+        self.spill_lock = threading.Lock()
+        # batches read and not loaded yet, the loader notifies each one it finishes
+        self.n_in_flight = 0
+        self.batch_finished = threading.Condition()
+
+    def batch_read(self) -> None:
+        '''Count a batch handed over by the reader'''
+        with self.batch_finished:
+            self.n_in_flight += 1
+
+    def batch_loaded(self) -> None:
+        '''Count a batch finished (or skipped) by the loader'''
+        with self.batch_finished:
+            self.n_in_flight -= 1
+            self.batch_finished.notify_all()
+
+    def wait_for_room(self, stop: threading.Event = None, poll_seconds: float = 0.1) -> bool:
+        '''Wait until the memory in use is below the soft limit, for as long as
+        the loader has batches in flight to free. With none left, waiting cannot
+        free anything and the next batch is read anyway, to be spilled if needed
+
+        :param stop: (Event)
+        Set when another stage of the pipeline failed, to stop waiting
+
+        :param poll_seconds: (float)
+        Longest wait between two checks of the memory
+
+        :return: (bool)
+        False when the memory is still above the soft limit
+        '''
+        with self.batch_finished:
+            while current_memory() > self.soft_limit:
+                if self.n_in_flight <= 0 or (stop is not None and stop.is_set()):
+                    logging.info(
+                        'The memory is above the soft limit with no batch in flight, going on')
+                    return False
+                self.batch_finished.wait(poll_seconds)
+        return True
+
+    def spill_if_needed(self, batch):
+        '''Write a batch to disk when the memory in use is above the spill limit
+
+        :return: (batch or SpilledBatch)
+        The batch itself, or the handle to read it back with "restore_batch"
+        '''
+        if batch is None or current_memory() <= self.spill_limit:
+            return batch
+
+        with self.spill_lock:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(
+                    prefix='populate_database_spill_', dir=self.spill_parent_dir)
+            spill_file = tempfile.NamedTemporaryFile(
+                dir=self.spill_dir, suffix='.pkl', delete=False)
+            self.n_spilled += 1
+        with spill_file:
+            pickle.dump(batch, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        logging.info(f'A batch was spilled to {spill_file.name}: SUCCESS')
+        return SpilledBatch(spill_file.name)
+
+    def close(self) -> None:
+        '''Remove the spill directory and the batches left in it'''
+        with self.spill_lock:
+            if self.spill_dir is not None:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+                self.spill_dir = None
@@ -0,0 +1,151 @@
+'''
+Script to run the transformations of a single table on a pool
+of processes, splitting the dataframe into row partitions that are
+handed over as Arrow IPC files in shared memory instead of being pickled
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import logging
+import contextlib
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# /dev/shm is memory backed, so the partitions never touch the disk
+SHARED_MEMORY_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def write_arrow_file(df: pd.DataFrame, file_path: str) -> None:
+    '''Function that saves a dataframe as an Arrow IPC file
+
+    :param df: (dataframe)
+    Pandas dataframe to be saved
+
+    :param file_path: (str)
+    Path of the Arrow IPC file
+    '''
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(file_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow_file(file_path: str) -> pd.DataFrame:
+    '''Function that reads an Arrow IPC file through a memory map
+
+    :param file_path: (str)
+    Path of the Arrow IPC file
+
+    :return: (dataframe)
+    Pandas dataframe
+    '''
+    with pa.memory_map(file_path, 'r') as source:
+        return pa.ipc.open_file(source).read_pandas()
+
+
+def _transform_partition(
+        input_path: str,
+        output_path: str,
+        transform_function,
+        function_args: tuple,
+        drop_duplicates: bool) -> str:
+    '''Work done by each process: read a partition,
+    transform it and save the result next to it'''
+    transformed_df = transform_function(read_arrow_file(input_path), *function_args)
+    if drop_duplicates:
+        transformed_df = transformed_df.drop_duplicates(ignore_index=True)
+    write_arrow_file(transformed_df, output_path)
+    return output_path
+
+
+def transform_in_parallel(
+        raw_df: pd.DataFrame,
+        transform_function,
+        function_args: tuple = (),
+        n_workers: int = None,
+        drop_duplicates: bool = False,
+        min_partition_rows: int = 50000,
+        executor: ProcessPoolExecutor = None) -> pd.DataFrame:
+    '''Function that splits a dataframe into row partitions, runs the
+    transformation chain of each partition in its own process and puts
+    the results back together in the original order. The transformations
+    must work row by row, like the ones in "data_transform.py"
+
+    :param raw_df: (dataframe)
+    Pandas dataframe that we want to perform the transformations
+
+    :param transform_function: (function)
+    Module level function called as transform_function(partition, *function_args)
+
+    :param function_args: (tuple)
+    Extra arguments of the transform function
+
+    :param n_workers: (int)
+    Number of processes, by default the number of cores
+
+    :param drop_duplicates: (bool)
+    Remove the duplicated rows, first inside each partition and then in the result
+
+    :param min_partition_rows: (int)
+    Smaller partitions are not worth a process, so fewer workers are used
+
+    :param executor: (ProcessPoolExecutor)
+    Pool shared by the calls of a run, by default a pool is started for this call
+
+    :return: (dataframe)
+    Pandas dataframe with the transformations performed
+    '''
+    n_workers = n_workers or os.cpu_count()
+    n_partitions = max(1, min(n_workers, len(raw_df) // min_partition_rows))
+
+    # a single partition runs in this process, without any hand over
+    if n_partitions == 1:
+        transformed_df = transform_function(raw_df, *function_args)
+        if drop_duplicates:
+            transformed_df = transformed_df.drop_duplicates(ignore_index=True)
+        return transformed_df
+
+    bounds = np.linspace(0, len(raw_df), n_partitions + 1).astype(int)
+    with tempfile.TemporaryDirectory(dir=SHARED_MEMORY_DIR) as exchange_dir:
+        input_paths = [
+            os.path.join(exchange_dir, f'input_{i}.arrow') for i in range(n_partitions)]
+        output_paths = [
+            os.path.join(exchange_dir, f'output_{i}.arrow') for i in range(n_partitions)]
+        for i, input_path in enumerate(input_paths):
+            write_arrow_file(raw_df.iloc[bounds[i]:bounds[i + 1]], input_path)
+
+        # a pool given by the caller is left running for its next batches
+        pool = (
+            contextlib.nullcontext(executor) if executor is not None
+            else ProcessPoolExecutor(max_workers=n_partitions))
+        with pool as executor:
+            futures = [
+                executor.submit(
+                    _transform_partition,
+                    input_path,
+                    output_path,
+                    transform_function,
+                    function_args,
+                    drop_duplicates)
+                for input_path, output_path in zip(input_paths, output_paths)]
+            # the results are read in the order of the partitions
+            partitions = [read_arrow_file(future.result()) for future in futures]
+
+    transformed_df = pd.concat(partitions, ignore_index=True)
+    if drop_duplicates:
+        transformed_df = transformed_df.drop_duplicates(ignore_index=True)
+    logging.info(
+        f'{len(raw_df)} rows were transformed in {n_partitions} processes: SUCCESS')
+
+    return transformed_df
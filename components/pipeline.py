@@ -0,0 +1,163 @@
+'''
+Script to run the extract, transform and load stages of a table
+at the same time, connected by bounded queues of batches, so that
+parsing a batch overlaps with loading the previous one
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import queue
+import logging
+import threading
+
+from components.memory_governor import restore_batch
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+# marks the end of the batches in a queue
+END_OF_BATCHES = object()
+
+
+def _put(outbox: queue.Queue, item, stop: threading.Event) -> bool:
+    '''Put an item in a full queue waiting for room (backpressure),
+    unless another stage failed in the meantime'''
+    while not stop.is_set():
+        try:
+            outbox.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(inbox: queue.Queue, stop: threading.Event):
+    '''Get an item from a queue, or the end mark if another stage failed'''
+    while not stop.is_set():
+        try:
+            return inbox.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return END_OF_BATCHES
+
+
+def _read_stage(batches, outbox, stop, errors, governor) -> None:
+    '''Thread that reads the batches into the first queue'''
+    try:
+        for batch in batches:
+            if governor is not None:
+                batch = governor.spill_if_needed(batch)
+                governor.batch_read()
+            if not _put(outbox, batch, stop):
+                return
+            if governor is not None:
+                # the next batch is read only once there is room for it
+                governor.wait_for_room(stop)
+    except Exception as error:
+        errors.append(error)
+        stop.set()
+    finally:
+        _put(outbox, END_OF_BATCHES, stop)
+
+
+def _transform_stage(transform_function, inbox, outbox, stop, errors, governor) -> None:
+    '''Thread that transforms the batches of the first queue into the second'''
+    try:
+        while True:
+            batch = _get(inbox, stop)
+            if batch is END_OF_BATCHES:
+                return
+            batch = transform_function(restore_batch(batch))
+            if governor is not None:
+                batch = governor.spill_if_needed(batch)
+            if not _put(outbox, batch, stop):
+                return
+    except Exception as error:
+        errors.append(error)
+        stop.set()
+    finally:
+        _put(outbox, END_OF_BATCHES, stop)
+
+
+def run_pipelined(
+        batches,
+        transform_function,
+        load_function,
+        queue_size: int = 2,
+        governor=None,
+        profile_thread=None) -> int:
+    '''Function that runs the reader, the transformer and the loader as
+    concurrent stages. Each stage works on its own batch and the queues
+    between them hold at most "queue_size" batches, so a fast stage waits
+    for the slow one instead of piling batches up in memory. The total time
+    is set by the slowest stage instead of the sum of all of them
+
+    :param batches: (iterable)
+    Raw batches, for example the chunks of a csv, read in their own thread
+
+    :param transform_function: (function)
+    Called with each raw batch, returns the transformed batch or None to skip it
+
+    :param load_function: (function)
+    Called with each transformed batch, in the order of the batches
+
+    :param queue_size: (int)
+    Maximum number of batches waiting between two stages
+
+    :param governor: (MemoryGovernor)
+    Keeps the stages inside a memory budget: the reader waits while the memory
+    is short and the waiting batches are spilled to disk, None for no budget
+
+    :param profile_thread: (function)
+    Wraps the function of the reader and transformer threads, for example the
+    one given by "profile_stage" to profile them with the loader, None for none
+
+    :return: (int)
+    Number of batches loaded
+    '''
+    raw_batches = queue.Queue(maxsize=queue_size)
+    transformed_batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    profile_thread = profile_thread or (lambda target: target)
+
+    threads = [
+        threading.Thread(
+            target=profile_thread(_read_stage),
+            args=(batches, raw_batches, stop, errors, governor),
+            daemon=True),
+        threading.Thread(
+            target=profile_thread(_transform_stage),
+            args=(
+                transform_function, raw_batches, transformed_batches, stop, errors, governor),
+            daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    # the loader runs in this thread
+    n_batches = 0
+    try:
+        while True:
+            batch = _get(transformed_batches, stop)
+            if batch is END_OF_BATCHES:
+                break
+            if batch is not None:
+                load_function(restore_batch(batch))
+                n_batches += 1
+            if governor is not None:
+                governor.batch_loaded()
+    except Exception:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    logging.info(f'{n_batches} batches were loaded by the pipeline: SUCCESS')
+    return n_batches
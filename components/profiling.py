@@ -0,0 +1,98 @@
+'''
+Script to profile the stages of the pipeline, writing
+one CPU profile and one allocation summary per stage and table
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import io
+import os
+import re
+import time
+import pstats
+import logging
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+
+@contextmanager
+def profile_stage(
+        stage_name: str,
+        table_name: str,
+        output_dir: str,
+        top_n: int = 25):
+    '''Context manager that runs the code inside it under the CPU
+    profiler and the allocation tracer. It writes two files to the output dir:
+    "<stage>_<table>.prof", a pstats file that flamegraph tools such as
+    flameprof, snakeviz or tuna can read, and "<stage>_<table>.txt", with the
+    hottest functions and the top allocation sites
+
+    :param stage_name: (str)
+    Name of the stage, for example: "transform"
+
+    :param table_name: (str)
+    Name of the table (or file) processed by the stage
+
+    :param output_dir: (str)
+    Directory where the profile files are saved
+
+    :param top_n: (int)
+    Number of functions and allocation sites in the summary
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    file_prefix = os.path.join(
+        output_dir, re.sub(r'[^\w.-]', '_', f'{stage_name}_{table_name}'))
+
+    profiler = cProfile.Profile()
+    thread_profilers = []
+
+    def profile_thread(target):
+        '''Wrap the target of a thread started inside the stage'''
+        def profiled_target(*args, **kwargs):
+            thread_profiler = cProfile.Profile()
+            thread_profilers.append(thread_profiler)
+            return thread_profiler.runcall(target, *args, **kwargs)
+        return profiled_target
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profile_thread
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # 1. the raw profile of every thread, for the flamegraph tools
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        stats.dump_stats(f'{file_prefix}.prof')
+
+        # 2. the ranked summary of hot functions and allocation sites
+        summary = io.StringIO()
+        summary.write(
+            f'{stage_name} {table_name}: {elapsed:.3f}s, '
+            f'peak traced memory {peak_memory / 2 ** 20:.1f} MiB\n\n')
+        summary.write(f'Top {top_n} functions by cumulative time\n')
+        stats.stream = summary
+        stats.sort_stats('cumulative').print_stats(top_n)
+        summary.write(f'Top {top_n} allocation sites\n')
+        for statistic in snapshot.statistics('lineno')[:top_n]:
+            summary.write(f'{statistic}\n')
+        with open(f'{file_prefix}.txt', 'w') as file:
+            file.write(summary.getvalue())
+
+        logging.info(
+            f'The profile of {stage_name} {table_name} was saved in {file_prefix}.prof: SUCCESS')
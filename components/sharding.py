@@ -0,0 +1,71 @@
+'''
+Script to route the rows of a table to the database nodes
+that hold its shards, following the sharding rule of the table
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    filemode='w',
+    format='%(name)s - %(levelname)s - %(message)s')
+
+
+def assign_shards(df: pd.DataFrame, sharding: dict, n_nodes: int) -> np.ndarray:
+    '''Function that finds the node of each row of a dataframe
+
+    :param df: (dataframe)
+    Pandas dataframe with the column of the sharding rule
+
+    :param sharding: (dict)
+    Sharding rule of the table, with the keys "method" ("hash" or "range"),
+    "column" and, for the ranges, "bounds": the first value of each range
+    after the first one, the ranges beyond the last node wrap around
+
+    :param n_nodes: (int)
+    Number of database nodes
+
+    :return: (array)
+    Node number of each row, from 0 to n_nodes - 1
+    '''
+    values = df[sharding['column']]
+    if sharding['method'] == 'hash':
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        return (hashes % np.uint64(n_nodes)).astype(int)
+    if sharding['method'] == 'range':
+        ranges = np.searchsorted(sharding['bounds'], values.to_numpy(), side='right')
+        return ranges % n_nodes
+    raise ValueError(f'Unknown sharding method {sharding["method"]}')
+
+
+def split_into_shards(df: pd.DataFrame, sharding: dict, n_nodes: int) -> list:
+    '''Function that splits a dataframe into the batches of each node.
+    The "replicate" method sends every row to every node, for the
+    small tables joined with the sharded ones
+
+    :param df: (dataframe)
+    Pandas dataframe ready to be loaded
+
+    :param sharding: (dict)
+    Sharding rule of the table (see "assign_shards")
+
+    :param n_nodes: (int)
+    Number of database nodes
+
+    :return: (list)
+    One pandas dataframe for each node, in the order of the nodes
+    '''
+    if sharding['method'] == 'replicate':
+        return [df] * n_nodes
+
+    shards = assign_shards(df, sharding, n_nodes)
+    batches = [df.loc[shards == node].reset_index(drop=True) for node in range(n_nodes)]
+    logging.info(
+        f'Rows by node: {[len(batch) for batch in batches]}: SUCCESS')
+    return batches
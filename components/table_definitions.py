@@ -0,0 +1,341 @@
+'''
+Definition of the tables populated by the pipeline: where their raw
+data comes from, how it is transformed and how the tables are created.
+This file has no imports on purpose, so reading it costs nothing
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# datasets downloaded from Kaggle: (username, page name, file name,
+# column of the sidecar index that gives random access to the csv)
+KAGGLE_DATASETS = [
+    ('chickooo', 'top-tech-startups-hiring-2023', 'json_data.json', None),
+    ('loganlauton', 'nba-players-and-team-data', 'NBA Payroll(1990-2023).csv', 'seasonstartyear'),
+    ('loganlauton', 'nba-players-and-team-data', 'NBA Player Box Score Stats(1950 - 2022).csv', 'season'),
+    ('loganlauton', 'nba-players-and-team-data', 'NBA Player Stats(1950 - 2022).csv', 'season'),
+    ('loganlauton', 'nba-players-and-team-data', 'NBA Salaries(1990-2023).csv', 'seasonstartyear')]
+
+# spellings of each team in the raw files, already standardized (see
+# "standardize_natural_key"): the payroll names the teams by their city, the
+# box score and the player stats by their abbreviation (the NBA and the
+# Basketball Reference ones). They all share the key of the payroll spelling
+TEAM_SPELLINGS = {
+    'atlanta': ['atl', 'atlanta hawks', 'hawks'],
+    'boston': ['bos', 'boston celtics', 'celtics'],
+    'brooklyn': ['bkn', 'brk', 'brooklyn nets'],
+    'charlotte': ['cha', 'chh', 'cho', 'charlotte hornets', 'charlotte bobcats', 'bobcats'],
+    'chicago': ['chi', 'chicago bulls', 'bulls'],
+    'cleveland': ['cle', 'cleveland cavaliers', 'cavaliers'],
+    'dallas': ['dal', 'dallas mavericks', 'mavericks'],
+    'denver': ['den', 'denver nuggets', 'nuggets'],
+    'detroit': ['det', 'detroit pistons', 'pistons'],
+    'golden state': ['gsw', 'gs', 'golden state warriors', 'warriors'],
+    'houston': ['hou', 'houston rockets', 'rockets'],
+    'indiana': ['ind', 'indiana pacers', 'pacers'],
+    'la clippers': ['lac', 'los angeles clippers', 'clippers'],
+    'la lakers': ['lal', 'los angeles lakers', 'lakers'],
+    'memphis': ['mem', 'memphis grizzlies'],
+    'miami': ['mia', 'miami heat', 'heat'],
+    'milwaukee': ['mil', 'milwaukee bucks', 'bucks'],
+    'minnesota': ['min', 'minnesota timberwolves', 'timberwolves'],
+    'new jersey': ['njn', 'new jersey nets'],
+    'new orleans': ['nop', 'noh', 'nok', 'new orleans pelicans', 'new orleans hornets', 'pelicans'],
+    'new york': ['nyk', 'ny', 'new york knicks', 'knicks'],
+    'oklahoma city': ['okc', 'oklahoma city thunder', 'thunder'],
+    'orlando': ['orl', 'orlando magic', 'magic'],
+    'philadelphia': ['phi', 'philadelphia 76ers', '76ers', 'sixers'],
+    'phoenix': ['phx', 'pho', 'phoenix suns', 'suns'],
+    'portland': ['por', 'portland trail blazers', 'trail blazers', 'blazers'],
+    'sacramento': ['sac', 'sacramento kings', 'kings'],
+    'san antonio': ['sas', 'sa', 'san antonio spurs', 'spurs'],
+    'seattle': ['sea', 'seattle supersonics', 'supersonics'],
+    'toronto': ['tor', 'toronto raptors', 'raptors'],
+    'utah': ['uta', 'uth', 'utah jazz', 'jazz'],
+    'vancouver': ['van', 'vancouver grizzlies'],
+    'washington': ['was', 'wsb', 'washington wizards', 'washington bullets', 'wizards'],
+}
+
+# dimension tables that give integer ids to names repeated in the facts
+DIMENSIONS = {
+    'players': {
+        'schema': 'nba',
+        'key_column': 'player_key',
+        'id_column': 'player_id',
+        'columns': '''
+        player_id INT PRIMARY KEY,
+        player_key VARCHAR(50) UNIQUE,
+        player_name VARCHAR(50)
+        '''},
+    'teams': {
+        'schema': 'nba',
+        'key_column': 'team_key',
+        'id_column': 'team_id',
+        # the other spellings of a key, replaced by it
+        'aliases': {
+            spelling: team_key
+            for team_key, spellings in TEAM_SPELLINGS.items() for spelling in spellings},
+        'columns': '''
+        team_id INT PRIMARY KEY,
+        team_key VARCHAR(30) UNIQUE,
+        team_name VARCHAR(30)
+        '''}
+}
+
+# the NBA tables are append mostly: full pages, columns without padding
+# and statistics (and the visibility map) kept fresh as the rows are added
+NBA_STORAGE = {
+    'reorder_columns': True,
+    'fillfactor': 100,
+    'autovacuum': {
+        'autovacuum_analyze_scale_factor': 0.02,
+        'autovacuum_vacuum_insert_scale_factor': 0.05}}
+
+# fact tables, in the order they are loaded. The "validation_rules" are
+# checked on the raw data (see "data_validation.py") and the offending rows
+# are quarantined before the transformations. The transformation keys are
+# applied in this order: json normalization, string to float, string to
+# datetime, drop columns, standardize and rename columns, surrogate keys.
+# "aggregates" are the aggregate tables refreshed after the load, with the
+# column holding the touched seasons and the offset to the aggregate season.
+# "watermark" is the (table column, raw column) pair of the incremental loads.
+# "storage" has the storage options of the table (see "create_table_into_postgresql")
+# and "indexes" the (column, method) indexes built after the load.
+# "sharding" is the rule that spreads the rows over the database nodes
+# (see "sharding.py"), the tables without it are only on the first node.
+# The aggregated tables are split by the same seasons so that each node
+# refreshes the aggregates of its own seasons
+TABLES = {
+    'open_positions': {
+        'schema': 'startups_hiring',
+        'raw_path': 'OPEN_POSITIONS_RAW_PATH',
+        'file_format': 'json',
+        'columns_to_drop': ['id', 'logo_url'],
+        'columns_to_convert_to_str': ['tags', 'locations', 'industries'],
+        'column_to_json_normalize': 'jobs',
+        'storage': {
+            'column_compression': {
+                'headline': 'lz4',
+                'tags': 'lz4',
+                'website': 'lz4',
+                'about': 'lz4',
+                'locations': 'lz4',
+                'industries': 'lz4'}},
+        'columns': '''
+        company_name VARCHAR(50),
+        headline TEXT,
+        tags TEXT,
+        website TEXT,
+        employees VARCHAR(50),
+        about TEXT,
+        locations TEXT,
+        industries TEXT,
+        engineering INT,
+        founder INT,
+        investor INT,
+        marketing INT,
+        other_engineering INT,
+        product INT,
+        sales INT,
+        designer INT,
+        management INT,
+        operations INT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+        '''},
+    'nba_payroll': {
+        'schema': 'nba',
+        'raw_path': 'NBA_PAYROLL_RAW_PATH',
+        'file_format': 'csv',
+        'columns_to_convert_to_float': ['payroll', 'inflationAdjPayroll'],
+        'columns_to_drop': ['Unnamed: 0'],
+        'columns_to_rename': {
+            'seasonstartyear': 'season_start_year',
+            'inflationadjpayroll': 'inflation_adj_payroll'},
+        'validation_rules': [
+            {'column': 'team', 'type': 'string', 'not_null': True, 'max_length': 30},
+            {'column': 'seasonstartyear', 'type': 'int', 'not_null': True, 'min': 1946, 'max': 2100},
+            {'column': 'payroll', 'type': 'currency', 'min': 0},
+            {'column': 'inflationadjpayroll', 'type': 'currency', 'min': 0}],
+        'surrogate_keys': [('team', 'team_id', 'teams')],
+        'aggregates': [('team_season_payroll_results', 'season_start_year', 0)],
+        'watermark': ('season_start_year', 'seasonstartyear'),
+        'sharding': {'method': 'range', 'column': 'season_start_year', 'bounds': [1999]},
+        'storage': NBA_STORAGE,
+        'indexes': [('team_id', 'btree')],
+        'columns': '''
+        team_id INT,
+        season_start_year INT,
+        payroll FLOAT,
+        inflation_adj_payroll FLOAT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+        '''},
+    'player_box_score_stats': {
+        'schema': 'nba',
+        'raw_path': 'NBA_PLAYER_BOX_RAW_PATH',
+        'file_format': 'csv',
+        'column_to_convert_to_date': 'GAME_DATE',
+        'columns_to_drop': ['Unnamed: 0'],
+        'validation_rules': [
+            {'column': 'season', 'type': 'int', 'not_null': True, 'min': 1946, 'max': 2100},
+            {'column': 'game_id', 'type': 'int', 'not_null': True},
+            {'column': 'player_name', 'type': 'string', 'not_null': True, 'max_length': 50},
+            {'column': 'team', 'type': 'string', 'not_null': True, 'max_length': 30},
+            {'column': 'game_date', 'type': 'date', 'not_null': True, 'format': '%b %d, %Y'},
+            {'column': 'matchup', 'type': 'string', 'max_length': 20},
+            {'column': 'wl', 'type': 'string', 'pattern': '[WL]'},
+            {'column': 'min', 'type': 'int', 'min': 0},
+            {'column': 'fgm', 'type': 'int', 'min': 0},
+            {'column': 'ftm', 'type': 'int', 'min': 0},
+            {'column': 'pts', 'type': 'int', 'min': 0},
+            {'column': 'video_available', 'type': 'int', 'min': 0, 'max': 1}],
+        'surrogate_keys': [
+            ('player_name', 'player_id', 'players'),
+            ('team', 'team_id', 'teams')],
+        'aggregates': [
+            ('player_season_totals', 'season', 0),
+            ('team_season_payroll_results', 'season', -1)],
+        'watermark': ('season', 'season'),
+        'sharding': {'method': 'range', 'column': 'season', 'bounds': [2000]},
+        'storage': NBA_STORAGE,
+        'indexes': [
+            ('game_date', 'brin'),
+            ('season', 'brin'),
+            ('player_id', 'btree'),
+            ('team_id', 'btree')],
+        'columns': '''
+        season INT,
+        game_id INT,
+        player_id INT,
+        team_id INT,
+        game_date DATE,
+        matchup VARCHAR(20),
+        wl VARCHAR (5),
+        min INT,
+        fgm INT,
+        fga FLOAT,
+        fg_pct FLOAT,
+        fg3m FLOAT,
+        fg3a FLOAT,
+        fg3_pct FLOAT,
+        ftm INT,
+        fta FLOAT,
+        ft_pct FLOAT,
+        oreb FLOAT,
+        dreb FLOAT,
+        reb FLOAT,
+        ast FLOAT,
+        stl FLOAT,
+        blk FLOAT,
+        tov FLOAT,
+        pf FLOAT,
+        pts INT,
+        plus_minus FLOAT,
+        video_available INT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+        '''},
+    'player_stats': {
+        'schema': 'nba',
+        'raw_path': 'NBA_PLAYER_STATS_RAW_PATH',
+        'file_format': 'csv',
+        'columns_to_drop': ['Unnamed: 0.1', 'Unnamed: 0'],
+        'columns_to_rename': {
+            'player': 'player_name',
+            'fg%': 'fg_percent',
+            '3p': 'threep',
+            '3pa': 'threepa',
+            '3p%': 'threep_percent',
+            '2p': 'twop',
+            '2pa': 'twopa',
+            '2p%': 'twop_percent',
+            'efg%': 'efg_percent',
+            'ft%': 'ft_percent'},
+        'validation_rules': [
+            {'column': 'season', 'type': 'int', 'not_null': True, 'min': 1946, 'max': 2100},
+            {'column': 'player', 'type': 'string', 'not_null': True, 'max_length': 50},
+            {'column': 'pos', 'type': 'string', 'max_length': 10},
+            {'column': 'age', 'type': 'int', 'min': 15, 'max': 60},
+            {'column': 'tm', 'type': 'string', 'not_null': True, 'max_length': 30},
+            {'column': 'g', 'type': 'float', 'min': 0},
+            {'column': 'pts', 'type': 'float', 'min': 0}],
+        'surrogate_keys': [
+            ('player_name', 'player_id', 'players'),
+            ('tm', 'team_id', 'teams')],
+        'watermark': ('season', 'season'),
+        'sharding': {'method': 'hash', 'column': 'player_id'},
+        'storage': NBA_STORAGE,
+        'indexes': [
+            ('season', 'brin'),
+            ('player_id', 'btree'),
+            ('team_id', 'hash')],
+        'columns': '''
+        season INT,
+        player_id INT,
+        pos VARCHAR(10),
+        age INT,
+        team_id INT,
+        g FLOAT,
+        gs FLOAT,
+        mp FLOAT,
+        fg FLOAT,
+        fga FLOAT,
+        fg_percent FLOAT,
+        threep FLOAT,
+        threepa FLOAT,
+        threep_percent FLOAT,
+        twop FLOAT,
+        twopa FLOAT,
+        twop_percent FLOAT,
+        efg_percent FLOAT,
+        ft FLOAT,
+        fta FLOAT,
+        ft_percent FLOAT,
+        orb FLOAT,
+        drb FLOAT,
+        trb FLOAT,
+        ast FLOAT,
+        stl FLOAT,
+        blk FLOAT,
+        tov FLOAT,
+        pf FLOAT,
+        pts FLOAT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+        '''},
+    'nba_salaries': {
+        'schema': 'nba',
+        'raw_path': 'NBA_SALARIES_RAW_PATH',
+        'file_format': 'csv',
+        'columns_to_convert_to_float': ['salary', 'inflationAdjSalary'],
+        'columns_to_drop': ['Unnamed: 0'],
+        'columns_to_rename': {
+            'playername': 'player_name',
+            'seasonstartyear': 'season_start_year',
+            'inflationadjsalary': 'inflation_adj_salary'},
+        'validation_rules': [
+            {'column': 'playername', 'type': 'string', 'not_null': True, 'max_length': 50},
+            {'column': 'seasonstartyear', 'type': 'int', 'not_null': True, 'min': 1946, 'max': 2100},
+            {'column': 'salary', 'type': 'currency', 'min': 0},
+            {'column': 'inflationadjsalary', 'type': 'currency', 'min': 0}],
+        'surrogate_keys': [('player_name', 'player_id', 'players')],
+        'watermark': ('season_start_year', 'seasonstartyear'),
+        'storage': NBA_STORAGE,
+        'indexes': [
+            ('season_start_year', 'brin'),
+            ('player_id', 'btree')],
+        'columns': '''
+        player_id INT,
+        season_start_year INT,
+        salary FLOAT,
+        inflation_adj_salary FLOAT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+        '''}
+}
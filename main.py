@@ -2,460 +2,996 @@
 Main file that will run all the components in order to
 insert the data from the tables in the database
 
+Each stage can be run on its own from the command line:
+    python main.py collect
+    python main.py transform <table> [--output file.pkl]
+    python main.py load <table>
+    python main.py run
+    python main.py index [<table>]
+    python main.py export <table> [--output-dir ./exports]
+
+Add "--incremental" before the subcommand to load only the seasons
+newer than the ones already in each table.
+The sharded tables are spread over the nodes of "SHARD_NODES".
+Add "--max-memory 4GB" before the subcommand to keep the run inside
+a memory budget.
+Add "--pipelined" before the subcommand to read, transform and load
+the csv tables in batches, with the three stages running at the same time.
+Add "--profile" before the subcommand to save a CPU profile and
+an allocation summary of each stage and table in "./profiles"
+
+The components are only imported by the stage that needs them
+and only the config of that stage is read, so a single stage
+does not pay the startup cost of the whole pipeline
+
 Author: Vitor Abdo
 Date: April/2023
 '''
 
 # import necessary packages
+import argparse
 import logging
-from decouple import config
-
-# data_collector component
-from components.data_collector import collect_from_kaggle
-from components.data_collector import read_raw_json_data
-from components.data_collector import read_raw_csv_data
-
-# data_transform component
-from components.data_transform import transform_json_data
-from components.data_transform import transform_string_to_float
-from components.data_transform import transform_string_to_datetime
-from components.data_transform import create_auxiliary_columns
+import contextlib
 
-# data_load component
-from components.data_load import create_schema_into_postgresql
-from components.data_load import create_table_into_postgresql
-from components.data_load import insert_data_into_postgresql
+from components.table_definitions import KAGGLE_DATASETS, DIMENSIONS, TABLES
 
 logging.basicConfig(
     level=logging.INFO,
     filemode='w',
     format='%(name)s - %(levelname)s - %(message)s')
 
-# config
-HOST_NAME = config('HOST_NAME')
-PORT = config('PORT')
-DB_NAME = config('DB_NAME')
-USER = config('USER')
-PASSWORD = config('PASSWORD')
-SCHEMAS_TO_CREATE = config('SCHEMAS_TO_CREATE').split(',')
-OPEN_POSITIONS_RAW_PATH = config('OPEN_POSITIONS_RAW_PATH')
-NBA_PAYROLL_RAW_PATH = config('NBA_PAYROLL_RAW_PATH')
-NBA_PLAYER_BOX_RAW_PATH = config('NBA_PLAYER_BOX_RAW_PATH')
-NBA_PLAYER_STATS_RAW_PATH = config('NBA_PLAYER_STATS_RAW_PATH')
-NBA_SALARIES_RAW_PATH = config('NBA_SALARIES_RAW_PATH')
+# dimensions read from the database, kept in memory during the run
+DIMENSION_KEYS = {}
 
+# version of the code that turns the raw rows into the loaded ones (validation,
+# transformation, surrogate keys), raised when it changes so that the load
+# ledger reloads every table
+PIPELINE_VERSION = 2
 
-if __name__ == "__main__":
-    # 0. download the Kaggle API files
-    logging.info('About to start executing Kaggle files download')
+# directory of the profiles, None when the run is not profiled
+PROFILE_DIR = None
+
+# number of processes used to parse and transform each csv table
+TRANSFORM_WORKERS = 1
+
+# load only the rows newer than the watermark of each table
+INCREMENTAL = False
+
+# load the tables even when the load ledger says nothing changed
+FORCE = False
+
+# connections copying each batch into the database at the same time
+LOAD_CONNECTIONS = 1
+
+# time wanted to stage each batch of a load, None for a single batch,
+# and the bounds of the batch sizes tuned toward it
+TARGET_BATCH_SECONDS = None
+MIN_BATCH_ROWS = 1000
+MAX_BATCH_ROWS = 1000000
+
+# mismatches found by the verification of the loads, by table
+LOAD_MISMATCHES = {}
+
+# read, transform and load the csv tables as overlapped batches of rows
+PIPELINED = False
+BATCH_ROWS = 200000
+
+# memory budget of the run in bytes, None for no budget
+MAX_MEMORY = None
+
+
+def stage(stage_name: str, table_name: str):
+    '''Context manager around each stage call, that profiles
+    it when the "--profile" option is given
+
+    :param stage_name: (str)
+    Name of the stage, for example: "transform"
+
+    :param table_name: (str)
+    Name of the table (or file) processed by the stage
+    '''
+    if PROFILE_DIR is None:
+        return contextlib.nullcontext()
+
+    from components.profiling import profile_stage
+    return profile_stage(stage_name, table_name, PROFILE_DIR)
+
+
+def read_database_config() -> tuple:
+    '''Read from the .env file only the connection settings of the database
+
+    :return: (tuple)
+    Host name, port, database name, user and password
+    '''
+    from decouple import config
+
+    return (
+        config('HOST_NAME'),
+        config('PORT'),
+        config('DB_NAME'),
+        config('USER'),
+        config('PASSWORD'))
 
-    # 0.1 download startup data
-    collect_from_kaggle(
-        'chickooo', 'top-tech-startups-hiring-2023', 'json_data.json', './data')
-    
-    # 0.2 download nba data
-    nba_datasets_list = [
-        'NBA Payroll(1990-2023).csv', 
-        'NBA Player Box Score Stats(1950 - 2022).csv', 
-        'NBA Player Stats(1950 - 2022).csv', 
-        'NBA Salaries(1990-2023).csv']
-    for nba_dataset in nba_datasets_list:
-        collect_from_kaggle(
-            'loganlauton', 'nba-players-and-team-data', nba_dataset, './data')
-        
+
+def read_database_nodes(db_config: tuple) -> list:
+    '''Connection settings of every database node: the node of the .env
+    file followed by the ones of "SHARD_NODES" ("host:port,host:port"),
+    which share its database name, user and password
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :return: (list)
+    Connection settings of each node, the first one is "db_config"
+    '''
+    from decouple import config, Csv
+    from components.db_backend import is_embedded
+
+    host_name, port, db_name, user_name, password = db_config
+    nodes = [db_config]
+    for node in config('SHARD_NODES', default='', cast=Csv()):
+        # the embedded databases are given by their path alone
+        node_host, node_port = (node, port) if is_embedded(node) else node.split(':')
+        nodes.append((node_host, node_port, db_name, user_name, password))
+    return nodes
+
+
+def table_nodes(db_config: tuple, table_name: str) -> list:
+    '''Connection settings of the nodes that hold a table: all of them
+    for the sharded tables, only the first one for the others
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES" or "DIMENSIONS"
+
+    :return: (list)
+    Connection settings of each node of the table
+    '''
+    if 'sharding' in TABLES.get(table_name, {}):
+        return read_database_nodes(db_config)
+    return [db_config]
+
+
+def collect() -> None:
+    '''Download the raw datasets from the Kaggle API. The datasets with
+    several files are downloaded once, as a whole archive'''
+    from components.data_collector import collect_from_kaggle
+    from components.data_collector import collect_dataset_from_kaggle
+
+    datasets = {}
+    for username, page_name, file_name, index_column in KAGGLE_DATASETS:
+        datasets.setdefault((username, page_name), {})[file_name] = index_column
+
+    logging.info('About to start executing Kaggle files download')
+    for (username, page_name), index_columns in datasets.items():
+        if len(index_columns) == 1:
+            [(file_name, index_column)] = index_columns.items()
+            with stage('collect', file_name):
+                collect_from_kaggle(
+                    username, page_name, file_name, './data', index_column)
+        else:
+            with stage('collect', page_name):
+                collect_dataset_from_kaggle(
+                    username, page_name, list(index_columns), './data', index_columns)
     logging.info('Done executing Kaggle files download\n')
 
-    # 1. create the schema if it does not already exist
-    logging.info('About to start executing the create schema function')
-    for schema in SCHEMAS_TO_CREATE:
-        create_schema_into_postgresql(HOST_NAME, DB_NAME, USER, PASSWORD, schema)
-    logging.info('Done executing the create schema function\n')
 
-    # 2. create tables
-    # 2.1 create first table in "startups_hiring" schema
-    logging.info(
-        'About to start executing the create table "open_positions" function')
-    table_columns = '''
-    company_name VARCHAR(50),
-    headline TEXT,
-    tags TEXT,
-    website TEXT,
-    employees VARCHAR(50),
-    about TEXT,
-    locations TEXT,
-    industries TEXT,
-    engineering INT,
-    founder INT,
-    investor INT,
-    marketing INT,
-    other_engineering INT,
-    product INT,
-    sales INT,
-    designer INT,
-    management INT,
-    operations INT,
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP,
-    updated_at TIMESTAMP
+def create_tables(db_config: tuple, table_names: list) -> None:
+    '''Create the schemas, the fact tables and the dimension tables
+    they need, if they do not already exist
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_names: (list)
+    Names of the fact tables, keys of "TABLES"
     '''
-    create_table_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'startups_hiring',
-        'open_positions',
-        table_columns)
-    logging.info('Done executing the create table "open_positions" function\n')
-
-    # 2.2 create first table in "nba" schema
-    logging.info(
-        'About to start executing the create table "nba_payroll" function')
-    table_columns = '''
-    team VARCHAR(30),
-    season_start_year INT,
-    payroll FLOAT,
-    inflation_adj_payroll FLOAT,
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP,
-    updated_at TIMESTAMP
+    from components.data_load import create_schema_into_postgresql
+    from components.data_load import create_table_into_postgresql
+
+    definitions = {name: TABLES[name] for name in table_names}
+    for table_name in table_names:
+        for _, _, dimension_name in TABLES[table_name].get('surrogate_keys', []):
+            definitions[dimension_name] = DIMENSIONS[dimension_name]
+
+    # the sharded tables are created on every node, the others on the first one
+    node_definitions = {}
+    for table_name, definition in definitions.items():
+        for node in table_nodes(db_config, table_name):
+            node_definitions.setdefault(node, {})[table_name] = definition
+
+    for node, definitions in node_definitions.items():
+        host_name, port, db_name, user_name, password = node
+
+        # 1. create the schema if it does not already exist
+        logging.info('About to start executing the create schema function')
+        for schema in dict.fromkeys(definition['schema'] for definition in definitions.values()):
+            create_schema_into_postgresql(
+                host_name, db_name, user_name, password, schema, port)
+        logging.info('Done executing the create schema function\n')
+
+        # 2. create tables
+        for table_name, definition in definitions.items():
+            logging.info(
+                f'About to start executing the create table "{table_name}" function')
+            create_table_into_postgresql(
+                host_name,
+                port,
+                db_name,
+                user_name,
+                password,
+                definition['schema'],
+                table_name,
+                definition['columns'],
+                definition.get('storage'))
+            logging.info(f'Done executing the create table "{table_name}" function\n')
+
+
+def get_dimension_keys(db_config: tuple, dimension_name: str) -> dict:
+    '''Return the in-memory mapping of a dimension, reading it
+    from the database the first time it is needed
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param dimension_name: (str)
+    Name of the dimension table, keys of "DIMENSIONS"
+
+    :return: (dict)
+    Mapping from standardized key to id
     '''
-    create_table_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'nba_payroll',
-        table_columns)
-    logging.info('Done executing the create table "nba_payroll" function\n')
-
-    # 2.2 create second table in "nba" schema
-    logging.info(
-        'About to start executing the create table "player_box_score_stats" function')
-    table_columns = '''
-    season INT,
-    game_id INT,
-    player_name VARCHAR(30),
-    team VARCHAR(30),
-    game_date DATE,
-    matchup VARCHAR(20),
-    wl VARCHAR (5),
-    min INT,
-    fgm INT,
-    fga FLOAT,
-    fg_pct FLOAT,
-    fg3m FLOAT,
-    fg3a FLOAT,
-    fg3_pct FLOAT,
-    ftm INT,
-    fta FLOAT,
-    ft_pct FLOAT,
-    oreb FLOAT,
-    dreb FLOAT,
-    reb FLOAT,
-    ast FLOAT,
-    stl FLOAT,
-    blk FLOAT,
-    tov FLOAT,
-    pf FLOAT,
-    pts INT,
-    plus_minus FLOAT,
-    video_available INT,
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP,
-    updated_at TIMESTAMP
+    if dimension_name not in DIMENSION_KEYS:
+        from components.data_load import create_schema_into_postgresql
+        from components.data_load import create_table_into_postgresql
+        from components.data_load import read_dimension_from_postgresql
+
+        host_name, port, db_name, user_name, password = db_config
+        dimension = DIMENSIONS[dimension_name]
+        create_schema_into_postgresql(
+            host_name, db_name, user_name, password, dimension['schema'], port)
+        create_table_into_postgresql(
+            *db_config, dimension['schema'], dimension_name, dimension['columns'])
+        DIMENSION_KEYS[dimension_name] = read_dimension_from_postgresql(
+            *db_config,
+            dimension['schema'],
+            dimension_name,
+            dimension['key_column'],
+            dimension['id_column'])
+
+    return DIMENSION_KEYS[dimension_name]
+
+
+def needs_database(table_name: str) -> bool:
+    '''Whether extracting and transforming a table reads the database
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :return: (bool)
+    True for the tables with surrogate keys or an incremental watermark
     '''
-    create_table_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'player_box_score_stats',
-        table_columns)
-    logging.info(
-        'Done executing the create table "player_box_score_stats" function\n')
+    definition = TABLES[table_name]
+    return bool(
+        definition.get('surrogate_keys') or (INCREMENTAL and 'watermark' in definition))
 
-    # 2.3 create third table in "nba" schema
-    logging.info(
-        'About to start executing the create table "player_stats" function')
-    table_columns = '''
-    season INT,
-    player_name VARCHAR(30),
-    pos VARCHAR(10),
-    age INT,
-    tm VARCHAR(10),
-    g FLOAT,
-    gs FLOAT,
-    mp FLOAT,
-    fg FLOAT,
-    fga FLOAT,
-    fg_percent FLOAT,
-    threep FLOAT,
-    threepa FLOAT,
-    threep_percent FLOAT,
-    twop FLOAT,
-    twopa FLOAT,
-    twop_percent FLOAT,
-    efg_percent FLOAT,
-    ft FLOAT,
-    fta FLOAT,
-    ft_percent FLOAT,
-    orb FLOAT,
-    drb FLOAT,
-    trb FLOAT,
-    ast FLOAT,
-    stl FLOAT,
-    blk FLOAT,
-    tov FLOAT,
-    pf FLOAT,
-    pts FLOAT,
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP,
-    updated_at TIMESTAMP
+
+def is_full_load(table_name: str) -> bool:
+    '''Whether a load reads the whole raw data of a table, whose rows then
+    replace the ones already loaded. The incremental loads only add the rows
+    newer than the watermark, so they keep the loaded ones
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :return: (bool)
+    False for the incremental loads of the tables with a watermark
     '''
-    create_table_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'player_stats',
-        table_columns)
-    logging.info('Done executing the create table "player_stats" function\n')
-
-    # 2.4 create fourth table in "nba" schema
-    logging.info(
-        'About to start executing the create table "nba_salaries" function')
-    table_columns = '''
-    player_name VARCHAR(30),
-    season_start_year INT,
-    salary FLOAT,
-    inflation_adj_salary FLOAT,
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP,
-    updated_at TIMESTAMP
+    return not (INCREMENTAL and 'watermark' in TABLES[table_name])
+
+
+def extract(table_name: str, db_config: tuple = None):
+    '''Read the raw data of a table as a pandas dataframe. In the
+    incremental mode only the rows newer than the watermark are read
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :param db_config: (tuple)
+    Connection settings, only needed to read the watermark
+
+    :return: (dataframe)
+    Pandas dataframe with the raw data
     '''
-    create_table_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'nba_salaries',
-        table_columns)
-    logging.info('Done executing the create table "nba_salaries" function\n')
-
-    # 3. insert transformed dataframes into postgres
-    # 3.1 insert data into open_positions table
-    logging.info('About to start inserting the data into open_positions table')
-
-    # extracting data
-    open_positions_raw_df = read_raw_json_data(OPEN_POSITIONS_RAW_PATH)
-
-    # transforming data
-    columns_to_drop = ['id', 'logo_url']
-    columns_to_convert_to_str = ['tags', 'locations', 'industries']
-    open_positions_transformed_df = transform_json_data(
-        open_positions_raw_df, columns_to_drop, columns_to_convert_to_str, 'jobs')
-
-    open_positions_transformed_df = open_positions_transformed_df.rename(
-        columns=lambda x: x.strip().lower().replace(' ', '_'))  # standardize column names
-
-    open_positions_transformed_df.drop_duplicates(inplace=True, ignore_index=True)
-
-    create_auxiliary_columns(open_positions_transformed_df) # creating the id, created_at and updated_at columns
-
-    # loading data
-    insert_data_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'startups_hiring',
-        'open_positions',
-        open_positions_transformed_df)
-    logging.info(
-        'Done executing inserting the data into open_positions table\n')
-
-    # 3.2 insert data into nba_payroll table
-    logging.info('About to start inserting the data into nba_payroll table')
-
-    # extracting data
-    nba_payroll_raw_df = read_raw_csv_data(NBA_PAYROLL_RAW_PATH)
-
-    # transforming data
-    columns_to_convert_to_float = ['payroll', 'inflationAdjPayroll']
-    nba_payroll_transformed_df = transform_string_to_float(
-        nba_payroll_raw_df, columns_to_convert_to_float)
-
-    nba_payroll_transformed_df.drop(
-        ['Unnamed: 0'],
-        axis=1,
-        inplace=True)  # drop unnecessary columns
-
-    nba_payroll_transformed_df = nba_payroll_transformed_df.rename(
-        columns=lambda x: x.strip().lower().replace(
-            ' ', '_'))  # standardize column names
-    nba_payroll_transformed_df.rename(
-        columns={
-            'seasonstartyear': 'season_start_year',
-            'inflationadjpayroll': 'inflation_adj_payroll'},
-        inplace=True)  # standardize column names
-
-    nba_payroll_transformed_df.drop_duplicates(inplace=True, ignore_index=True)
-
-    create_auxiliary_columns(nba_payroll_transformed_df) # creating the id, created_at and updated_at columns
-
-    # loading data
-    insert_data_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'nba_payroll',
-        nba_payroll_transformed_df)
-    logging.info('Done executing inserting the data into nba_payroll table\n')
-
-    # 3.3 insert data into player_box_score_stats table
-    logging.info(
-        'About to start inserting the data into player_box_score_stats table')
+    from decouple import config
+    from components.data_collector import read_raw_csv_data
+    from components.data_collector import read_raw_csv_data_since
+    from components.data_collector import read_raw_csv_data_parallel
+    from components.data_collector import read_raw_json_data
+    from components.data_transform import select_raw_columns
+
+    definition = TABLES[table_name]
+    if definition['file_format'] == 'json':
+        return read_raw_json_data(config(definition['raw_path']))
+
+    # only the columns that reach the table are parsed
+    usecols = select_raw_columns(definition)
+
+    if INCREMENTAL and 'watermark' in definition:
+        from components.data_load import read_watermark_from_postgresql
+
+        column_name, raw_column_name = definition['watermark']
+        # the watermark of a sharded table is the greatest one of its nodes
+        watermarks = [
+            read_watermark_from_postgresql(*node, definition['schema'], table_name, column_name)
+            for node in table_nodes(db_config, table_name)]
+        watermark = max(
+            (watermark for watermark in watermarks if watermark is not None), default=None)
+        return read_raw_csv_data_since(
+            config(definition['raw_path']), raw_column_name, watermark, usecols=usecols)
+    if TRANSFORM_WORKERS > 1:
+        return read_raw_csv_data_parallel(
+            config(definition['raw_path']), TRANSFORM_WORKERS, usecols=usecols)
+    return read_raw_csv_data(config(definition['raw_path']), usecols)
+
+
+def transform(
+        table_name: str,
+        raw_df,
+        db_config: tuple = None,
+        seen_hashes: list = None,
+        n_workers: int = None,
+        executor=None):
+    '''Transform the raw data of a table so it can be loaded,
+    replacing the names by the ids of their dimensions
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :param raw_df: (dataframe)
+    Pandas dataframe with the raw data
+
+    :param db_config: (tuple)
+    Connection settings, needed by the tables with surrogate keys and to
+    save the quarantined rows (without it they are only logged)
+
+    :param seen_hashes: (list)
+    Hashes of the rows of the previous batches of the table, when
+    it is transformed in batches (see "drop_duplicates_across_batches")
+
+    :param n_workers: (int)
+    Number of processes of the transformation, by default "--workers"
+
+    :param executor: (ProcessPoolExecutor)
+    Pool of processes shared by the batches of a table, by default one per call
+
+    :return: (dataframe)
+    Pandas dataframe ready to be loaded
+    '''
+    from components.data_validation import validate_dataframe
+    from components.data_transform import transform_table_data
+    from components.data_transform import assign_surrogate_keys
+    from components.data_transform import reconcile_surrogate_keys
+    from components.data_transform import create_auxiliary_columns
+    from components.data_transform import drop_duplicates_across_batches
+    from components.data_load import insert_dimension_into_postgresql
+    from components.data_load import insert_quarantine_into_postgresql
+
+    definition = TABLES[table_name]
+    n_workers = TRANSFORM_WORKERS if n_workers is None else n_workers
+
+    # the rows that break the rules are quarantined, the clean ones go on
+    raw_df, quarantine_df = validate_dataframe(
+        raw_df, definition.get('validation_rules', []))
+    if db_config is not None:
+        insert_quarantine_into_postgresql(
+            *db_config, definition['schema'], table_name, quarantine_df)
+
+    if n_workers > 1 and definition['file_format'] == 'csv':
+        from components.parallel_transform import transform_in_parallel
+
+        transformed_df = transform_in_parallel(
+            raw_df,
+            transform_table_data,
+            (definition,),
+            n_workers=n_workers,
+            drop_duplicates=True,
+            executor=executor)
+    else:
+        transformed_df = transform_table_data(raw_df, definition)
+
+    # replace the names by the ids and persist the new entries of the dimensions
+    for natural_key, surrogate_key, dimension_name in definition.get('surrogate_keys', []):
+        key_mapping = get_dimension_keys(db_config, dimension_name)
+        transformed_df, new_entries_df = assign_surrogate_keys(
+            transformed_df, natural_key, surrogate_key, key_mapping,
+            DIMENSIONS[dimension_name].get('aliases'))
+        stored_ids = insert_dimension_into_postgresql(
+            *db_config, DIMENSIONS[dimension_name]['schema'], dimension_name, new_entries_df)
+        transformed_df = reconcile_surrogate_keys(
+            transformed_df, surrogate_key, new_entries_df, stored_ids, key_mapping)
+
+    if seen_hashes is None:
+        transformed_df.drop_duplicates(inplace=True, ignore_index=True)
+    else:
+        transformed_df = drop_duplicates_across_batches(transformed_df, seen_hashes)
+
+    create_auxiliary_columns(transformed_df) # creating the id, created_at and updated_at columns
+    return transformed_df
+
+
+@contextlib.contextmanager
+def full_load(db_config: tuple, table_name: str):
+    '''Context manager around the loads of a full load. The batches are
+    inserted into a reload table on each node of the table, which replaces
+    the rows of the table in a single transaction per node once every batch
+    was loaded. Until then the readers see the previous rows, and when a batch
+    fails the reload tables are dropped and the previous rows are kept
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :return: (str)
+    Name of the reload table, the "target_table" of "load"
+    '''
+    from components.data_load import create_table_into_postgresql
+    from components.data_load import drop_table_from_postgresql
+    from components.data_load import replace_table_from_postgresql
+
+    definition = TABLES[table_name]
+    schema_name = definition['schema']
+    reload_table = f'{table_name}_reload'
+    nodes = table_nodes(db_config, table_name)
+    try:
+        for node in nodes:
+            # the reload table of a run that was killed is started again
+            drop_table_from_postgresql(*node, schema_name, reload_table)
+            create_table_into_postgresql(
+                *node, schema_name, reload_table, definition['columns'])
+        yield reload_table
+        for node in nodes:
+            replace_table_from_postgresql(*node, schema_name, table_name, reload_table)
+    finally:
+        for node in nodes:
+            drop_table_from_postgresql(*node, schema_name, reload_table)
+
+
+def load(
+        db_config: tuple,
+        table_name: str,
+        transformed_df,
+        target_table: str = None) -> dict:
+    '''Insert a transformed dataframe into its table and verify that all
+    its rows landed. The rows of the sharded tables are routed to their
+    nodes, loaded at the same time
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :param transformed_df: (dataframe)
+    Pandas dataframe returned by "transform"
+
+    :param target_table: (str)
+    Table where the rows are inserted, by default the table itself,
+    the reload table of a full load (see "full_load")
+
+    :return: (dict)
+    Seasons touched by the load for each aggregate table of this table
+    '''
+    from components.data_load import insert_data_into_postgresql
+    from components.data_load import reserve_ids_from_postgresql
+    from components.data_verify import verify_load_into_postgresql
+
+    definition = TABLES[table_name]
+    target_table = target_table or table_name
+    # the ids of the rows come from the sequence of the table on the
+    # first node, so they are unique across the nodes of a sharded table
+    if len(transformed_df):
+        first_id = reserve_ids_from_postgresql(
+            *db_config, definition['schema'], target_table, len(transformed_df))
+        transformed_df['id'] = range(first_id, first_id + len(transformed_df))
+
+    def load_node(node: tuple, node_df) -> list:
+        insert_data_into_postgresql(
+            *node,
+            definition['schema'],
+            target_table,
+            node_df,
+            LOAD_CONNECTIONS,
+            TARGET_BATCH_SECONDS,
+            MIN_BATCH_ROWS,
+            MAX_BATCH_ROWS)
+        # one aggregate query, computed by the server over the ids of the batch
+        return verify_load_into_postgresql(
+            *node, definition['schema'], target_table, node_df)
+
+    nodes = table_nodes(db_config, table_name)
+    if len(nodes) == 1:
+        mismatches = load_node(db_config, transformed_df)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        from components.sharding import split_into_shards
+
+        shards = split_into_shards(transformed_df, definition['sharding'], len(nodes))
+        with ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+            futures = [
+                executor.submit(load_node, node, shard_df)
+                for node, shard_df in zip(nodes, shards) if len(shard_df)]
+            mismatches = [mismatch for future in futures for mismatch in future.result()]
+    if mismatches:
+        LOAD_MISMATCHES.setdefault(table_name, []).extend(mismatches)
+
+    touched_seasons = {}
+    for aggregate_name, season_column, offset in definition.get('aggregates', []):
+        touched_seasons.setdefault(aggregate_name, set()).update(
+            int(season) + offset for season in transformed_df[season_column].unique())
+    return touched_seasons
+
+
+def create_indexes(db_config: tuple, table_names: list) -> None:
+    '''Build the indexes of the loaded tables, after the load so that
+    the bulk insert does not maintain them row by row
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_names: (list)
+    Names of the fact tables, keys of "TABLES"
+    '''
+    from components.data_load import create_indexes_into_postgresql
+
+    logging.info('About to start creating the indexes')
+    for table_name in table_names:
+        definition = TABLES[table_name]
+        if 'indexes' not in definition:
+            continue
+        with stage('index', table_name):
+            for node in table_nodes(db_config, table_name):
+                create_indexes_into_postgresql(
+                    *node, definition['schema'], table_name, definition['indexes'])
+    logging.info('Done executing the creation of the indexes\n')
+
+
+def refresh_aggregates(db_config: tuple, touched_seasons: dict) -> None:
+    '''Refresh the aggregate tables only for the seasons touched by the load,
+    on every node of their source tables: the sources are sharded by season,
+    so each node refreshes the seasons it holds
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param touched_seasons: (dict)
+    Seasons touched for each aggregate table, as returned by "load"
+    '''
+    if not touched_seasons:
+        return
+
+    from components.data_aggregate import refresh_aggregate_table_into_postgresql
+
+    logging.info('About to start refreshing the aggregate tables')
+    for aggregate_name, seasons in touched_seasons.items():
+        source_names = [
+            table_name for table_name, definition in TABLES.items()
+            if aggregate_name in [aggregate[0] for aggregate in definition.get('aggregates', [])]]
+        nodes = dict.fromkeys(
+            node for table_name in source_names for node in table_nodes(db_config, table_name))
+        with stage('aggregate', aggregate_name):
+            for node in nodes:
+                refresh_aggregate_table_into_postgresql(
+                    *node, 'nba', aggregate_name, sorted(seasons))
+    logging.info('Done executing the refresh of the aggregate tables\n')
+
 
-    # extracting data
-    nba_player_box_raw_df = read_raw_csv_data(NBA_PLAYER_BOX_RAW_PATH)
+def extract_and_transform(table_name: str, db_config: tuple = None):
+    '''Extract and transform a table, each one as its own stage
 
-    # transforming data
-    column_to_convert_to_date = 'GAME_DATE'
-    nba_player_box_transformed_df = transform_string_to_datetime(
-        nba_player_box_raw_df, column_to_convert_to_date)
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
 
-    nba_player_box_transformed_df.drop(
-        ['Unnamed: 0'], axis=1, inplace=True)  # drop unnecessary columns
+    :param db_config: (tuple)
+    Connection settings, only needed when "needs_database" is True
 
-    nba_player_box_transformed_df = nba_player_box_transformed_df.rename(
-        columns=lambda x: x.strip().lower().replace(' ', '_'))  # standardize column names
+    :return: (dataframe)
+    Pandas dataframe ready to be loaded, None when there is no new data
+    '''
+    with stage('extract', table_name):
+        raw_df = extract(table_name, db_config)
+    if raw_df.empty:
+        logging.info(f'There is no new data for {table_name} table\n')
+        return None
+    with stage('transform', table_name):
+        return transform(table_name, raw_df, db_config)
+
+
+def load_pipelined(db_config: tuple, table_name: str, target_table: str = None) -> dict:
+    '''Extract, transform and load a csv table in batches of rows, the
+    three stages running at the same time on consecutive batches. With a
+    memory budget the batch size and the workers are planned from the width
+    of the rows, and the pipeline is kept inside the budget while it runs
 
-    nba_player_box_transformed_df.drop_duplicates(inplace=True, ignore_index=True)
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
 
-    create_auxiliary_columns(nba_player_box_transformed_df) # creating the id, created_at and updated_at columns
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
 
-    # loading data
-    insert_data_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'player_box_score_stats',
-        nba_player_box_transformed_df)
+    :param target_table: (str)
+    Table where the batches are inserted (see "load")
+
+    :return: (dict)
+    Seasons touched by the load for each aggregate table of this table
+    '''
+    from decouple import config
+    from components.pipeline import run_pipelined
+    from components.data_collector import iter_raw_csv_data
+    from components.data_collector import iter_raw_csv_data_parallel
+    from components.data_transform import select_raw_columns
+
+    definition = TABLES[table_name]
+    usecols = select_raw_columns(definition)
+    raw_path = config(definition['raw_path'])
+    batch_rows, n_workers, governor = BATCH_ROWS, TRANSFORM_WORKERS, None
+    if MAX_MEMORY is not None:
+        from components.memory_governor import MemoryGovernor
+        from components.memory_governor import estimate_row_bytes, plan_batches
+
+        sample_df = next(iter_raw_csv_data(raw_path, 1000, usecols))
+        batch_rows, n_workers = plan_batches(
+            MAX_MEMORY, estimate_row_bytes(sample_df), BATCH_ROWS, TRANSFORM_WORKERS)
+        governor = MemoryGovernor(MAX_MEMORY)
+
+    if INCREMENTAL and 'watermark' in definition:
+        # only the new seasons are read, they already fit in a single batch
+        batches = [extract(table_name, db_config)]
+    elif n_workers > 1 and governor is None:
+        batches = iter_raw_csv_data_parallel(raw_path, n_workers, usecols=usecols)
+    else:
+        batches = iter_raw_csv_data(raw_path, batch_rows, usecols)
+
+    seen_hashes = []
+    touched_seasons = {}
+    # the processes of the transformation are started once for every batch
+    executor = None
+    if n_workers > 1 and definition['file_format'] == 'csv':
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+
+    def transform_batch(raw_df):
+        if raw_df.empty:
+            return None
+        return transform(table_name, raw_df, db_config, seen_hashes, n_workers, executor)
+
+    def load_batch(transformed_df):
+        batch_seasons = load(db_config, table_name, transformed_df, target_table)
+        for aggregate_name, seasons in batch_seasons.items():
+            touched_seasons.setdefault(aggregate_name, set()).update(seasons)
+
+    # the stages overlap, so the pipeline is profiled as a whole, each thread
+    # with its own profiler (the "stage" gives None when not profiling)
+    with stage('pipeline', table_name) as profile_thread:
+        try:
+            run_pipelined(
+                batches, transform_batch, load_batch,
+                governor=governor, profile_thread=profile_thread)
+        finally:
+            if governor is not None:
+                governor.close()
+            if executor is not None:
+                executor.shutdown()
+    return touched_seasons
+
+
+def table_fingerprints(db_config: tuple, table_name: str) -> tuple:
+    '''Fingerprints of the raw input of a table and of the configuration of
+    the pipeline that loads it: its definition, the dimensions, the nodes it
+    is spread over and the version of the code. The same ones mean the same
+    loaded rows
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :return: (tuple)
+    Fingerprints of the raw input and of the configuration
+    '''
+    import json
+    import hashlib
+    from decouple import config
+    from components.data_collector import fingerprint_file
+
+    definition = TABLES[table_name]
+    configuration = {
+        'definition': definition,
+        'dimensions': DIMENSIONS,
+        'nodes': [list(node[:2]) for node in table_nodes(db_config, table_name)],
+        'pipeline_version': PIPELINE_VERSION}
+    config_fingerprint = hashlib.blake2b(
+        json.dumps(configuration, sort_keys=True).encode(), digest_size=32).hexdigest()
+    return fingerprint_file(config(definition['raw_path'])), config_fingerprint
+
+
+def extract_transform_and_load(db_config: tuple, table_name: str) -> dict:
+    '''Run the three stages of a table, pipelined when "--pipelined" is given.
+    The table is skipped when the load ledger shows that its raw input and
+    its definition did not change since its last load, unless "--force" is given
+
+    :param db_config: (tuple)
+    Connection settings returned by "read_database_config"
+
+    :param table_name: (str)
+    Name of the table, keys of "TABLES"
+
+    :return: (dict)
+    Seasons touched by the load for each aggregate table of this table
+    '''
+    from components.data_load import read_load_ledger_from_postgresql
+    from components.data_load import update_load_ledger_into_postgresql
+
+    schema_name = TABLES[table_name]['schema']
+    fingerprints = table_fingerprints(db_config, table_name)
+    if not FORCE and read_load_ledger_from_postgresql(
+            *db_config, schema_name, table_name) == fingerprints:
+        logging.info(f'Nothing changed since the last load of {table_name} table, skipped\n')
+        return {}
+
+    logging.info(f'About to start inserting the data into {table_name} table')
+    touched_seasons = {}
+    # a full load replaces the rows of the table only once all of them were loaded
+    replacing = (
+        full_load(db_config, table_name) if is_full_load(table_name)
+        else contextlib.nullcontext())
+    # within a memory budget the csv tables are always loaded in batches
+    if (PIPELINED or MAX_MEMORY is not None) and TABLES[table_name]['file_format'] == 'csv':
+        with replacing as target_table:
+            touched_seasons = load_pipelined(db_config, table_name, target_table)
+    else:
+        transformed_df = extract_and_transform(table_name, db_config)
+        if transformed_df is not None:
+            with replacing as target_table, stage('load', table_name):
+                touched_seasons = load(db_config, table_name, transformed_df, target_table)
+
+    # recorded only once the load was committed and verified
+    if table_name in LOAD_MISMATCHES:
+        logging.info(f'The load of {table_name} table did not verify, it will be loaded again')
+    else:
+        update_load_ledger_into_postgresql(*db_config, schema_name, table_name, fingerprints)
+    logging.info(f'Done executing inserting the data into {table_name} table\n')
+    return touched_seasons
+
+
+def report_load_verification() -> None:
+    '''Report the tables whose loaded rows did not match their dataframes,
+    failing the run after all the tables were loaded'''
+    if not LOAD_MISMATCHES:
+        return
+
+    for table_name, mismatches in LOAD_MISMATCHES.items():
+        logging.error(
+            f'{table_name} table did not verify: {len(mismatches)} mismatches, '
+            f'first: {mismatches[0]}')
+    raise RuntimeError(
+        f'The load of {", ".join(LOAD_MISMATCHES)} did not verify, see the log above')
+
+
+def run_collect(args: argparse.Namespace) -> None:
+    '''"collect" subcommand: download the raw datasets'''
+    collect()
+
+
+def run_transform(args: argparse.Namespace) -> None:
+    '''"transform" subcommand: transform a table without loading it'''
+    db_config = read_database_config() if needs_database(args.table) else None
+
+    logging.info(f'About to start transforming the data of {args.table} table')
+    transformed_df = extract_and_transform(args.table, db_config)
+    if transformed_df is None:
+        return
+    if args.output:
+        transformed_df.to_pickle(args.output)
     logging.info(
-        'Done executing inserting the data into player_box_score_stats table\n')
-
-    # 3.4 insert data into player_stats table
-    logging.info('About to start inserting the data into player_stats table')
-
-    # extracting data
-    nba_player_stats_raw_df = read_raw_csv_data(NBA_PLAYER_STATS_RAW_PATH)
-
-    # transforming data
-    nba_player_stats_transformed_df = nba_player_stats_raw_df.drop(
-        ['Unnamed: 0.1', 'Unnamed: 0'], axis=1)  # drop unnecessary columns
-
-    nba_player_stats_transformed_df = nba_player_stats_transformed_df.rename(
-        columns=lambda x: x.strip().lower().replace(' ', '_'))  # standardize column names
-    nba_player_stats_transformed_df.rename(
-        columns={
-            'player': 'player_name',
-            'fg%': 'fg_percent',
-            '3p': 'threep',
-            '3pa': 'threepa',
-            '3p%': 'threep_percent',
-            '2p': 'twop',
-            '2pa': 'twopa',
-            '2p%': 'twop_percent',
-            'efg%': 'efg_percent',
-            'ft%': 'ft_percent'}, inplace=True)  # standardize column names
-
-    nba_player_stats_transformed_df.drop_duplicates(inplace=True, ignore_index=True)
-
-    create_auxiliary_columns(nba_player_stats_transformed_df) # creating the id, created_at and updated_at columns
-
-    # loading data
-    insert_data_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'player_stats',
-        nba_player_stats_transformed_df)
-    logging.info('Done executing inserting the data into player_stats table\n')
-
-    # 3.5 insert data into nba_salaries table
-    logging.info('About to start inserting the data into nba_salaries table')
-
-    # extracting data
-    nba_salaries_raw_df = read_raw_csv_data(NBA_SALARIES_RAW_PATH)
-
-    # transforming data
-    columns_to_convert_to_float = ['salary', 'inflationAdjSalary']
-    nba_salaries_transformed_df = transform_string_to_float(
-        nba_salaries_raw_df, columns_to_convert_to_float)
-
-    nba_salaries_transformed_df.drop(
-        ['Unnamed: 0'],
-        axis=1,
-        inplace=True)  # drop unnecessary columns
-
-    nba_salaries_transformed_df = nba_salaries_transformed_df.rename(
-        columns=lambda x: x.strip().lower().replace(
-            ' ', '_'))  # standardize column names
-    nba_salaries_transformed_df.rename(
-        columns={
-            'playername': 'player_name',
-            'seasonstartyear': 'season_start_year',
-            'inflationadjsalary': 'inflation_adj_salary'},
-        inplace=True)  # standardize column names
-
-    nba_salaries_transformed_df.drop_duplicates(inplace=True, ignore_index=True)
-
-    create_auxiliary_columns(nba_salaries_transformed_df) # creating the id, created_at and updated_at columns
-
-    # loading data
-    insert_data_into_postgresql(
-        HOST_NAME,
-        PORT,
-        DB_NAME,
-        USER,
-        PASSWORD,
-        'nba',
-        'nba_salaries',
-        nba_salaries_transformed_df)
-    logging.info('Done executing inserting the data into nba_salaries table\n')
-
-    # # 4. Create unique id's incrementally in tables already inserted in postgres
-    # # 5. Create monitoring columns in tables already inserted in postgres 
-    # logging.info(
-    #     'About to start to create unique ids and monitoring columns for the tables')
-    # schema_tables = [
-    #     'startups_hiring.open_positions',
-    #     'nba.nba_payroll',
-    #     'nba.player_box_score_stats',
-    #     'nba.player_stats',
-    #     'nba.nba_salaries']
-    # for i in schema_tables:
-    #     add_auto_increment_id_to_table(HOST_NAME, DB_NAME, USER, PASSWORD, i)
-    #     add_monitoring_columns_to_table(HOST_NAME, DB_NAME, USER, PASSWORD, i)
-    # logging.info(
-    #     'Done executing the creation of unique ids and monitoring columns')
+        f'Done transforming {len(transformed_df)} rows of {args.table} table\n')
+
+
+def run_load(args: argparse.Namespace) -> None:
+    '''"load" subcommand: extract, transform and load a single table'''
+    db_config = read_database_config()
+    create_tables(db_config, [args.table])
+
+    touched_seasons = extract_transform_and_load(db_config, args.table)
+    create_indexes(db_config, [args.table])
+    refresh_aggregates(db_config, touched_seasons)
+    report_load_verification()
+
+
+def run_all(args: argparse.Namespace) -> None:
+    '''"run" subcommand: the whole pipeline, from the download to the aggregates'''
+    collect()
+
+    db_config = read_database_config()
+    create_tables(db_config, list(TABLES))
+
+    touched_seasons = {}
+    for table_name in TABLES:
+        table_seasons = extract_transform_and_load(db_config, table_name)
+        for aggregate_name, seasons in table_seasons.items():
+            touched_seasons.setdefault(aggregate_name, set()).update(seasons)
+
+    create_indexes(db_config, list(TABLES))
+    refresh_aggregates(db_config, touched_seasons)
+    report_load_verification()
+
+
+def run_index(args: argparse.Namespace) -> None:
+    '''"index" subcommand: build the missing indexes of the loaded tables'''
+    create_indexes(read_database_config(), [args.table] if args.table else list(TABLES))
+
+
+def run_export(args: argparse.Namespace) -> None:
+    '''"export" subcommand: export a loaded table to partitioned Parquet files'''
+    from components.data_export import export_table_to_parquet
+
+    definition = TABLES.get(args.table) or DIMENSIONS[args.table]
+    # by default the seasons of the NBA tables are the partitions
+    partition_column = args.partition_by or definition.get('watermark', (None,))[0]
+
+    # the rows of the sharded tables are exported from all their nodes
+    db_config = read_database_config()
+    shard_nodes = [node[:2] for node in table_nodes(db_config, args.table)[1:]]
+
+    logging.info(f'About to start exporting the {args.table} table')
+    with stage('export', args.table):
+        export_table_to_parquet(
+            *db_config,
+            definition['schema'],
+            args.table,
+            f'{args.output_dir}/{args.table}',
+            partition_column,
+            shard_nodes)
+    logging.info(f'Done exporting the {args.table} table\n')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    '''Build the command line parser with one subcommand per stage
+
+    :return: (ArgumentParser)
+    The command line parser
+    '''
+    parser = argparse.ArgumentParser(
+        description='Populate the PostgreSQL database with the Kaggle datasets')
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='profile CPU time and allocations of each stage (slows the run down)')
+    parser.add_argument(
+        '--profile-dir',
+        default='./profiles',
+        help='directory where the profiles are saved')
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='load every table, even the ones that did not change since their last load')
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='load only the seasons newer than the ones already in each table')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='number of processes used to parse and transform each csv table')
+    parser.add_argument(
+        '--load-connections',
+        type=int,
+        default=1,
+        help='number of connections copying the data into each table at the same time')
+    parser.add_argument(
+        '--pipelined',
+        action='store_true',
+        help='read, transform and load the csv tables as overlapped batches')
+    parser.add_argument(
+        '--batch-rows',
+        type=int,
+        default=200000,
+        help='rows of each batch of the pipelined mode')
+    parser.add_argument(
+        '--max-memory',
+        help='memory budget of the run, for example "4GB": the csv tables are loaded '
+             'in batches sized to fit in it and spilled to disk when it runs short')
+    parser.add_argument(
+        '--target-batch-seconds',
+        type=float,
+        help='stage the rows of each load in batches tuned to take this long')
+    parser.add_argument(
+        '--min-batch-rows',
+        type=int,
+        default=1000,
+        help='smallest batch of the tuned sizes')
+    parser.add_argument(
+        '--max-batch-rows',
+        type=int,
+        default=1000000,
+        help='largest batch of the tuned sizes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    collect_parser = subparsers.add_parser(
+        'collect', help='download the raw datasets from Kaggle')
+    collect_parser.set_defaults(func=run_collect)
+
+    transform_parser = subparsers.add_parser(
+        'transform', help='transform the raw data of a table')
+    transform_parser.add_argument('table', choices=TABLES)
+    transform_parser.add_argument(
+        '--output', help='pickle file where the transformed dataframe is saved')
+    transform_parser.set_defaults(func=run_transform)
+
+    load_parser = subparsers.add_parser(
+        'load', help='extract, transform and load a single table')
+    load_parser.add_argument('table', choices=TABLES)
+    load_parser.set_defaults(func=run_load)
+
+    run_parser = subparsers.add_parser(
+        'run', help='run the whole pipeline for every table')
+    run_parser.set_defaults(func=run_all)
+
+    index_parser = subparsers.add_parser(
+        'index', help='build the missing indexes of the loaded tables')
+    index_parser.add_argument('table', nargs='?', choices=TABLES)
+    index_parser.set_defaults(func=run_index)
+
+    export_parser = subparsers.add_parser(
+        'export', help='export a loaded table to partitioned Parquet files')
+    export_parser.add_argument('table', choices=[*TABLES, *DIMENSIONS])
+    export_parser.add_argument(
+        '--output-dir',
+        default='./exports',
+        help='directory where the Parquet dataset of the table is saved')
+    export_parser.add_argument(
+        '--partition-by',
+        help='column of the partitions, by default the season of the NBA tables')
+    export_parser.set_defaults(func=run_export)
+
+    return parser
+
+
+def main(argv: list = None) -> None:
+    '''Parse the command line and run the chosen subcommand
+
+    :param argv: (list)
+    Command line arguments, by default the ones given to the script
+    '''
+    global PROFILE_DIR, TRANSFORM_WORKERS, LOAD_CONNECTIONS
+    global INCREMENTAL, PIPELINED, BATCH_ROWS, FORCE
+    global TARGET_BATCH_SECONDS, MIN_BATCH_ROWS, MAX_BATCH_ROWS, MAX_MEMORY
+
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        PROFILE_DIR = args.profile_dir
+    TRANSFORM_WORKERS = args.workers
+    LOAD_CONNECTIONS = args.load_connections
+    INCREMENTAL = args.incremental
+    FORCE = args.force
+    PIPELINED = args.pipelined
+    BATCH_ROWS = args.batch_rows
+    TARGET_BATCH_SECONDS = args.target_batch_seconds
+    MIN_BATCH_ROWS = args.min_batch_rows
+    MAX_BATCH_ROWS = args.max_batch_rows
+    MAX_MEMORY = None
+    if args.max_memory:
+        from components.memory_governor import parse_memory_size
+
+        MAX_MEMORY = parse_memory_size(args.max_memory)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,9 @@ Date: May/2023
 # import necessary packages
 import pytest
 import tempfile
+import threading
 import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from decouple import config
 
 # config
@@ -41,6 +43,64 @@ def temp_dir():
         yield temp
 
 
+@pytest.fixture
+def embedded_db_config(tmp_path):
+    '''Fixture with the connection settings of an empty embedded
+    database, a stand-in for PostgreSQL that needs no server'''
+    return (f'duckdb://{tmp_path}/test.duckdb', '5432', 'test_db', 'test_user', 'test_password')
+
+
+def set_embedded_environment(monkeypatch, host_name: str, **settings) -> None:
+    '''Point the settings read by "main.py" at an embedded database
+    and start the run with no dimension kept in memory'''
+    import main
+
+    for name, value in {
+            'HOST_NAME': host_name, 'PORT': '5432', 'DB_NAME': 'test_db',
+            'USER': 'test_user', 'PASSWORD': 'test_password', **settings}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(main, 'DIMENSION_KEYS', {})
+
+
+@pytest.fixture
+def embedded_salaries(monkeypatch, tmp_path, embedded_db_config):
+    '''Fixture that points the command line at an embedded database
+    and at a raw csv file of the "nba_salaries" table
+
+    Returns:
+        tuple: The connection settings of the embedded database.
+    '''
+    raw_path = tmp_path / 'salaries.csv'
+    raw_path.write_text(
+        ',playerName,seasonStartYear,salary,inflationAdjSalary\n'
+        '0,LeBron James,2020,"$37,436,858","$39,219,565"\n'
+        '1,Stephen Curry,2020,"$43,006,362","$45,053,936"\n'
+        '2,Kevin Durant,2021,"$42,018,900","$44,019,965"\n')
+    set_embedded_environment(
+        monkeypatch, embedded_db_config[0], NBA_SALARIES_RAW_PATH=str(raw_path))
+    return embedded_db_config
+
+
+@pytest.fixture
+def embedded_sharded_payroll(monkeypatch, tmp_path):
+    '''Fixture that points the command line at two embedded nodes, the
+    second one a shard, and at a raw csv file of the "nba_payroll" table
+
+    Returns:
+        list: The host names of both embedded nodes.
+    '''
+    raw_path = tmp_path / 'payroll.csv'
+    raw_path.write_text(
+        ',team,seasonStartYear,payroll,inflationAdjPayroll\n'
+        '0,Lakers,1995,"$24,000,000","$41,000,000"\n'
+        '1,Lakers,2020,"$131,000,000","$137,000,000"\n'
+        '2,Bulls,2021,"$125,000,000","$128,000,000"\n')
+    nodes = [f'duckdb://{tmp_path}/node_0.duckdb', f'duckdb://{tmp_path}/node_1.duckdb']
+    set_embedded_environment(
+        monkeypatch, nodes[0], SHARD_NODES=nodes[1], NBA_PAYROLL_RAW_PATH=str(raw_path))
+    return nodes
+
+
 @pytest.fixture(scope='session')
 def raw_csv_data_path():
     '''Fixture to generate raw csv data path to our tests'''
@@ -100,3 +160,52 @@ def raw_csv_df_datetime():
     raw_csv_df = pd.read_csv(data_path)
 
     return raw_csv_df
+
+
+@pytest.fixture
+def flaky_http_server():
+    '''Fixture that starts a local HTTP stand-in for the download server.
+    It serves "server.payload", answers range requests and drops the connection
+    in the middle of the first response, to simulate a flaky link.
+
+    Yields:
+        ThreadingHTTPServer: The server, with its url in "server.url" and
+        the "Range" header of every request in "server.ranges".
+    '''
+    class FlakyHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            payload = self.server.payload
+            byte_range = self.headers.get('Range')
+            self.server.ranges.append(byte_range)
+
+            start = int(byte_range[len('bytes='):-1]) if byte_range else 0
+            if start >= len(payload):
+                self.send_response(416)
+                self.end_headers()
+                return
+
+            body = payload[start:]
+            self.send_response(206 if byte_range else 200)
+            if byte_range:
+                self.send_header(
+                    'Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+
+            if len(self.server.ranges) == 1:
+                body = body[:len(body) // 2]  # drop the connection midway
+                self.close_connection = True
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.payload = b''
+    server.ranges = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/file.zip'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
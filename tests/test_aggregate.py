@@ -0,0 +1,87 @@
+'''
+Unit tests for the functions included in
+the "data_aggregate.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import pandas as pd
+
+from components.data_aggregate import refresh_aggregate_table_into_postgresql
+from components.data_load import create_schema_into_postgresql
+from components.data_load import create_table_into_postgresql
+from components.data_load import insert_data_into_postgresql
+from components.data_transform import create_auxiliary_columns
+from components.db_backend import connect_to_database
+from components.table_definitions import TABLES
+
+
+def test_refresh_aggregate_table_into_postgresql(mocker):
+    '''tests the "refresh_aggregate_table_into_postgresql" function
+    made in the "data_aggregate.py" file
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value
+
+    refresh_aggregate_table_into_postgresql(
+        host_name="localhost",
+        port="5432",
+        db_name="test_db",
+        user_name="test_user",
+        password="test_password",
+        schema_name="nba",
+        aggregate_name="player_season_totals",
+        seasons=[2021, 2022])
+
+    # only the touched seasons are deleted and recomputed
+    executed = [call.args for call in mock_cursor.execute.call_args_list]
+    assert executed[1] == (
+        'DELETE FROM nba.player_season_totals WHERE season = ANY(%(seasons)s)',
+        {'seasons': [2021, 2022]})
+    assert executed[2][0].startswith('INSERT INTO nba.player_season_totals')
+    mock_connect.return_value.commit.assert_called_once()
+
+
+def test_refresh_aggregate_table_without_seasons(mocker):
+    '''tests that the "refresh_aggregate_table_into_postgresql" function
+    does not touch the database when no season was loaded
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+
+    refresh_aggregate_table_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "team_season_payroll_results", [])
+
+    mock_connect.assert_not_called()
+
+
+def test_refresh_aggregate_table_into_embedded_database(embedded_db_config):
+    '''tests the queries of the "player_season_totals" aggregate
+    against the embedded database
+    '''
+    columns = TABLES['player_box_score_stats']['columns']
+    create_schema_into_postgresql(embedded_db_config[0], 'test_db', '', '', 'nba')
+    create_table_into_postgresql(
+        *embedded_db_config, 'nba', 'player_box_score_stats', columns)
+    column_names = [line.split()[0] for line in columns.strip().splitlines()][:-3]
+    box_score_df = pd.DataFrame(
+        {column_name: [1, 1, 1] for column_name in column_names})
+    box_score_df['season'] = [2021, 2021, 2022]
+    box_score_df['game_id'] = [10, 11, 12]
+    box_score_df['game_date'] = pd.to_datetime(['2021-01-01', '2021-01-03', '2022-01-01'])
+    box_score_df['pts'] = [20, 30, 40]
+    create_auxiliary_columns(box_score_df)
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'player_box_score_stats', box_score_df)
+
+    refresh_aggregate_table_into_postgresql(
+        *embedded_db_config, 'nba', 'player_season_totals', [2021])
+
+    host_name, port, db_name, user_name, password = embedded_db_config
+    conn = connect_to_database(host_name, db_name, user_name, password, port)
+    with conn.cursor() as cur:
+        cur.execute('SELECT season, player_id, games, pts FROM nba.player_season_totals')
+        assert cur.fetchall() == [(2021, 1, 2, 50)]
+    conn.close()
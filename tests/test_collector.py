@@ -8,11 +8,22 @@ Date: May/2023
 
 # import necessary packages
 import os
+import io
+import zipfile
 import pytest
+import pandas as pd
 
 from components.data_collector import collect_from_kaggle
+from components.data_collector import collect_dataset_from_kaggle
 from components.data_collector import read_raw_csv_data
 from components.data_collector import read_raw_json_data
+from components.data_collector import read_raw_csv_data_since
+from components.data_collector import build_csv_index
+from components.data_collector import read_raw_csv_data_by_keys
+from components.data_collector import read_raw_csv_data_parallel
+from components.data_collector import iter_raw_csv_data_parallel
+from components.data_collector import download_with_resume
+from components.data_collector import is_valid_zip_archive
 
 
 @pytest.mark.parametrize(
@@ -55,3 +66,189 @@ def test_import_raw_json_data(raw_json_data_path):
     '''
     raw_df = read_raw_json_data(raw_json_data_path)
     assert raw_df.shape[0] > 0 and raw_df.shape[1] > 0
+
+
+def test_download_with_resume(flaky_http_server, temp_dir):
+    '''tests the "download_with_resume" function
+    made in the "data_collector.py" file. The first attempt is cut midway
+    and the second one must ask only for the missing bytes
+    '''
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zipref:
+        zipref.writestr('data.csv', 'season,pts\n' * 10000)
+    flaky_http_server.payload = buffer.getvalue()
+    file_path = os.path.join(temp_dir, 'data.csv.zip')
+
+    download_with_resume(
+        flaky_http_server.url, file_path, backoff_factor=0, chunk_size=1024)
+
+    # only the bytes already on disk (whole chunks) are skipped
+    first_range, second_range = flaky_http_server.ranges
+    resumed_from = int(second_range[len('bytes='):-1])
+    assert first_range is None
+    assert len(flaky_http_server.payload) // 2 - 1024 < resumed_from
+    assert not os.path.exists(f'{file_path}.part')
+    assert is_valid_zip_archive(file_path)
+
+
+def test_is_valid_zip_archive(temp_dir):
+    '''tests that the "is_valid_zip_archive" function
+    made in the "data_collector.py" file rejects a truncated archive
+    '''
+    file_path = os.path.join(temp_dir, 'data.csv.zip')
+    with zipfile.ZipFile(file_path, 'w') as zipref:
+        zipref.writestr('data.csv', 'season,pts\n' * 10000)
+    with open(file_path, 'r+b') as file:
+        file.truncate(os.path.getsize(file_path) // 2)
+
+    assert not is_valid_zip_archive(file_path)
+
+
+def test_read_raw_csv_data_since(temp_dir):
+    '''tests the "read_raw_csv_data_since" function
+    made in the "data_collector.py" file
+    '''
+    file_path = os.path.join(temp_dir, 'stats.csv')
+    with open(file_path, 'w') as file:
+        file.write('Season,Player,PTS\n')
+        for season in range(2018, 2023):
+            file.write(f'{season},Player {season},{season - 2000}\n')
+
+    raw_df = read_raw_csv_data_since(file_path, 'season', 2020, chunksize=2)
+
+    assert raw_df['Season'].tolist() == [2021, 2022]
+
+    raw_df = read_raw_csv_data_since(
+        file_path, 'season', 2020, chunksize=2, usecols=['Season', 'PTS'])
+    assert raw_df.columns.tolist() == ['Season', 'PTS']
+
+
+def test_read_raw_csv_data_by_keys(temp_dir):
+    '''tests the "build_csv_index" and "read_raw_csv_data_by_keys"
+    functions made in the "data_collector.py" file
+    '''
+    file_path = os.path.join(temp_dir, 'stats.csv')
+    with open(file_path, 'w') as file:
+        file.write('Unnamed: 0,Season,Player,PTS\n')
+        for i, season in enumerate([2020, 2020, 2021, 2021, 2021, 2022]):
+            file.write(f'{i},{season},"Player, {i}\nJr",{i * 10}\n')
+
+    index = build_csv_index(file_path, 'season')
+    raw_df = read_raw_csv_data_by_keys(file_path, [2022, 2020])
+
+    assert list(index['ranges']) == ['2020', '2021', '2022']
+    assert raw_df['Unnamed: 0'].tolist() == [0, 1, 5]
+    assert raw_df['Player'][2] == 'Player, 5\nJr'
+
+    # the incremental reader seeks to the new seasons through the index
+    assert read_raw_csv_data_since(file_path, 'season', 2020)['Season'].tolist() == [
+        2021, 2021, 2021, 2022]
+
+
+def test_read_raw_csv_data_parallel(temp_dir):
+    '''tests that the "read_raw_csv_data_parallel" function made in the
+    "data_collector.py" file gives the same rows as a sequential parse
+    '''
+    file_path = os.path.join(temp_dir, 'box_score.csv')
+    with open(file_path, 'w') as file:
+        file.write(',Season,PLAYER_NAME,GAME_DATE,MIN,PLUS_MINUS\n')
+        for i in range(5000):
+            minutes = '' if i > 4000 and i % 7 == 0 else i % 48
+            file.write(f'{i},{1950 + i // 100},Player {i % 300},"Jan 01, 2000",{minutes},{i % 21 - 10}.5\n')
+
+    expected_output = pd.read_csv(file_path)
+    actual_output = read_raw_csv_data_parallel(file_path, n_workers=3)
+
+    assert actual_output.columns.tolist() == expected_output.columns.tolist()
+    assert actual_output['Unnamed: 0'].tolist() == list(range(5000))
+    assert actual_output['MIN'].isna().sum() == expected_output['MIN'].isna().sum()
+    assert actual_output['PLUS_MINUS'].sum() == expected_output['PLUS_MINUS'].sum()
+
+    # with a projection, the other columns are never parsed
+    projected_output = read_raw_csv_data_parallel(
+        file_path, n_workers=3, usecols=lambda col: col in ('Season', 'MIN'))
+    assert projected_output.columns.tolist() == ['Season', 'MIN']
+    assert projected_output['MIN'].isna().sum() == expected_output['MIN'].isna().sum()
+
+
+def test_iter_raw_csv_data_parallel_backpressure(mocker, temp_dir):
+    '''tests that the "iter_raw_csv_data_parallel" function made in the
+    "data_collector.py" file parses only a few ranges ahead of its consumer
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+
+    submitted = []
+
+    class CountingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args[2])
+            return super().submit(*args, **kwargs)
+
+    mocker.patch('components.data_collector.ProcessPoolExecutor', CountingExecutor)
+    file_path = os.path.join(temp_dir, 'box_score.csv')
+    with open(file_path, 'w') as file:
+        file.write('Season,MIN\n')
+        for i in range(2000):
+            file.write(f'{1950 + i // 100},{i % 48}\n')
+
+    batches = iter_raw_csv_data_parallel(
+        file_path, n_workers=2, ranges_per_worker=4, ranges_ahead=3)
+    first_batch = next(batches)
+    # the range taken and the three parsed ahead of the consumer
+    assert len(submitted) == 4
+
+    total_rows = len(first_batch) + sum(len(batch) for batch in batches)
+    assert total_rows == 2000 and len(submitted) == 8
+
+
+def test_collect_dataset_from_kaggle(mocker, flaky_http_server, temp_dir):
+    '''tests that the "collect_dataset_from_kaggle" function made in the
+    "data_collector.py" file downloads the archive once and extracts
+    only the requested files
+    '''
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipref:
+        zipref.writestr('payroll.csv', 'team,seasonStartYear\nBoston,1990\n' * 100)
+        zipref.writestr('stats.csv', 'Season,Player\n2000,Player\n' * 100)
+        zipref.writestr('salaries.csv', 'playerName,seasonStartYear\nPlayer,1990\n' * 100)
+    flaky_http_server.payload = buffer.getvalue()
+    mocker.patch(
+        'components.data_collector.get_kaggle_credentials', return_value=('user', 'key'))
+    mocker.patch(
+        'components.data_collector.KAGGLE_DATASET_DOWNLOAD_URL', flaky_http_server.url)
+
+    collect_dataset_from_kaggle(
+        'loganlauton', 'nba', ['payroll.csv', 'stats.csv', 'missing.csv'], temp_dir,
+        {'stats.csv': 'season'}, n_workers=2)
+
+    assert sorted(os.listdir(temp_dir)) == [
+        'nba.zip', 'payroll.csv', 'stats.csv', 'stats.csv.index.json']
+    assert len(read_raw_csv_data(os.path.join(temp_dir, 'stats.csv'))) == 199
+
+
+def test_corrupted_member_keeps_the_saved_file(mocker, flaky_http_server, temp_dir):
+    '''tests that the "collect_dataset_from_kaggle" function made in the
+    "data_collector.py" file does not overwrite a saved file with a member
+    that fails its CRC check
+    '''
+    saved_stats = 'Season,Player\n1999,Player\n'
+    with open(os.path.join(temp_dir, 'stats.csv'), 'w') as saved_file:
+        saved_file.write(saved_stats)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zipref:
+        zipref.writestr('stats.csv', 'Season,Player\n2000,Player\n' * 100)
+    payload = bytearray(buffer.getvalue())
+    data_start = payload.index(b'2000,Player')
+    payload[data_start] = ord('3')
+    flaky_http_server.payload = bytes(payload)
+    mocker.patch(
+        'components.data_collector.get_kaggle_credentials', return_value=('user', 'key'))
+    mocker.patch(
+        'components.data_collector.KAGGLE_DATASET_DOWNLOAD_URL', flaky_http_server.url)
+
+    collect_dataset_from_kaggle('loganlauton', 'nba', ['stats.csv'], temp_dir)
+
+    assert os.listdir(temp_dir) == ['stats.csv']
+    with open(os.path.join(temp_dir, 'stats.csv')) as saved_file:
+        assert saved_file.read() == saved_stats
@@ -0,0 +1,76 @@
+'''
+Unit tests for the functions included in
+the "data_export.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pa_dataset
+
+from components.data_export import copy_to_record_batches
+from components.data_export import export_table_to_parquet
+from components.data_load import create_schema_into_postgresql
+from components.data_load import create_table_into_postgresql
+from components.data_load import insert_data_into_postgresql
+from components.data_transform import create_auxiliary_columns
+from components.table_definitions import TABLES
+
+
+def test_copy_to_record_batches(mocker):
+    '''tests that the csv written by "COPY ... TO STDOUT" is parsed
+    with the types of the query, keeping NULL apart from empty strings
+    '''
+    def copy_expert(query, sink):
+        sink.write(b'season,player,game_date\n')
+        for i in range(2000):
+            sink.write(f'{2000 + i % 3},"Player {i}",2021-01-0{1 + i % 9}\n'.encode())
+        sink.write(b'2003,,2021-01-01\n2003,"",\n')
+
+    mock_cursor = mocker.Mock()
+    mock_cursor.copy_expert.side_effect = copy_expert
+    schema = pa.schema([
+        ('season', pa.int32()), ('player', pa.string()), ('game_date', pa.date32())])
+
+    batches = list(copy_to_record_batches(
+        mock_cursor, 'SELECT * FROM nba.test', schema, batch_size=4096))
+    table = pa.Table.from_batches(batches)
+
+    # the batches are bounded by the block size
+    assert len(batches) > 1
+    assert table.schema == schema
+    assert table.num_rows == 2002
+    assert table['player'].to_pylist()[-2:] == [None, '']
+    assert table['game_date'].to_pylist()[-1] is None
+    assert mock_cursor.copy_expert.call_args.args[0] == (
+        'COPY (SELECT * FROM nba.test) TO STDOUT WITH (FORMAT csv, HEADER true)')
+
+
+def test_export_table_to_parquet(embedded_db_config, tmp_path):
+    '''tests the export of a table to a Parquet dataset partitioned by season'''
+    create_schema_into_postgresql(embedded_db_config[0], 'test_db', '', '', 'nba')
+    create_table_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', TABLES['nba_payroll']['columns'])
+    transformed_df = pd.DataFrame({
+        'team_id': [1, 2, 1],
+        'season_start_year': [2020, 2020, 2021],
+        'payroll': [100.0, 200.0, 300.0],
+        'inflation_adj_payroll': [110.0, 220.0, 330.0]})
+    create_auxiliary_columns(transformed_df)
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', transformed_df)
+
+    output_dir = str(tmp_path / 'nba_payroll')
+    n_rows = export_table_to_parquet(
+        *embedded_db_config, 'nba', 'nba_payroll', output_dir, 'season_start_year')
+
+    assert n_rows == 3
+    assert sorted(os.listdir(output_dir)) == [
+        'season_start_year=2020', 'season_start_year=2021']
+    exported_df = pa_dataset.dataset(
+        output_dir, format='parquet', partitioning='hive').to_table().to_pandas()
+    assert sorted(exported_df['payroll']) == [100.0, 200.0, 300.0]
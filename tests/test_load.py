@@ -7,9 +7,22 @@ Date: May/2023
 '''
 
 # import necessary packages
+import io
+import pandas as pd
+import pytest
+
 from components.data_load import create_schema_into_postgresql
 from components.data_load import create_table_into_postgresql
 from components.data_load import insert_data_into_postgresql
+from components.data_load import insert_dimension_into_postgresql
+from components.data_load import read_dimension_from_postgresql
+from components.data_load import read_watermark_from_postgresql
+from components.data_load import reserve_ids_from_postgresql
+from components.data_load import order_columns_by_alignment
+from components.data_load import create_indexes_into_postgresql
+from components.data_load import AdaptiveBatchSizer
+from components.data_transform import create_auxiliary_columns
+from components.table_definitions import TABLES
 
 
 def test_create_schema_into_postgresql(mocker):
@@ -33,3 +46,342 @@ def test_create_schema_into_postgresql(mocker):
     mock_cursor.execute.assert_called_once_with(
         "SELECT schema_name FROM information_schema.schemata WHERE schema_name = 'test_schema'"
     )
+
+
+def test_insert_dimension_into_postgresql(mocker):
+    '''tests the "insert_dimension_into_postgresql" function made in the
+    "data_load.py" file, with an entry and an id stored by another run
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('player_id',), ('player_key',), ('player_name',)],
+        [('lebron james', 1), ('kevin durant', 2)]]
+    mock_execute_values = mocker.patch("components.db_backend.execute_values")
+    new_entries_df = pd.DataFrame({
+        'player_id': [1, 2],
+        'natural_key': ['lebron james', 'stephen curry'],
+        'player_name': ['LeBron James', 'Stephen Curry']})
+
+    stored_ids = insert_dimension_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "players", new_entries_df)
+
+    # the table is locked and the new entries are sent in a single statement
+    assert mock_cursor.execute.call_args_list[0].args[0].startswith('LOCK TABLE nba.players')
+    mock_execute_values.assert_called_once()
+    assert mock_execute_values.call_args.args[2] == [(3, 'stephen curry', 'Stephen Curry')]
+    assert mock_execute_values.call_args.kwargs['page_size'] == 1
+    assert stored_ids == {'lebron james': 1, 'stephen curry': 3}
+
+
+def create_payroll_table(db_config):
+    '''Create the "nba_payroll" table in the embedded database'''
+    create_schema_into_postgresql(
+        db_config[0], db_config[2], db_config[3], db_config[4], 'nba')
+    create_table_into_postgresql(
+        *db_config, 'nba', 'nba_payroll', TABLES['nba_payroll']['columns'])
+
+
+def test_insert_data_into_embedded_database(embedded_db_config):
+    '''tests the whole "insert_data_into_postgresql" path against the
+    embedded database: staging table, insert and the conflicts on the id
+    '''
+    create_payroll_table(embedded_db_config)
+    transformed_df = pd.DataFrame({
+        'team_id': [1, 2, 3],
+        'season_start_year': [2020, 2020, 2021],
+        'payroll': [100.0, 200.0, 300.0],
+        'inflation_adj_payroll': [110.0, 220.0, 330.0]})
+    create_auxiliary_columns(transformed_df)
+
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', transformed_df)
+    # the same ids again are ignored, not duplicated
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', transformed_df)
+
+    assert read_watermark_from_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', 'season_start_year') == 2021
+    assert read_dimension_from_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', 'id', 'payroll') == {
+            1: 100.0, 2: 200.0, 3: 300.0}
+
+
+def test_insert_data_with_wrong_columns(embedded_db_config):
+    '''tests that "insert_data_into_postgresql" refuses a dataframe
+    whose columns are not the ones of the table
+    '''
+    create_payroll_table(embedded_db_config)
+    transformed_df = pd.DataFrame({
+        'season_start_year': [2020], 'team_id': [1], 'payroll': [1.0]})
+
+    with pytest.raises(ValueError):
+        insert_data_into_postgresql(
+            *embedded_db_config, 'nba', 'nba_payroll', transformed_df)
+
+
+def test_adaptive_batch_sizer():
+    '''tests that the "AdaptiveBatchSizer" class made in the "data_load.py"
+    file moves the batch size toward the target latency, within its bounds
+    '''
+    sizer = AdaptiveBatchSizer(target_seconds=1.0, min_rows=5000, max_rows=50000)
+    assert sizer.batch_rows == 10000
+
+    # 100000 rows/s: the size doubles at most at each step, up to the bound
+    sizer.record('nba.nba_payroll', 10000, 10 ** 6, 0.1)
+    assert sizer.batch_rows == 20000
+    sizer.record('nba.nba_payroll', 20000, 10 ** 6, 0.2)
+    assert sizer.batch_rows == 40000
+    sizer.record('nba.nba_payroll', 40000, 10 ** 6, 0.4)
+    assert sizer.batch_rows == 50000
+
+    # the server slows down to 10000 rows/s, the measures are smoothed
+    sizer.record('nba.nba_payroll', 50000, 10 ** 6, 5.0)
+    assert sizer.batch_rows == 50000
+    sizer.record('nba.nba_payroll', 50000, 10 ** 6, 5.0)
+    assert sizer.batch_rows == 32500
+    # a partial batch does not change the size
+    sizer.record('nba.nba_payroll', 10, 10 ** 3, 1.0)
+    assert sizer.batch_rows == 32500
+
+
+def test_insert_data_in_adaptive_batches(embedded_db_config):
+    '''tests that "insert_data_into_postgresql" stages all the rows
+    when they are split into tuned batches
+    '''
+    create_payroll_table(embedded_db_config)
+    transformed_df = pd.DataFrame({
+        'team_id': range(25),
+        'season_start_year': [2020] * 25,
+        'payroll': [100.0] * 25,
+        'inflation_adj_payroll': [110.0] * 25})
+    create_auxiliary_columns(transformed_df)
+
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', transformed_df,
+        target_batch_seconds=1.0, min_batch_rows=1, max_batch_rows=10)
+
+    assert len(read_dimension_from_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', 'id', 'payroll')) == 25
+
+
+def test_insert_dimension_into_embedded_database(embedded_db_config):
+    '''tests that the new entries of a dimension can be read back'''
+    create_schema_into_postgresql(
+        embedded_db_config[0], 'test_db', '', '', 'nba')
+    create_table_into_postgresql(
+        *embedded_db_config, 'nba', 'players', '''
+        player_id INT PRIMARY KEY,
+        player_key VARCHAR(50) UNIQUE,
+        player_name VARCHAR(50)''')
+    new_entries_df = pd.DataFrame({
+        'player_id': [1, 2],
+        'natural_key': ['lebron james', 'stephen curry'],
+        'player_name': ['LeBron James', 'Stephen Curry']})
+
+    insert_dimension_into_postgresql(
+        *embedded_db_config, 'nba', 'players', new_entries_df)
+    insert_dimension_into_postgresql(
+        *embedded_db_config, 'nba', 'players', new_entries_df)
+
+    assert read_dimension_from_postgresql(
+        *embedded_db_config, 'nba', 'players', 'player_key', 'player_id') == {
+            'lebron james': 1, 'stephen curry': 2}
+
+
+def test_reserve_ids_from_postgresql(mocker):
+    '''tests that the "reserve_ids_from_postgresql" function made in the
+    "data_load.py" file takes the whole block in a single locked statement
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchone.return_value = (101,)
+
+    first_id = reserve_ids_from_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "nba_payroll", 50)
+
+    assert first_id == 101
+    mock_cursor.execute.assert_called_once()
+    query, params = mock_cursor.execute.call_args.args
+    assert 'pg_advisory_xact_lock' in query and 'setval' in query
+    assert params == {'table': 'nba.nba_payroll', 'n_ids': 50}
+    mock_connect.return_value.commit.assert_called_once()
+
+
+def test_reserve_ids_after_the_loaded_rows(embedded_db_config):
+    '''tests that the reserved ids never collide with the ids already loaded'''
+    create_payroll_table(embedded_db_config)
+    transformed_df = pd.DataFrame({
+        'team_id': [1, 2],
+        'season_start_year': [2020, 2020],
+        'payroll': [100.0, 200.0],
+        'inflation_adj_payroll': [110.0, 220.0]})
+    create_auxiliary_columns(transformed_df)
+    transformed_df['id'] = [41, 42]
+    insert_data_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', transformed_df)
+
+    assert reserve_ids_from_postgresql(
+        *embedded_db_config, 'nba', 'nba_payroll', 10) == 43
+
+
+def test_insert_data_over_several_connections(mocker):
+    '''tests that "insert_data_into_postgresql" copies the slices over the
+    pooled connections and merges them with a single insert and commit
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('season', 'integer'), ('player_id', 'integer'), ('pts', 'double precision')],
+        [('season',), ('player_id',), ('pts',)]]
+    mock_cursor.fetchone.return_value = (True,)
+
+    copied = []
+    def copy_expert(query, buffer):
+        copied.append(buffer.read())
+    mock_pool = mocker.patch("components.data_load.get_connection_pool").return_value
+    slice_cursor = mock_pool.getconn.return_value.cursor.return_value.__enter__.return_value
+    slice_cursor.copy_expert.side_effect = copy_expert
+
+    df = pd.DataFrame({
+        'season': [2020, 2021, 2022, 2023, 2024],
+        'player_id': [1.0, 2.0, None, 4.0, 5.0],
+        'pts': [10.5, 20.0, 30.0, 40.0, 50.0]})
+    insert_data_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "player_stats", df, n_connections=3)
+
+    # every row is copied once, the integers without decimals
+    assert len(copied) == 3
+    assert ''.join(sorted(copied)) == (
+        '2020,1,10.5\n2021,2,20.0\n2022,\\N,30.0\n2023,4,40.0\n2024,5,50.0\n')
+    executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+    assert sum(query.startswith('INSERT INTO nba.player_stats') for query in executed) == 1
+    assert executed[1].startswith('CREATE UNLOGGED TABLE nba.temp_player_stats_')
+
+
+def test_copy_keeps_empty_strings_apart_from_nulls(mocker):
+    '''tests that the csv streamed by COPY marks the missing values, so
+    that the empty strings are read back as empty strings and not as NULL
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('player_id', 'integer'), ('pos', 'character varying')],
+        [('player_id',), ('pos',)]]
+    mock_cursor.fetchone.return_value = (True,)
+
+    copied = []
+    def copy_expert(query, buffer):
+        copied.append((query, buffer.read()))
+    mock_pool = mocker.patch("components.data_load.get_connection_pool").return_value
+    slice_cursor = mock_pool.getconn.return_value.cursor.return_value.__enter__.return_value
+    slice_cursor.copy_expert.side_effect = copy_expert
+
+    df = pd.DataFrame({'player_id': [1, 2, 3], 'pos': ['', None, 'PG']})
+    insert_data_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "player_stats", df, n_connections=2)
+
+    # read back the way "COPY ... WITH (FORMAT csv, NULL '\\N')" does
+    assert all("NULL '\\N'" in query for query, _ in copied)
+    copied_df = pd.read_csv(
+        io.StringIO(''.join(text for _, text in copied)), names=['player_id', 'pos'],
+        keep_default_na=False, na_values=['\\N']).sort_values('player_id')
+    assert copied_df['pos'].iloc[0] == ''
+    assert pd.isna(copied_df['pos'].iloc[1])
+    assert copied_df['pos'].iloc[2] == 'PG'
+
+
+def test_failed_merge_drops_the_staging_table(mocker):
+    '''tests that "insert_data_into_postgresql" drops its committed
+    staging table when the merge into the final table fails
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchall.side_effect = [
+        [('season', 'integer'), ('pts', 'double precision')],
+        [('season',), ('pts',)]]
+    mock_cursor.fetchone.return_value = (True,)
+    def execute(query, *args):
+        if query.startswith('INSERT INTO'):
+            raise RuntimeError('merge failed')
+    mock_cursor.execute.side_effect = execute
+    mocker.patch("components.data_load.get_connection_pool")
+
+    df = pd.DataFrame({'season': [2020, 2021], 'pts': [10.5, 20.0]})
+    with pytest.raises(RuntimeError, match='merge failed'):
+        insert_data_into_postgresql(
+            "localhost", "5432", "test_db", "test_user", "test_password",
+            "nba", "player_stats", df, n_connections=2)
+
+    executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+    staging_table = executed[1].split()[3]
+    assert executed[-1] == f'DROP TABLE IF EXISTS {staging_table}'
+    mock_connect.return_value.rollback.assert_called_once()
+    mock_connect.return_value.close.assert_called_once()
+
+
+def test_order_columns_by_alignment():
+    '''tests that the "order_columns_by_alignment" function made in the
+    "data_load.py" file puts the widest types first and the constraints last
+    '''
+    table_columns = order_columns_by_alignment('''
+        player_id INT,
+        pos VARCHAR(10),
+        pts FLOAT,
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP,
+        PRIMARY KEY (player_id, pts)
+        ''')
+
+    assert [line.split()[0] for line in table_columns.strip().splitlines()] == [
+        'pts', 'created_at', 'player_id', 'id', 'pos', 'PRIMARY']
+
+
+def test_create_table_applies_the_storage_options(mocker):
+    '''tests that "create_table_into_postgresql" changes on an existing
+    table only the storage options that differ
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value
+    mock_cursor.fetchone.side_effect = [(True,), (['fillfactor=100'],)]
+    mock_cursor.fetchall.return_value = [('about', 'l'), ('tags', '')]
+
+    create_table_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "startups_hiring", "open_positions", 'about TEXT, tags TEXT',
+        {'fillfactor': 100,
+         'autovacuum': {'autovacuum_analyze_scale_factor': 0.02},
+         'column_compression': {'about': 'lz4', 'tags': 'lz4'}})
+
+    executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+    assert 'ALTER TABLE startups_hiring.open_positions SET (autovacuum_analyze_scale_factor = 0.02)' in executed
+    assert [query for query in executed if 'COMPRESSION' in query] == [
+        'ALTER TABLE startups_hiring.open_positions ALTER COLUMN tags SET COMPRESSION lz4']
+    assert not any(query.startswith('CREATE TABLE') for query in executed)
+
+
+def test_create_indexes_into_postgresql(mocker):
+    '''tests that "create_indexes_into_postgresql" skips the valid indexes,
+    rebuilds the invalid ones and builds them all concurrently
+    '''
+    mock_connect = mocker.patch("psycopg2.connect")
+    mock_cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchone.side_effect = [(True,), (False,), None]
+
+    create_indexes_into_postgresql(
+        "localhost", "5432", "test_db", "test_user", "test_password",
+        "nba", "player_box_score_stats",
+        [('game_date', 'brin'), ('season', 'brin'), ('player_id', 'btree')])
+
+    executed = [call.args[0] for call in mock_cursor.execute.call_args_list]
+    assert [query for query in executed if not query.startswith('SELECT')] == [
+        'DROP INDEX CONCURRENTLY nba.player_box_score_stats_season_brin_idx',
+        'CREATE INDEX CONCURRENTLY player_box_score_stats_season_brin_idx '
+        'ON nba.player_box_score_stats USING brin (season)',
+        'CREATE INDEX CONCURRENTLY player_box_score_stats_player_id_btree_idx '
+        'ON nba.player_box_score_stats USING btree (player_id)']
+    assert mock_connect.return_value.autocommit is True
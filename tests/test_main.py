@@ -0,0 +1,202 @@
+'''
+Unit tests for the command line of the "main.py" file
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import sys
+import subprocess
+import pytest
+
+from main import build_parser
+
+# budget for "import main", interpreter startup not included
+IMPORT_TIME_BUDGET_SECONDS = 0.2
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_time_budget():
+    '''tests that importing "main.py" stays inside its time budget
+    and does not import any of the heavy dependencies of the stages
+    '''
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import sys, main; print(sorted(m for m in sys.modules if m.split(".")[0] '
+         'in ("pandas", "sqlalchemy", "psycopg2", "kaggle", "decouple")))'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+
+    # every line of "-X importtime" is: self | cumulative | module
+    cumulative_us = [
+        int(line.split('|')[1]) for line in result.stderr.splitlines()
+        if line.startswith('import time:') and line.split('|')[2].strip() == 'main']
+
+    assert result.stdout.strip() == '[]'
+    assert cumulative_us[0] / 1e6 < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_build_parser():
+    '''tests the subcommands created by the "build_parser" function'''
+    parser = build_parser()
+
+    args = parser.parse_args(['load', 'nba_payroll'])
+    assert args.command == 'load' and args.table == 'nba_payroll'
+
+    args = parser.parse_args(['transform', 'player_stats', '--output', 'stats.pkl'])
+    assert args.table == 'player_stats' and args.output == 'stats.pkl'
+
+    args = parser.parse_args(['export', 'player_stats', '--partition-by', 'season'])
+    assert args.table == 'player_stats' and args.partition_by == 'season'
+
+
+def test_load_skips_unchanged_tables(mocker, monkeypatch, embedded_salaries):
+    '''tests that the "load" subcommand runs end to end against the embedded
+    database and that a second run skips the unchanged table
+    '''
+    import main
+
+    spy_extract = mocker.spy(main, 'extract')
+
+    main.main(['load', 'nba_salaries'])
+    main.main(['load', 'nba_salaries'])
+    assert spy_extract.call_count == 1
+
+    main.main(['--force', 'load', 'nba_salaries'])
+    assert spy_extract.call_count == 2
+
+    monkeypatch.setattr(main, 'PIPELINE_VERSION', main.PIPELINE_VERSION + 1)
+    main.main(['load', 'nba_salaries'])
+    assert spy_extract.call_count == 3
+
+
+def test_load_routes_rows_to_their_shards(embedded_sharded_payroll):
+    '''tests that the "load" subcommand splits a sharded table over two
+    embedded nodes and that each node refreshes the aggregates of its seasons
+    '''
+    import main
+    from components.db_backend import connect_to_database
+
+    # the box score is the other source of the payroll aggregate
+    main.create_tables(main.read_database_config(), ['player_box_score_stats'])
+    main.main(['load', 'nba_payroll'])
+
+    seasons = []
+    for node in embedded_sharded_payroll:
+        conn = connect_to_database(node, 'test_db', '', '')
+        with conn.cursor() as cur:
+            cur.execute('SELECT season_start_year, id FROM nba.nba_payroll ORDER BY id')
+            payroll = cur.fetchall()
+            cur.execute(
+                'SELECT season_start_year FROM nba.team_season_payroll_results '
+                'ORDER BY season_start_year')
+            seasons.append(([row[0] for row in payroll], cur.fetchall()))
+        conn.close()
+
+    assert seasons[0] == ([1995], [(1995,)])
+    assert seasons[1] == ([2020, 2021], [(2020,), (2021,)])
+
+
+def test_export_reads_every_shard(tmp_path, embedded_sharded_payroll):
+    '''tests that the "export" subcommand writes the rows of a
+    sharded table from both embedded nodes into the same dataset
+    '''
+    import main
+    import pyarrow.dataset as pa_dataset
+
+    main.create_tables(main.read_database_config(), ['player_box_score_stats'])
+    main.main(['load', 'nba_payroll'])
+
+    main.main(['export', 'nba_payroll', '--output-dir', str(tmp_path / 'exports')])
+
+    exported_df = pa_dataset.dataset(
+        str(tmp_path / 'exports' / 'nba_payroll'), format='parquet',
+        partitioning='hive').to_table().to_pandas()
+    assert sorted(exported_df['season_start_year'].astype(int)) == [1995, 2020, 2021]
+
+
+def test_load_within_a_memory_budget(mocker, embedded_salaries):
+    '''tests that with "--max-memory" the csv table is loaded
+    in planned batches by the pipeline, under a memory governor
+    '''
+    import main
+    from components.data_load import read_dimension_from_postgresql
+
+    spy_pipelined = mocker.spy(main, 'load_pipelined')
+
+    main.main(['--max-memory', '64GB', 'load', 'nba_salaries'])
+
+    assert main.MAX_MEMORY == 64 * 1024 ** 3
+    spy_pipelined.assert_called_once()
+    assert len(read_dimension_from_postgresql(
+        *embedded_salaries, 'nba', 'nba_salaries', 'id', 'salary')) == 3
+
+
+def test_loading_a_table_again_replaces_its_rows(embedded_salaries):
+    '''tests that loading the same table twice, at once or in pipelined
+    batches, leaves a single copy of its rows
+    '''
+    import main
+    from components.data_load import read_dimension_from_postgresql
+
+    main.main(['load', 'nba_salaries'])
+    main.main(['--force', 'load', 'nba_salaries'])
+    main.main(['--force', '--pipelined', '--batch-rows', '2', 'load', 'nba_salaries'])
+
+    salaries = read_dimension_from_postgresql(
+        *embedded_salaries, 'nba', 'nba_salaries', 'player_id', 'salary')
+    assert sorted(salaries.values()) == [37436858.0, 42018900.0, 43006362.0]
+    assert len(read_dimension_from_postgresql(
+        *embedded_salaries, 'nba', 'nba_salaries', 'id', 'salary')) == 3
+
+
+def test_failed_reload_keeps_the_loaded_rows(mocker, embedded_salaries):
+    '''tests that a full load failing on a later batch leaves the
+    table with its previous rows and drops its reload table
+    '''
+    import main
+    import components.data_load as data_load
+    from components.db_backend import connect_to_database
+
+    main.main(['load', 'nba_salaries'])
+
+    insert_data = data_load.insert_data_into_postgresql
+    def fail_second_batch(*args, **kwargs):
+        if mock_insert.call_count > 1:
+            raise RuntimeError('the second batch failed')
+        return insert_data(*args, **kwargs)
+    mock_insert = mocker.patch.object(
+        data_load, 'insert_data_into_postgresql', side_effect=fail_second_batch)
+
+    with pytest.raises(RuntimeError, match='the second batch failed'):
+        main.main(['--force', '--pipelined', '--batch-rows', '2', 'load', 'nba_salaries'])
+    assert mock_insert.call_count == 2
+
+    conn = connect_to_database(embedded_salaries[0], 'test_db', '', '')
+    with conn.cursor() as cur:
+        cur.execute('SELECT salary FROM nba.nba_salaries ORDER BY salary')
+        assert [row[0] for row in cur.fetchall()] == [37436858.0, 42018900.0, 43006362.0]
+        cur.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_name LIKE '%reload%'")
+        assert cur.fetchall() == []
+    conn.close()
+
+
+def test_pipelined_load_shares_a_single_pool(mocker, embedded_salaries):
+    '''tests that the batches of a pipelined load with several
+    workers are transformed on a single pool of processes
+    '''
+    import main
+    import concurrent.futures
+    import components.data_collector  # binds its own pool before the patch
+
+    mock_pool = mocker.patch.object(
+        concurrent.futures, 'ProcessPoolExecutor', wraps=concurrent.futures.ProcessPoolExecutor)
+    spy_transform = mocker.spy(main, 'transform')
+
+    main.main(['--workers', '2', '--pipelined', 'load', 'nba_salaries'])
+
+    mock_pool.assert_called_once_with(max_workers=2)
+    executors = {call.args[5] for call in spy_transform.call_args_list}
+    assert len(executors) == 1 and None not in executors
@@ -0,0 +1,143 @@
+'''
+Unit tests for the functions included in
+the "memory_governor.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import time
+import threading
+import pandas as pd
+import pytest
+
+import components.memory_governor as memory_governor
+from components.memory_governor import MemoryGovernor, SpilledBatch
+from components.memory_governor import parse_memory_size
+from components.memory_governor import estimate_row_bytes
+from components.memory_governor import plan_batches
+from components.pipeline import run_pipelined
+
+
+def test_parse_memory_size():
+    '''tests the "parse_memory_size" function made in the "memory_governor.py" file'''
+    assert parse_memory_size('4G') == 4 * 1024 ** 3
+    assert parse_memory_size('512MB') == 512 * 1024 ** 2
+    assert parse_memory_size('1.5GiB') == int(1.5 * 1024 ** 3)
+    assert parse_memory_size('1000') == 1000
+
+    with pytest.raises(ValueError):
+        parse_memory_size('a lot')
+
+
+def test_estimate_row_bytes():
+    '''tests that the text columns weigh their length and the
+    overhead of the objects, the other ones their item size
+    '''
+    df = pd.DataFrame({
+        'season': pd.Series([2020, 2021], dtype='int32'),
+        'pts': [10.0, 20.0],
+        'player_name': ['LeBron James', None]})
+
+    assert estimate_row_bytes(df) == 4 + 8 + 8 + 49 + 12
+
+
+def test_plan_batches(mocker):
+    '''tests that the batches and the workers fit in the free part of the budget'''
+    mocker.patch.object(memory_governor, 'current_memory', return_value=200 * 1024 ** 2)
+
+    batch_rows, n_workers = plan_batches(
+        1024 ** 3, row_bytes=100, max_batch_rows=10 ** 7, n_workers=8)
+    assert n_workers == 2
+    available = 1024 ** 3 - 200 * 1024 ** 2 - 150 * 1024 ** 2
+    assert batch_rows == int(available / (100 * 3 * 7))
+
+    # the largest batch wanted is kept, the smallest one is 1000 rows
+    assert plan_batches(1024 ** 3, 100, 5000)[0] == 5000
+    assert plan_batches(100 * 1024 ** 2, 100, 10 ** 7) == (1000, 1)
+
+
+def test_pipeline_spills_batches_over_the_budget(mocker, tmp_path):
+    '''tests that the batches are spilled to disk and read back in
+    order when the memory is short, and that the spills are removed
+    '''
+    mocker.patch.object(memory_governor, 'current_memory', return_value=95)
+    governor = MemoryGovernor(100, spill_dir=str(tmp_path))
+    mocker.patch.object(governor, 'wait_for_room', return_value=True)
+    loaded = []
+
+    def load_function(batch):
+        assert not isinstance(batch, SpilledBatch)
+        loaded.append(batch)
+
+    run_pipelined(
+        (pd.DataFrame({'a': [i]}) for i in range(5)),
+        lambda batch: batch * 2,
+        load_function,
+        governor=governor)
+
+    assert [batch['a'][0] for batch in loaded] == [0, 2, 4, 6, 8]
+    # each batch is spilled by the reader and again by the transformer
+    assert governor.n_spilled == 10
+    # every batch read was counted back by the loader
+    assert governor.n_in_flight == 0
+    assert os.listdir(governor.spill_dir) == []
+    governor.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_spill_from_several_threads(mocker, tmp_path):
+    '''tests that the reader and the transformer spilling at the
+    same time share a single spill directory and count every batch
+    '''
+    mocker.patch.object(memory_governor, 'current_memory', return_value=95)
+    mkdtemp = memory_governor.tempfile.mkdtemp
+    mocker.patch.object(
+        memory_governor.tempfile, 'mkdtemp',
+        side_effect=lambda **kwargs: time.sleep(0.05) or mkdtemp(**kwargs))
+    governor = MemoryGovernor(100, spill_dir=str(tmp_path))
+    threads = [
+        threading.Thread(target=governor.spill_if_needed, args=(pd.DataFrame({'a': [i]}),))
+        for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert governor.n_spilled == 8
+    assert len(os.listdir(tmp_path)) == 1
+    assert len(os.listdir(governor.spill_dir)) == 8
+    governor.close()
+
+
+def test_wait_for_room(mocker):
+    '''tests that the reader is held back until the loader
+    finishes the batches in flight and the memory is freed
+    '''
+    governor = MemoryGovernor(100)
+    mocker.patch.object(
+        memory_governor, 'current_memory',
+        side_effect=lambda: 90 if governor.n_in_flight else 50)
+    governor.batch_read()
+    threading.Timer(0.05, governor.batch_loaded).start()
+
+    # woken up by the loader, long before the poll
+    start = time.monotonic()
+    assert governor.wait_for_room(poll_seconds=10)
+    assert time.monotonic() - start < 5
+
+
+def test_wait_for_room_without_batches_in_flight(mocker):
+    '''tests that the reader goes on when there is no batch left to free,
+    or when another stage of the pipeline failed
+    '''
+    mocker.patch.object(memory_governor, 'current_memory', return_value=90)
+    governor = MemoryGovernor(100)
+    assert not governor.wait_for_room()
+
+    governor.batch_read()
+    stop = threading.Event()
+    stop.set()
+    assert not governor.wait_for_room(stop)
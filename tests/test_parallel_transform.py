@@ -0,0 +1,69 @@
+'''
+Unit tests for the functions included in
+the "parallel_transform.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pandas.testing import assert_frame_equal
+
+import components.parallel_transform as parallel_transform
+from components.data_transform import transform_table_data
+from components.parallel_transform import transform_in_parallel
+from components.table_definitions import TABLES
+
+
+def test_transform_in_parallel():
+    '''tests that the "transform_in_parallel" function made in the
+    "parallel_transform.py" file gives the same result as a single process
+    '''
+    n_rows = 3000
+    raw_df = pd.DataFrame({
+        'Unnamed: 0': range(n_rows),
+        'playerName': [f'Player {i % 1000}' for i in range(n_rows)],
+        'seasonStartYear': [1990 + i % 30 for i in range(n_rows)],
+        'salary': [f'${i % 1000},000' for i in range(n_rows)],
+        'inflationAdjSalary': [f'${i % 1000},500' for i in range(n_rows)]})
+    definition = TABLES['nba_salaries']
+    definition = dict(definition, columns_to_drop=[])  # keep rows distinct
+
+    expected_output = transform_table_data(raw_df, definition)
+    actual_output = transform_in_parallel(
+        raw_df,
+        transform_table_data,
+        (definition,),
+        n_workers=3,
+        min_partition_rows=100)
+
+    assert_frame_equal(actual_output, expected_output)
+
+
+def test_transform_in_parallel_with_a_shared_pool(mocker):
+    '''tests that the "transform_in_parallel" function made in the
+    "parallel_transform.py" file runs every call on the pool it is given
+    '''
+    mock_pool = mocker.patch.object(parallel_transform, 'ProcessPoolExecutor')
+    raw_df = pd.DataFrame({
+        'Unnamed: 0': range(300),
+        'playerName': [f'Player {i}' for i in range(300)],
+        'seasonStartYear': [2020] * 300,
+        'salary': ['$1,000'] * 300,
+        'inflationAdjSalary': ['$1,500'] * 300})
+    definition = TABLES['nba_salaries']
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for batch_df in (raw_df.iloc[:150], raw_df.iloc[150:].reset_index(drop=True)):
+            actual_output = transform_in_parallel(
+                batch_df,
+                transform_table_data,
+                (definition,),
+                n_workers=2,
+                min_partition_rows=50,
+                executor=executor)
+            assert_frame_equal(actual_output, transform_table_data(batch_df, definition))
+
+    mock_pool.assert_not_called()
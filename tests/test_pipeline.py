@@ -0,0 +1,77 @@
+'''
+Unit tests for the functions included in
+the "pipeline.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import time
+import threading
+import pandas as pd
+import pytest
+
+from components.pipeline import run_pipelined
+from components.data_transform import drop_duplicates_across_batches
+
+
+def test_run_pipelined_keeps_the_order():
+    '''tests that the "run_pipelined" function made in the "pipeline.py"
+    file loads every transformed batch in the order of the batches
+    '''
+    loaded = []
+    n_batches = run_pipelined(
+        range(10), lambda batch: None if batch == 3 else batch * 2, loaded.append)
+
+    assert n_batches == 9
+    assert loaded == [0, 2, 4, 8, 10, 12, 14, 16, 18]
+
+
+def test_run_pipelined_backpressure():
+    '''tests that a slow loader holds the reader back instead of
+    letting the read batches pile up in memory
+    '''
+    read = []
+    max_ahead = []
+
+    def batches():
+        for i in range(20):
+            read.append(i)
+            yield i
+
+    def load_function(batch):
+        max_ahead.append(len(read) - batch)
+        time.sleep(0.01)
+
+    run_pipelined(batches(), lambda batch: batch, load_function, queue_size=2)
+
+    # two queues, the batch of the transformer and the one being read
+    assert max(max_ahead) <= 2 * 2 + 3
+
+
+def test_run_pipelined_raises_errors():
+    '''tests that an error in a stage stops the other ones and is raised'''
+    def transform_function(batch):
+        if batch == 5:
+            raise ValueError('bad batch')
+        return batch
+
+    threads_before = set(threading.enumerate())
+    with pytest.raises(ValueError, match='bad batch'):
+        run_pipelined(range(1000), transform_function, lambda batch: None)
+    # the threads of the pipeline were joined before the error was raised
+    assert set(threading.enumerate()) <= threads_before
+
+
+def test_drop_duplicates_across_batches():
+    '''tests that the rows already loaded by a previous batch are removed'''
+    seen_hashes = []
+    first_batch = pd.DataFrame({'a': [1, 2, 2], 'b': ['x', 'y', 'y']})
+    second_batch = pd.DataFrame({'a': [2, 3, 3], 'b': ['y', 'z', 'z']})
+
+    first_output = drop_duplicates_across_batches(first_batch, seen_hashes)
+    second_output = drop_duplicates_across_batches(second_batch, seen_hashes)
+
+    assert first_output.to_dict('list') == {'a': [1, 2], 'b': ['x', 'y']}
+    assert second_output.to_dict('list') == {'a': [3], 'b': ['z']}
@@ -0,0 +1,50 @@
+'''
+Unit tests for the functions included in
+the "profiling.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import os
+import pstats
+import threading
+
+from components.profiling import profile_stage
+
+
+def build_rows(n_rows):
+    '''Some work to be profiled'''
+    return [str(i) * 10 for i in range(n_rows)]
+
+
+def test_profile_stage(temp_dir):
+    '''tests the "profile_stage" function
+    made in the "profiling.py" file
+    '''
+    with profile_stage('transform', 'nba payroll', temp_dir):
+        build_rows(10000)
+
+    # one pstats file for the flamegraph tools and one summary per stage
+    prof_path = os.path.join(temp_dir, 'transform_nba_payroll.prof')
+    stats = pstats.Stats(prof_path)
+    assert any(function[2] == 'build_rows' for function in stats.stats)
+
+    with open(os.path.join(temp_dir, 'transform_nba_payroll.txt')) as file:
+        summary = file.read()
+    assert 'Top 25 functions by cumulative time' in summary
+    assert 'Top 25 allocation sites' in summary
+
+
+def test_profile_stage_threads(temp_dir):
+    '''tests that the "profile_stage" function made in the "profiling.py"
+    file merges the profiles of the threads wrapped by it
+    '''
+    with profile_stage('pipeline', 'nba payroll', temp_dir) as profile_thread:
+        thread = threading.Thread(target=profile_thread(build_rows), args=(10000,))
+        thread.start()
+        thread.join()
+
+    stats = pstats.Stats(os.path.join(temp_dir, 'pipeline_nba_payroll.prof'))
+    assert any(function[2] == 'build_rows' for function in stats.stats)
@@ -0,0 +1,101 @@
+'''
+Unit tests for the functions included in
+the "data_read.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import time
+import pandas as pd
+
+import components.data_read as data_read
+from components.data_read import ResultCache
+from components.data_read import read_team_payroll_history
+from components.data_load import create_schema_into_postgresql
+from components.data_load import create_table_into_postgresql
+from components.data_load import insert_data_into_postgresql
+from components.data_load import insert_dimension_into_postgresql
+from components.data_transform import create_auxiliary_columns
+from components.table_definitions import DIMENSIONS, TABLES
+
+
+def test_result_cache():
+    '''tests the LRU eviction, the time to live and the
+    invalidation by table of the "ResultCache" class
+    '''
+    cache = ResultCache(max_entries=2, ttl_seconds=0.05)
+    cache.put('a', (1,), ['nba.players'])
+    cache.put('b', (2,), ['nba.teams'])
+    cache.get('a')
+    cache.put('c', (3,), ['nba.teams'])
+
+    # "b" was the least recently used
+    assert cache.get('b') is None and cache.get('a') == (1,)
+
+    cache.invalidate('nba.teams')
+    assert cache.get('c') is None and cache.get('a') == (1,)
+
+    time.sleep(0.06)
+    assert cache.get('a') is None
+
+
+def test_read_team_payroll_history(mocker, embedded_db_config):
+    '''tests that the "read_team_payroll_history" function made in the
+    "data_read.py" file reads the database once, and again only after the
+    loader committed new rows into one of the tables of the query
+    '''
+    mocker.patch.object(data_read, 'RESULT_CACHE', ResultCache())
+    spy_query = mocker.spy(data_read, 'run_prepared_query')
+    host_name = embedded_db_config[0]
+    create_schema_into_postgresql(host_name, 'test_db', '', '', 'nba')
+    for table_name, definition in [
+            ('teams', DIMENSIONS['teams']), ('nba_payroll', TABLES['nba_payroll'])]:
+        create_table_into_postgresql(
+            *embedded_db_config, 'nba', table_name, definition['columns'])
+    insert_dimension_into_postgresql(
+        *embedded_db_config, 'nba', 'teams',
+        pd.DataFrame({'team_id': [1], 'team_key': ['la lakers'], 'team_name': ['LA Lakers']}))
+
+    def load_payroll(season, first_id):
+        payroll_df = pd.DataFrame({
+            'team_id': [1], 'season_start_year': [season],
+            'payroll': [1e8], 'inflation_adj_payroll': [1.1e8]})
+        create_auxiliary_columns(payroll_df)
+        payroll_df['id'] = first_id
+        insert_data_into_postgresql(*embedded_db_config, 'nba', 'nba_payroll', payroll_df)
+
+    load_payroll(2020, 1)
+    first_read = read_team_payroll_history(*embedded_db_config, ' LAL')
+    second_read = read_team_payroll_history(*embedded_db_config, 'Lakers')
+    assert first_read == second_read == ((2020, 1e8, 1.1e8),)
+    # the team key is resolved, then the payroll is read
+    assert spy_query.call_count == 2
+
+    load_payroll(2021, 2)
+    third_read = read_team_payroll_history(*embedded_db_config, 'Lakers')
+    assert [row[0] for row in third_read] == [2020, 2021]
+    assert spy_query.call_count == 4
+
+
+def test_read_sharded_team_payroll_history(mocker, embedded_sharded_payroll):
+    '''tests that the "read_team_payroll_history" function made in the
+    "data_read.py" file merges the seasons of a team from both nodes of
+    the sharded payroll, whose teams are only on the first node
+    '''
+    import main
+
+    mocker.patch.object(data_read, 'RESULT_CACHE', ResultCache())
+    main.create_tables(main.read_database_config(), ['player_box_score_stats'])
+    main.main(['load', 'nba_payroll'])
+
+    nodes = embedded_sharded_payroll
+    db_config = (nodes[0], '5432', 'test_db', 'test_user', 'test_password')
+    shard_nodes = [(nodes[1], '5432')]
+    lakers = read_team_payroll_history(*db_config, 'Lakers', shard_nodes=shard_nodes)
+    bulls = read_team_payroll_history(*db_config, 'Bulls', shard_nodes=shard_nodes)
+
+    assert [row[:2] for row in lakers] == [(1995, 24e6), (2020, 131e6)]
+    assert [row[:2] for row in bulls] == [(2021, 125e6)]
+    assert read_team_payroll_history(*db_config, 'Knicks', shard_nodes=shard_nodes) == ()
@@ -0,0 +1,54 @@
+'''
+Unit tests for the functions included in
+the "sharding.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import pandas as pd
+import pytest
+
+from components.sharding import assign_shards
+from components.sharding import split_into_shards
+
+
+def test_assign_shards_by_range():
+    '''tests that the "assign_shards" function made in the "sharding.py"
+    file sends each season to the node of its range
+    '''
+    df = pd.DataFrame({'season': [1990, 1999, 2000, 2010, 2022]})
+    sharding = {'method': 'range', 'column': 'season', 'bounds': [2000, 2010]}
+
+    assert assign_shards(df, sharding, 3).tolist() == [0, 0, 1, 2, 2]
+    # the ranges beyond the last node wrap around
+    assert assign_shards(df, sharding, 2).tolist() == [0, 0, 1, 0, 0]
+
+
+def test_assign_shards_by_hash():
+    '''tests that the rows with the same value always go to the same node'''
+    df = pd.DataFrame({'player_id': [1, 2, 3, 1, 2, 3] * 10})
+    sharding = {'method': 'hash', 'column': 'player_id'}
+
+    shards = assign_shards(df, sharding, 4)
+    assert set(shards) <= {0, 1, 2, 3}
+    assert all(
+        len(set(shards[df['player_id'] == player_id])) == 1 for player_id in [1, 2, 3])
+
+    with pytest.raises(ValueError):
+        assign_shards(df, {'method': 'round_robin', 'column': 'player_id'}, 4)
+
+
+def test_split_into_shards():
+    '''tests that every row lands on exactly one node, or on all of
+    them for the replicated tables
+    '''
+    df = pd.DataFrame({'season': [1995, 2005, 1998, 2020], 'pts': [1, 2, 3, 4]})
+
+    batches = split_into_shards(
+        df, {'method': 'range', 'column': 'season', 'bounds': [2000]}, 2)
+    assert [batch['pts'].tolist() for batch in batches] == [[1, 3], [2, 4]]
+
+    batches = split_into_shards(df, {'method': 'replicate'}, 3)
+    assert len(batches) == 3 and all(batch.equals(df) for batch in batches)
@@ -14,6 +14,11 @@ from components.data_transform import transform_json_data
 from components.data_transform import transform_string_to_float
 from components.data_transform import transform_string_to_datetime
 from components.data_transform import create_auxiliary_columns
+from components.data_transform import assign_surrogate_keys
+from components.data_transform import reconcile_surrogate_keys
+from components.data_transform import transform_table_data
+from components.data_transform import select_raw_columns
+from components.table_definitions import DIMENSIONS, TABLES
 
 
 def test_transform_json_data(raw_json_df):
@@ -67,3 +72,94 @@ def test_create_auxiliary_columns(raw_csv_df):
     create_auxiliary_columns(raw_csv_df)
 
     assert all([item in raw_csv_df.columns for item in ['id','created_at', 'updated_at']])
+
+
+def test_assign_surrogate_keys():
+    '''tests the "assign_surrogate_keys" function
+    made in the "data_transform.py" file
+    '''
+    raw_df = pd.DataFrame({
+        'season': [2022, 2022, 2022],
+        'player_name': ['Nikola Jokić', 'nikola jokic', 'J.J. Redick'],
+        'pts': [30, 25, 12]})
+    key_mapping = {'jj redick': 7}
+
+    transformed_df, new_entries = assign_surrogate_keys(
+        raw_df, 'player_name', 'player_id', key_mapping)
+
+    assert transformed_df.columns.tolist() == ['season', 'player_id', 'pts']
+    assert transformed_df['player_id'].tolist() == [8, 8, 7]
+    assert new_entries.values.tolist() == [[8, 'nikola jokic', 'Nikola Jokić']]
+    assert key_mapping == {'jj redick': 7, 'nikola jokic': 8}
+
+
+def test_assign_surrogate_keys_to_team_spellings():
+    '''tests that the spellings of a team in the payroll, the box score
+    and the player stats share its id, so their tables can be joined
+    '''
+    key_mapping = {}
+    payroll_df, _ = assign_surrogate_keys(
+        pd.DataFrame({'team': ['LA Lakers', 'Golden State', 'New Orleans']}),
+        'team', 'team_id', key_mapping, DIMENSIONS['teams']['aliases'])
+    box_score_df, new_entries = assign_surrogate_keys(
+        pd.DataFrame({'team': ['LAL', 'GSW', 'NOK']}),
+        'team', 'team_id', key_mapping, DIMENSIONS['teams']['aliases'])
+    player_stats_df, _ = assign_surrogate_keys(
+        pd.DataFrame({'tm': ['LAL', 'GSW', 'NOH']}),
+        'tm', 'team_id', key_mapping, DIMENSIONS['teams']['aliases'])
+
+    assert payroll_df['team_id'].tolist() == [1, 2, 3]
+    assert box_score_df['team_id'].tolist() == [1, 2, 3]
+    assert player_stats_df['team_id'].tolist() == [1, 2, 3]
+    assert new_entries.empty
+
+
+def test_reconcile_surrogate_keys():
+    '''tests that the "reconcile_surrogate_keys" function made in the
+    "data_transform.py" file swaps the ids taken by another run at once
+    '''
+    transformed_df = pd.DataFrame({'player_id': pd.array([7, 8, 9, 8], dtype='Int64')})
+    new_entries = pd.DataFrame({
+        'player_id': [8, 9],
+        'natural_key': ['nikola jokic', 'luka doncic'],
+        'player_name': ['Nikola Jokić', 'Luka Dončić']})
+    key_mapping = {'jj redick': 7, 'nikola jokic': 8, 'luka doncic': 9}
+
+    # another run stored luka doncic with the id 8, nikola jokic gets the next one
+    reconciled_df = reconcile_surrogate_keys(
+        transformed_df, 'player_id', new_entries,
+        {'nikola jokic': 10, 'luka doncic': 8}, key_mapping)
+
+    assert reconciled_df['player_id'].tolist() == [7, 10, 8, 10]
+    assert key_mapping == {'jj redick': 7, 'nikola jokic': 10, 'luka doncic': 8}
+
+
+def test_transform_table_data():
+    '''tests the "transform_table_data" function
+    made in the "data_transform.py" file
+    '''
+    raw_df = pd.DataFrame({
+        'Unnamed: 0': [0, 1],
+        'team': ['Atlanta', 'Boston'],
+        'seasonStartYear': [1990, 1990],
+        'payroll': ['$1,000', '$2,500'],
+        'inflationAdjPayroll': ['$2,000', '$5,000']})
+
+    transformed_df = transform_table_data(raw_df, TABLES['nba_payroll'])
+
+    assert transformed_df.columns.tolist() == [
+        'team', 'season_start_year', 'payroll', 'inflation_adj_payroll']
+    assert transformed_df['payroll'].tolist() == [1000.0, 2500.0]
+
+
+def test_select_raw_columns():
+    '''tests that the "select_raw_columns" function made in the
+    "data_transform.py" file keeps only the columns that reach the table
+    '''
+    is_needed = select_raw_columns(TABLES['player_stats'])
+    raw_columns = [
+        'Unnamed: 0.1', 'Unnamed: 0', 'Season', 'Player', 'Pos', 'Age', 'Tm',
+        'G', 'FG%', '3P', 'eFG%', 'Player-additional']
+
+    assert [col for col in raw_columns if is_needed(col)] == [
+        'Season', 'Player', 'Pos', 'Age', 'Tm', 'G', 'FG%', '3P', 'eFG%']
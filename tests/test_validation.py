@@ -0,0 +1,55 @@
+'''
+Unit tests for the functions included in
+the "data_validation.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import json
+import pandas as pd
+
+from components.data_validation import validate_dataframe
+from components.data_transform import transform_table_data
+from components.table_definitions import TABLES
+
+
+def test_validate_dataframe():
+    '''tests the "validate_dataframe" function
+    made in the "data_validation.py" file
+    '''
+    raw_df = pd.DataFrame({
+        'Unnamed: 0': [0, 1, 2, 3],
+        'playerName': ['LeBron James', None, 'Stephen Curry', 'Kevin Durant'],
+        'seasonStartYear': [2022, 2022, 2022, 2022],
+        'salary': ['$44,474,988', '$1,000', '$48,070,014', '$4x,000'],
+        'inflationAdjSalary': ['$44,474,988', '$1,000', '$-1', '$42,000']})
+    validation_rules = TABLES['nba_salaries']['validation_rules']
+
+    clean_df, quarantine_df = validate_dataframe(raw_df, validation_rules)
+
+    assert clean_df['playerName'].tolist() == ['LeBron James']
+    assert quarantine_df['reason_codes'].tolist() == [
+        'null_value:playername',
+        'out_of_range:inflationadjsalary',
+        'invalid_type:salary']
+    assert json.loads(quarantine_df['raw_record'][2])['salary'] == '$4x,000'
+
+    # the clean rows can be transformed without failing
+    transformed_df = transform_table_data(clean_df, TABLES['nba_salaries'])
+    assert transformed_df['salary'].tolist() == [44474988.0]
+
+
+def test_validate_dataframe_without_invalid_rows():
+    '''tests that a clean dataframe gives an empty quarantine'''
+    raw_df = pd.DataFrame({
+        'playerName': ['LeBron James'],
+        'seasonStartYear': [2022],
+        'salary': ['$44,474,988'],
+        'inflationAdjSalary': ['$44,474,988']})
+
+    clean_df, quarantine_df = validate_dataframe(
+        raw_df, TABLES['nba_salaries']['validation_rules'])
+
+    assert len(clean_df) == 1 and quarantine_df.empty
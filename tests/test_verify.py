@@ -0,0 +1,67 @@
+'''
+Unit tests for the functions included in
+the "data_verify.py" component
+
+Author: Vitor Abdo
+Date: October/2026
+'''
+
+# import necessary packages
+import pandas as pd
+
+from components.data_verify import compute_dataframe_checksums
+from components.data_verify import verify_load_into_postgresql
+from components.data_load import create_schema_into_postgresql
+from components.data_load import create_table_into_postgresql
+from components.data_load import insert_data_into_postgresql
+from components.data_transform import create_auxiliary_columns
+from components.table_definitions import TABLES
+
+
+def test_compute_dataframe_checksums():
+    '''tests the "compute_dataframe_checksums" function made
+    in the "data_verify.py" file, the row order does not matter
+    '''
+    df = pd.DataFrame({
+        'name': ['Bulls', None, 'Lakers'],
+        'wins': [1.5, 2.0, None],
+        'day': pd.to_datetime(['1970-01-02', '1970-01-01', None])})
+
+    checksums = compute_dataframe_checksums(df)
+    assert checksums == {
+        'row_count': 3,
+        'name_count': 2, 'name_sum': 11.0,
+        'wins_count': 2, 'wins_sum': 3.5,
+        'day_count': 2, 'day_sum': 86400.0}
+    assert compute_dataframe_checksums(df.iloc[::-1]) == checksums
+
+
+def test_verify_load_into_embedded_database(embedded_db_config):
+    '''tests that the "verify_load_into_postgresql" function verifies a
+    complete load and reports the rows discarded by "ON CONFLICT DO NOTHING"
+    '''
+    create_schema_into_postgresql(embedded_db_config[0], 'test_db', '', '', 'nba')
+    create_table_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_salaries', TABLES['nba_salaries']['columns'])
+
+    def salaries(salary):
+        salaries_df = pd.DataFrame({
+            'player_id': [1, 2],
+            'season_start_year': [2020, 2021],
+            'salary': [salary, salary * 2],
+            'inflation_adj_salary': [salary * 1.1, None]})
+        create_auxiliary_columns(salaries_df)
+        return salaries_df
+
+    loaded_df = salaries(37436858.0)
+    insert_data_into_postgresql(*embedded_db_config, 'nba', 'nba_salaries', loaded_df)
+    assert verify_load_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_salaries', loaded_df) == []
+
+    # the same ids again: the whole batch is silently discarded
+    discarded_df = salaries(1000.0)
+    insert_data_into_postgresql(*embedded_db_config, 'nba', 'nba_salaries', discarded_df)
+    mismatches = verify_load_into_postgresql(
+        *embedded_db_config, 'nba', 'nba_salaries', discarded_df)
+    assert [mismatch.split(':')[0] for mismatch in mismatches] == [
+        'nba.nba_salaries salary_sum', 'nba.nba_salaries inflation_adj_salary_sum']